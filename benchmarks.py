@@ -0,0 +1,227 @@
+"""
+File: benchmarks.py
+Mô tả:
+    Các phép đo hiệu năng chạy từ dòng lệnh, dùng để so sánh trước/sau khi tối ưu.
+
+    Ví dụ:
+        python benchmarks.py video-step video.mp4 --frames 300
+        python benchmarks.py display video_4k.mp4 --frames 60
+        python benchmarks.py decoders video.mp4 --seeks 30
+        python benchmarks.py image-load dataset/cat --images 20
+"""
+
+import argparse
+import os
+import random
+import time
+import cv2
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+from frame_reader import FrameReader
+from frame_display import FrameDisplay
+from label_prefetch import load_scaled_image
+from video_decoder import available_backends, open_capture
+
+def bench_video_step(path, start=0, frames=300):
+    """
+    Đo tốc độ bước qua từng frame (như bấm Next Frame liên tục) theo hai cách:
+    seek trước mỗi lần đọc (cách cũ) và đọc tuần tự qua FrameReader.
+
+    :param path: Đường dẫn file video.
+    :param start: Frame bắt đầu.
+    :param frames: Số frame bước qua.
+    :return: Dict tên cách đọc -> số frame/giây.
+    """
+    results = {}
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Không mở được video: {path}")
+    begin = time.perf_counter()
+    count = 0
+    for index in range(start, start + frames):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, _ = cap.read()
+        if not ret:
+            break
+        count += 1
+    results["seek mỗi frame"] = count / (time.perf_counter() - begin)
+    cap.release()
+
+    cap = cv2.VideoCapture(path)
+    reader = FrameReader(cap)
+    begin = time.perf_counter()
+    count = 0
+    for index in range(start, start + frames):
+        if reader.read(index) is None:
+            break
+        count += 1
+    results["đọc tuần tự"] = count / (time.perf_counter() - begin)
+    cap.release()
+    return results
+
+def bench_display(path, frames=60, width=600, height=400):
+    """
+    Đo thời gian chuyển một frame đã decode thành QPixmap vừa label width x height theo hai
+    cách: chuyển màu và thu nhỏ bằng Qt trên frame gốc (cách cũ) và FrameDisplay.
+
+    Các frame được decode trước nên thời gian decode không được tính.
+
+    :param path: Đường dẫn file video.
+    :param frames: Số frame đo.
+    :return: Dict tên cách hiển thị -> mili giây mỗi frame.
+    """
+    app = QApplication.instance() or QApplication([])  # QPixmap cần QGuiApplication
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Không mở được video: {path}")
+    decoded = []
+    while len(decoded) < frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        decoded.append(frame)
+    cap.release()
+    if not decoded:
+        raise SystemExit("Không đọc được frame nào.")
+
+    results = {}
+    begin = time.perf_counter()
+    for frame in decoded:
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image = QImage(rgb.data, rgb.shape[1], rgb.shape[0], 3 * rgb.shape[1], QImage.Format_RGB888)
+        QPixmap.fromImage(image).scaled(QSize(width, height), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    results["cvtColor + QPixmap.scaled"] = (time.perf_counter() - begin) * 1000 / len(decoded)
+
+    display = FrameDisplay()
+    begin = time.perf_counter()
+    for frame in decoded:
+        display.to_pixmap(frame, width, height)
+    results["FrameDisplay (thu nhỏ trước, BGR888)"] = (time.perf_counter() - begin) * 1000 / len(decoded)
+    app.processEvents()
+    return results
+
+def bench_decoders(path, seeks=20, frames=300, seed=0):
+    """
+    So sánh các backend decode (video_decoder.py): độ trễ seek tới các vị trí ngẫu nhiên
+    (seek rồi đọc một frame) và tốc độ decode tuần tự (kể cả chuyển sang mảng BGR).
+
+    :param path: Đường dẫn file video.
+    :param seeks: Số lần seek.
+    :param frames: Số frame đọc tuần tự.
+    :param seed: Seed chọn vị trí seek (giống nhau cho mọi backend).
+    :return: Dict backend -> dict: frame_count, fps, seek_ms, decode_fps.
+    """
+    results = {}
+    for backend in available_backends():
+        cap = open_capture(path, backend)
+        if not cap.isOpened():
+            print(f"{backend}: không mở được video")
+            continue
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        stats = {"frame_count": total, "fps": cap.get(cv2.CAP_PROP_FPS)}
+        positions = random.Random(seed).sample(range(max(1, total - 1)), min(seeks, max(1, total - 1)))
+        begin = time.perf_counter()
+        for index in positions:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            cap.read()
+        stats["seek_ms"] = (time.perf_counter() - begin) * 1000 / len(positions)
+
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        begin = time.perf_counter()
+        count = 0
+        while count < frames:
+            ret, _ = cap.read()
+            if not ret:
+                break
+            count += 1
+        stats["decode_fps"] = count / (time.perf_counter() - begin)
+        cap.release()
+        results[backend] = stats
+    return results
+
+def bench_image_load(folder, images=20, width=600, height=400):
+    """
+    Đo thời gian và bộ nhớ ảnh decode khi load một ảnh vào khung gán nhãn width x height theo
+    hai cách: QImage đầy đủ độ phân giải rồi QImage.scaled (cách cũ) và load_scaled_image
+    (thu nhỏ ngay khi decode).
+
+    Bộ nhớ là tổng số byte của các QImage phải giữ cùng lúc trong một lần load.
+
+    :param folder: Thư mục chứa ảnh (.jpg, .jpeg, .png, .webp).
+    :param images: Số ảnh đo tối đa.
+    :return: Dict tên cách load -> tuple (mili giây mỗi ảnh, MB mỗi ảnh).
+    """
+    app = QApplication.instance() or QApplication([])
+    paths = sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                   if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')))[:images]
+    if not paths:
+        raise SystemExit(f"Không có ảnh trong thư mục: {folder}")
+
+    results = {}
+    total_bytes = 0
+    begin = time.perf_counter()
+    for path in paths:
+        image = QImage(path)
+        scale = min(width / image.width(), height / image.height())
+        scaled = image.scaled(int(image.width() * scale), int(image.height() * scale),
+                              Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        total_bytes += image.sizeInBytes() + scaled.sizeInBytes()
+    results["QImage + scaled"] = ((time.perf_counter() - begin) * 1000 / len(paths),
+                                  total_bytes / len(paths) / (1024 * 1024))
+
+    total_bytes = 0
+    begin = time.perf_counter()
+    for path in paths:
+        scaled, _, _ = load_scaled_image(path, width, height)
+        total_bytes += scaled.sizeInBytes()
+    results["load_scaled_image (QImageReader.setScaledSize)"] = (
+        (time.perf_counter() - begin) * 1000 / len(paths), total_bytes / len(paths) / (1024 * 1024))
+    app.processEvents()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo hiệu năng các thao tác của công cụ.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    step = subparsers.add_parser("video-step", help="Tốc độ bước qua từng frame của video")
+    step.add_argument("video", help="Đường dẫn file video")
+    step.add_argument("--start", type=int, default=0, help="Frame bắt đầu")
+    step.add_argument("--frames", type=int, default=300, help="Số frame bước qua")
+
+    display = subparsers.add_parser("display", help="Chi phí hiển thị một frame đã decode")
+    display.add_argument("video", help="Đường dẫn file video")
+    display.add_argument("--frames", type=int, default=60, help="Số frame đo")
+    display.add_argument("--width", type=int, default=600, help="Chiều rộng label")
+    display.add_argument("--height", type=int, default=400, help="Chiều cao label")
+
+    decoders = subparsers.add_parser("decoders", help="So sánh seek và decode tuần tự giữa các backend")
+    decoders.add_argument("video", help="Đường dẫn file video")
+    decoders.add_argument("--seeks", type=int, default=20, help="Số lần seek tới vị trí ngẫu nhiên")
+    decoders.add_argument("--frames", type=int, default=300, help="Số frame đọc tuần tự")
+
+    image_load = subparsers.add_parser("image-load", help="Thời gian và bộ nhớ load ảnh vào tab gán nhãn")
+    image_load.add_argument("folder", help="Thư mục chứa ảnh")
+    image_load.add_argument("--images", type=int, default=20, help="Số ảnh đo tối đa")
+    image_load.add_argument("--width", type=int, default=600, help="Chiều rộng khung gán nhãn")
+    image_load.add_argument("--height", type=int, default=400, help="Chiều cao khung gán nhãn")
+
+    args = parser.parse_args()
+    if args.command == "video-step":
+        for name, fps in bench_video_step(args.video, args.start, args.frames).items():
+            print(f"{name}: {fps:.1f} frame/s")
+    elif args.command == "display":
+        for name, ms in bench_display(args.video, args.frames, args.width, args.height).items():
+            print(f"{name}: {ms:.2f} ms/frame")
+    elif args.command == "decoders":
+        for backend, stats in bench_decoders(args.video, args.seeks, args.frames).items():
+            print(f"{backend}: {stats['frame_count']} frame @ {stats['fps']:.3f} fps, "
+                  f"seek {stats['seek_ms']:.1f} ms, decode tuần tự {stats['decode_fps']:.1f} frame/s")
+    elif args.command == "image-load":
+        for name, (ms, mb) in bench_image_load(args.folder, args.images, args.width, args.height).items():
+            print(f"{name}: {ms:.1f} ms/ảnh, {mb:.1f} MB ảnh decode/ảnh")
+
+if __name__ == "__main__":
+    main()
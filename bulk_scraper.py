@@ -0,0 +1,306 @@
+"""
+File: bulk_scraper.py
+Mô tả:
+    Chế độ scraping hàng loạt không cần giao diện. Nhận danh sách cặp (class, từ khóa),
+    tìm ảnh bằng DuckDuckGo (giống ScrapingTab.fetch_images) và tải toàn bộ kết quả vào
+    dataset/<class>/ bằng một HTTP session dùng chung có connection pool, nhiều worker,
+    giới hạn số kết nối trên mỗi host và retry có backoff.
+    Kết quả tìm kiếm và trạng thái từng URL được lưu vào SessionStore, nên chạy lại cùng
+    lệnh sau khi bị dừng sẽ tiếp tục từ chỗ đã dừng (dùng --fresh để truy vấn lại).
+
+    Ví dụ:
+        python bulk_scraper.py --pair cat "cute cat" --pair dog "dog photo" --workers 16
+        python bulk_scraper.py --pairs-file classes.txt --per-host 4
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from image_search import search_images, store_image
+from dedup_index import shared_index
+from image_normalize import ImageNormalizer
+from scrape_session import SessionStore, content_hash, session_status, DOWNLOADED, SKIPPED, FAILED
+
+def make_session(pool_size=32, retries=3, backoff=0.5):
+    """
+    Tạo requests.Session dùng chung với connection pool và retry có backoff.
+
+    :param pool_size: Số kết nối tối đa giữ lại cho mỗi host.
+    :param retries: Số lần thử lại khi lỗi kết nối hoặc gặp status 429/5xx.
+    :param backoff: Hệ số backoff (giây) giữa các lần thử lại.
+    :return: Đối tượng requests.Session.
+    """
+    retry = Retry(total=retries, backoff_factor=backoff,
+                  status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET"]),
+                  respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class HostLimiter:
+    """
+    Giới hạn số request đồng thời tới cùng một host.
+    """
+    def __init__(self, per_host=4):
+        """
+        :param per_host: Số kết nối đồng thời tối đa trên mỗi host.
+        """
+        self.per_host = per_host
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        """
+        Lấy semaphore của host tương ứng với URL (tạo mới nếu chưa có).
+
+        :param url: URL cần tải.
+        :return: Semaphore của host, dùng với câu lệnh `with`.
+        """
+        host = urlsplit(url).netloc
+        with self.lock:
+            semaphore = self.semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host)
+                self.semaphores[host] = semaphore
+        return semaphore
+
+class BulkStats:
+    """
+    Thống kê thông lượng của một lần scraping hàng loạt (an toàn đa luồng).
+    """
+    def __init__(self):
+        """
+        Khởi tạo bộ đếm và mốc thời gian bắt đầu.
+        """
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        self.downloaded = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.cpu_time = 0.0
+        self.total_bytes = 0
+
+    def add_success(self, size):
+        """
+        Ghi nhận một ảnh tải thành công.
+
+        :param size: Kích thước dữ liệu (byte).
+        """
+        with self.lock:
+            self.downloaded += 1
+            self.total_bytes += size
+
+    def add_failure(self):
+        """
+        Ghi nhận một ảnh tải thất bại.
+        """
+        with self.lock:
+            self.failed += 1
+
+    def add_normalized(self, result):
+        """
+        Ghi nhận kết quả chuẩn hóa của một ảnh (thời gian CPU, bị loại hay không).
+
+        :param result: NormalizeResult.
+        """
+        with self.lock:
+            self.cpu_time += result.cpu_time
+            if not result.ok:
+                self.rejected += 1
+
+    def add_duplicate(self):
+        """
+        Ghi nhận một ảnh bị bỏ qua vì gần trùng với ảnh đã có.
+        """
+        with self.lock:
+            self.duplicates += 1
+
+    def summary(self):
+        """
+        :return: Chuỗi tóm tắt số ảnh, images/s, MB/s và số lỗi.
+        """
+        elapsed = max(time.perf_counter() - self.start_time, 1e-9)
+        mb = self.total_bytes / (1024 * 1024)
+        return (f"Đã tải {self.downloaded} ảnh ({mb:.1f} MB) trong {elapsed:.1f}s - "
+                f"{self.downloaded / elapsed:.2f} images/s, {mb / elapsed:.2f} MB/s, "
+                f"{self.failed} lỗi, {self.rejected} ảnh không hợp lệ, "
+                f"{self.duplicates} ảnh gần trùng bị bỏ qua, "
+                f"CPU chuẩn hóa {self.cpu_time:.1f}s")
+
+def download_one(session, limiter, url, class_name, index, stats, root="dataset", timeout=10,
+                 dedup_index=None, normalizer=None, session_store=None, session_id=None):
+    """
+    Tải một ảnh và lưu vào dataset/<class_name>/<class_name>_<index>.jpg.
+
+    Nếu có normalizer, ảnh được kiểm tra và encode lại thành JPEG trong process pool trước khi lưu.
+    Nếu có dedup_index, ảnh gần trùng với ảnh đã có trong dataset sẽ bị bỏ qua.
+
+    :param session: requests.Session dùng chung.
+    :param limiter: HostLimiter giới hạn kết nối trên mỗi host.
+    :param url: URL ảnh.
+    :param class_name: Tên class.
+    :param index: Vị trí ảnh trong kết quả tìm kiếm.
+    :param stats: BulkStats để ghi nhận kết quả.
+    :param dedup_index: DedupIndex dùng để bỏ qua ảnh gần trùng (None để tắt).
+    :param normalizer: ImageNormalizer dùng để chuẩn hóa ảnh (None để lưu nguyên dữ liệu tải về).
+    :param session_store: SessionStore để ghi trạng thái của URL (None để không ghi).
+    :param session_id: ID phiên của class trong session_store.
+    :return: Đường dẫn file đã lưu hoặc None nếu thất bại hoặc bị bỏ qua.
+    """
+    try:
+        with limiter.acquire(url):
+            response = session.get(url, timeout=timeout)
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}")
+        size = len(response.content)
+        status, detail, result = store_image(response.content, class_name, index, root,
+                                             normalizer, dedup_index)
+        if session_store is not None:
+            session_store.mark(session_id, url, session_status(status), content_hash(response.content))
+        if result is not None:
+            stats.add_normalized(result)
+        if status == "rejected":
+            print(f"Bỏ qua {url}: {detail}")
+            if result is None:
+                stats.add_failure()
+            return None
+        if status == "duplicate":
+            stats.add_duplicate()
+            return None
+    except Exception as e:
+        print(f"Lỗi download {url}: {e}")
+        if session_store is not None:
+            session_store.mark(session_id, url, FAILED)
+        stats.add_failure()
+        return None
+    stats.add_success(size)
+    return detail
+
+def bulk_scrape(pairs, workers=16, per_host=4, max_results=1000, retries=3, backoff=0.5,
+                root="dataset", timeout=10, dedup=True, normalize=True, quality=90, max_side=1600,
+                fresh=False):
+    """
+    Tìm và tải ảnh cho nhiều class cùng lúc.
+
+    Các truy vấn DuckDuckGo chạy tuần tự (để tránh bị giới hạn tần suất), còn việc
+    tải ảnh của mỗi class được đưa vào thread pool ngay khi có kết quả.
+    Nếu phiên của một class đã có kết quả lưu trên đĩa, dùng lại kết quả đó và bỏ qua
+    các URL đã tải hoặc đã bị bỏ qua (URL lỗi được thử lại).
+
+    :param pairs: Danh sách tuple (class, từ khóa).
+    :param workers: Số worker tải ảnh đồng thời.
+    :param per_host: Số kết nối đồng thời tối đa trên mỗi host.
+    :param max_results: Số kết quả tối đa cho mỗi từ khóa.
+    :param retries: Số lần thử lại cho mỗi ảnh.
+    :param backoff: Hệ số backoff (giây) giữa các lần thử lại.
+    :param root: Thư mục gốc của dataset.
+    :param timeout: Thời gian chờ tối đa (giây) cho mỗi request.
+    :param dedup: Bỏ qua ảnh gần trùng với ảnh đã có trong dataset.
+    :param normalize: Kiểm tra và encode lại ảnh thành JPEG trước khi lưu.
+    :param quality: Chất lượng JPEG khi chuẩn hóa.
+    :param max_side: Cạnh dài nhất tối đa (pixel) khi chuẩn hóa.
+    :param fresh: Truy vấn lại từ đầu thay vì dùng kết quả đã lưu trong phiên.
+    :return: Đối tượng BulkStats.
+    """
+    session = make_session(pool_size=max(workers, per_host), retries=retries, backoff=backoff)
+    limiter = HostLimiter(per_host)
+    stats = BulkStats()
+    dedup_index = shared_index(root) if dedup else None
+    normalizer = ImageNormalizer(quality=quality, max_side=max_side) if normalize else None
+    session_store = SessionStore(os.path.join(root, ".scrape_sessions.db"))
+    # Thoát khỏi khối with sẽ chờ tất cả các ảnh được tải xong
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for class_name, keyword in pairs:
+            session_id = session_store.open_session(class_name, keyword)
+            _, _, _, exhausted = session_store.session_info(session_id)
+            results = session_store.load_results(session_id) if exhausted and not fresh else []
+            if results:
+                print(f"[{class_name}] Tiếp tục phiên đã lưu: {len(results)} kết quả cho '{keyword}'")
+            else:
+                try:
+                    results = search_images(keyword, max_results=max_results)
+                except Exception as e:
+                    print(f"Lỗi khi fetch ảnh cho '{keyword}': {e}")
+                    continue
+                session_store.reset_results(session_id)
+                session_store.add_results(session_id, 0, results)
+                session_store.set_exhausted(session_id)
+                print(f"[{class_name}] {len(results)} kết quả cho '{keyword}'")
+            statuses = session_store.statuses(session_id)
+            for index, item in enumerate(results):
+                if statuses.get(item['image']) in (DOWNLOADED, SKIPPED):
+                    continue
+                executor.submit(download_one, session, limiter, item['image'],
+                                class_name, index, stats, root, timeout, dedup_index, normalizer,
+                                session_store, session_id)
+    session.close()
+    session_store.close()
+    if normalizer is not None:
+        normalizer.shutdown()
+    print(stats.summary())
+    return stats
+
+def read_pairs_file(path):
+    """
+    Đọc danh sách cặp (class, từ khóa) từ file, mỗi dòng có dạng `class,từ khóa`.
+
+    Dòng trống và dòng bắt đầu bằng '#' được bỏ qua.
+
+    :param path: Đường dẫn file.
+    :return: Danh sách tuple (class, từ khóa).
+    """
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            class_name, _, keyword = line.partition(",")
+            class_name, keyword = class_name.strip(), keyword.strip()
+            if class_name and keyword:
+                pairs.append((class_name, keyword))
+    return pairs
+
+def main():
+    """
+    Điểm vào dòng lệnh cho chế độ scraping hàng loạt.
+    """
+    parser = argparse.ArgumentParser(description="Scrape ảnh hàng loạt vào dataset/<class>/")
+    parser.add_argument("--pair", nargs=2, action="append", default=[], metavar=("CLASS", "KEYWORD"),
+                        help="Cặp class và từ khóa (có thể lặp lại)")
+    parser.add_argument("--pairs-file", help="File chứa các dòng 'class,từ khóa'")
+    parser.add_argument("--workers", type=int, default=16, help="Số worker tải ảnh đồng thời")
+    parser.add_argument("--per-host", type=int, default=4, help="Số kết nối tối đa trên mỗi host")
+    parser.add_argument("--max-results", type=int, default=1000, help="Số kết quả tối đa cho mỗi từ khóa")
+    parser.add_argument("--retries", type=int, default=3, help="Số lần thử lại cho mỗi ảnh")
+    parser.add_argument("--backoff", type=float, default=0.5, help="Hệ số backoff (giây)")
+    parser.add_argument("--root", default="dataset", help="Thư mục gốc của dataset")
+    parser.add_argument("--fresh", action="store_true", help="Truy vấn lại thay vì tiếp tục phiên đã lưu")
+    parser.add_argument("--no-dedup", action="store_true", help="Không bỏ qua ảnh gần trùng")
+    parser.add_argument("--no-normalize", action="store_true", help="Lưu nguyên dữ liệu tải về, không chuẩn hóa")
+    parser.add_argument("--quality", type=int, default=90, help="Chất lượng JPEG khi chuẩn hóa")
+    parser.add_argument("--max-side", type=int, default=1600, help="Cạnh dài nhất tối đa (pixel)")
+    args = parser.parse_args()
+
+    pairs = [tuple(p) for p in args.pair]
+    if args.pairs_file:
+        pairs.extend(read_pairs_file(args.pairs_file))
+    if not pairs:
+        parser.error("Cần ít nhất một --pair hoặc --pairs-file")
+    bulk_scrape(pairs, workers=args.workers, per_host=args.per_host, max_results=args.max_results,
+                retries=args.retries, backoff=args.backoff, root=args.root, dedup=not args.no_dedup,
+                normalize=not args.no_normalize, quality=args.quality, max_side=args.max_side,
+                fresh=args.fresh)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+File: byte_cache.py
+Mô tả:
+    Chứa lớp ByteCache: cache dữ liệu thô (bytes) của ảnh theo URL, loại bỏ theo LRU
+    khi vượt quá dung lượng cho phép. Cache được dùng chung giữa bước xem trước ảnh
+    và bước lưu ảnh để mỗi ảnh chỉ phải tải về một lần.
+"""
+
+import threading
+from collections import OrderedDict
+from fetch_engine import shared_engine
+
+class ByteCache:
+    """
+    Cache LRU giới hạn theo tổng số byte, an toàn khi dùng từ nhiều thread.
+
+    Ghi nhận số lần hit/miss và tổng số byte không phải tải lại.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, engine=None):
+        """
+        :param max_bytes: Dung lượng tối đa của cache (byte).
+        :param engine: FetchEngine dùng để tải khi cache miss; mặc định dùng engine chung.
+        """
+        self.max_bytes = max_bytes
+        self.engine = engine if engine is not None else shared_engine()
+        self.total_bytes = 0
+        self.entries = OrderedDict()  # url -> bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def get(self, url):
+        """
+        Lấy dữ liệu của URL từ cache và đánh dấu là mới dùng gần nhất.
+
+        :param url: URL ảnh.
+        :return: Dữ liệu bytes hoặc None nếu không có trong cache.
+        """
+        with self.lock:
+            data = self.entries.get(url)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(url)
+            self.hits += 1
+            self.bytes_saved += len(data)
+            return data
+
+    def put(self, url, data):
+        """
+        Thêm dữ liệu vào cache, loại bỏ các mục cũ nhất nếu vượt dung lượng.
+
+        Dữ liệu lớn hơn toàn bộ dung lượng cache sẽ không được lưu.
+
+        :param url: URL ảnh.
+        :param data: Dữ liệu bytes.
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(url, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self.entries[url] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def fetch(self, url, timeout=10):
+        """
+        Trả về dữ liệu của URL, lấy từ cache nếu có, ngược lại tải về qua FetchEngine
+        (giới hạn tần suất theo host, retry) và lưu vào cache.
+
+        :param url: URL ảnh.
+        :param timeout: Thời gian chờ tối đa (giây) cho mỗi lần thử.
+        :return: Dữ liệu bytes.
+        :raises FetchError: Nếu request lỗi hoặc status code khác 200.
+        """
+        data = self.get(url)
+        if data is not None:
+            return data
+        data = self.engine.fetch(url, timeout=timeout)
+        self.put(url, data)
+        return data
+
+    def stats_text(self):
+        """
+        Chuỗi mô tả thống kê cache để hiển thị trên giao diện.
+
+        :return: Chuỗi thống kê.
+        """
+        with self.lock:
+            return (f"Cache: {self.hits} hit / {self.misses} miss, "
+                    f"tiết kiệm {self.bytes_saved / (1024 * 1024):.1f} MB, "
+                    f"đang dùng {self.total_bytes / (1024 * 1024):.1f}/{self.max_bytes / (1024 * 1024):.0f} MB")
@@ -0,0 +1,444 @@
+"""
+File: dedup_index.py
+Mô tả:
+    Chỉ mục perceptual hash (pHash/dHash) cho toàn bộ ảnh trong thư mục dataset, dùng để
+    phát hiện ảnh gần trùng (cùng một ảnh ở độ phân giải hoặc vùng cắt khác nhau).
+
+    - Chỉ mục được lưu trên đĩa dưới dạng file TSV ghi nối tiếp (dataset/.phash_index.tsv),
+      nên mỗi ảnh mới chỉ tốn một dòng ghi thêm.
+    - Tra cứu dùng BK-tree theo khoảng cách Hamming nên không phải so sánh với mọi ảnh.
+    - Lần load đầu tiên phải hash mọi ảnh chưa có trong file chỉ mục; giao diện chạy việc này
+      trên worker thread (index_warmup.py) và bỏ qua kiểm tra trùng cho tới khi chỉ mục sẵn sàng.
+
+    Báo cáo các cụm ảnh trùng đã có trong dataset:
+        python dedup_index.py --report --distance 6
+"""
+
+import argparse
+import os
+import threading
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+def hamming(a, b):
+    """
+    Khoảng cách Hamming giữa hai hash (số nguyên).
+    """
+    return bin(a ^ b).count("1")
+
+def _bits_to_int(bits):
+    """
+    Chuyển mảng bool thành số nguyên (bit đầu tiên là bit cao nhất).
+    """
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+def dhash(gray, hash_size=8):
+    """
+    Difference hash: so sánh độ sáng các pixel kề nhau của ảnh thu nhỏ.
+
+    :param gray: Ảnh xám (numpy array).
+    :param hash_size: Kích thước hash (hash_size * hash_size bit).
+    :return: Hash dạng số nguyên.
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return _bits_to_int((small[:, 1:] > small[:, :-1]).flatten())
+
+def phash(gray, hash_size=8, highfreq_factor=4):
+    """
+    Perceptual hash: so sánh các hệ số DCT tần số thấp với trung vị của chúng.
+
+    :param gray: Ảnh xám (numpy array).
+    :param hash_size: Kích thước hash (hash_size * hash_size bit).
+    :param highfreq_factor: Tỉ lệ kích thước ảnh thu nhỏ so với hash_size.
+    :return: Hash dạng số nguyên.
+    """
+    size = hash_size * highfreq_factor
+    small = cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:hash_size, :hash_size].flatten()
+    # Bỏ hệ số DC (độ sáng trung bình) khi tính trung vị
+    return _bits_to_int(low > np.median(low[1:]))
+
+HASH_FUNCTIONS = {"phash": phash, "dhash": dhash}
+
+def to_gray(image):
+    """
+    Chuyển ảnh BGR (ví dụ frame video) sang ảnh xám; ảnh xám được giữ nguyên.
+    """
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+def decode_gray(data):
+    """
+    Decode dữ liệu ảnh (bytes) thành ảnh xám đã thu nhỏ một nửa khi decode.
+
+    :param data: Dữ liệu ảnh.
+    :return: Ảnh xám hoặc None nếu không decode được.
+    """
+    array = np.frombuffer(data, dtype=np.uint8)
+    if array.size == 0:
+        return None
+    return cv2.imdecode(array, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+
+class BKTree:
+    """
+    BK-tree theo khoảng cách Hamming để tìm các hash gần nhau.
+
+    Mỗi node là list [hash, danh sách item, dict khoảng cách -> node con].
+    """
+    def __init__(self):
+        """
+        Khởi tạo cây rỗng.
+        """
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        """
+        Thêm một hash cùng item đi kèm vào cây.
+        """
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """
+        Tìm các item có hash cách value không quá max_distance.
+
+        :return: Danh sách tuple (khoảng cách, item), sắp xếp theo khoảng cách tăng dần.
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            # Bất đẳng thức tam giác: chỉ các nhánh con trong [d - r, d + r] có thể chứa kết quả
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+class DedupIndex:
+    """
+    Chỉ mục perceptual hash bền vững cho các ảnh trong dataset.
+
+    Lưu đường dẫn tương đối (so với root), mtime, kích thước file và hash của từng ảnh.
+    An toàn khi dùng từ nhiều thread. Việc hash dataset khi load không giữ self.lock, nên
+    add() và find_duplicate(wait=False) không bị chặn trong lúc đó.
+    """
+    def __init__(self, root="dataset", method="phash", max_distance=6):
+        """
+        :param root: Thư mục gốc của dataset.
+        :param method: Thuật toán hash ('phash' hoặc 'dhash').
+        :param max_distance: Khoảng cách Hamming tối đa để coi là gần trùng.
+        """
+        self.root = root
+        self.method = method
+        self.hash_func = HASH_FUNCTIONS[method]
+        self.max_distance = max_distance
+        self.index_path = os.path.join(root, f".{method}_index.tsv")
+        self.entries = {}  # đường dẫn tương đối -> (mtime, size, hash)
+        self.tree = BKTree()
+        self.lock = threading.RLock()
+        self.refresh_lock = threading.Lock()  # chỉ một lần refresh chạy tại một thời điểm
+        self.refreshing = False
+        self.added = {}  # các ảnh được add() trong lúc refresh, gộp vào khi refresh xong
+        self.cancel_event = threading.Event()  # dừng lần load đang chạy (khi thoát ứng dụng)
+        self.loaded = False
+
+    def hash_gray(self, gray):
+        """
+        Tính hash của một ảnh xám theo thuật toán đã chọn.
+        """
+        return self.hash_func(gray)
+
+    def hash_bytes(self, data):
+        """
+        Tính hash từ dữ liệu ảnh (bytes).
+
+        :return: Hash hoặc None nếu không decode được.
+        """
+        gray = decode_gray(data)
+        if gray is None:
+            return None
+        return self.hash_gray(gray)
+
+    def hash_frame(self, frame):
+        """
+        Tính hash của một frame (ảnh BGR numpy).
+        """
+        return self.hash_gray(to_gray(frame))
+
+    def hash_file(self, path):
+        """
+        Tính hash của một file ảnh trên đĩa.
+
+        :return: Hash hoặc None nếu không đọc được.
+        """
+        try:
+            return self.hash_bytes(np.fromfile(path, dtype=np.uint8))
+        except Exception as e:
+            print(f"Lỗi hash ảnh {path}: {e}")
+            return None
+
+    def ensure_loaded(self):
+        """
+        Load chỉ mục từ đĩa và cập nhật các ảnh mới/thay đổi (chỉ chạy một lần).
+
+        Nếu một thread khác đang load, chờ thread đó xong.
+        """
+        with self.refresh_lock:
+            if not self.loaded:
+                self._refresh()
+
+    def _read_index_file(self):
+        """
+        Đọc file chỉ mục; các dòng sau ghi đè dòng trước cho cùng một đường dẫn.
+        """
+        entries = {}
+        if not os.path.exists(self.index_path):
+            return entries
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 4:
+                    continue
+                rel_path, mtime, size, value = parts
+                try:
+                    entries[rel_path] = (float(mtime), int(size), int(value, 16))
+                except ValueError:
+                    continue
+        return entries
+
+    def _scan_images(self):
+        """
+        Liệt kê các file ảnh trong dataset.
+
+        :return: Dict đường dẫn tương đối -> (mtime, size).
+        """
+        found = {}
+        if not os.path.isdir(self.root):
+            return found
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found[os.path.relpath(path, self.root)] = (stat.st_mtime, stat.st_size)
+        return found
+
+    def refresh(self):
+        """
+        Đồng bộ chỉ mục với thư mục dataset: hash các ảnh mới hoặc đã thay đổi
+        (theo mtime/kích thước), bỏ các ảnh đã bị xóa, rồi ghi lại file chỉ mục gọn.
+        """
+        with self.refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        """
+        Thực hiện refresh (gọi khi đã giữ refresh_lock). Các ảnh được add() trong lúc hash
+        được gộp vào kết quả trước khi ghi file.
+        """
+        with self.lock:
+            self.refreshing = True
+            self.added = {}
+            stored = self._read_index_file()
+        try:
+            current = self._scan_images()
+            entries = {}
+            for rel_path, (mtime, size) in current.items():
+                if self.cancel_event.is_set():
+                    return
+                old = stored.get(rel_path)
+                if old is not None and old[0] == mtime and old[1] == size:
+                    entries[rel_path] = old
+                    continue
+                value = self.hash_file(os.path.join(self.root, rel_path))
+                if value is not None:
+                    entries[rel_path] = (mtime, size, value)
+        finally:
+            with self.lock:
+                self.refreshing = False
+        with self.lock:
+            entries.update(self.added)
+            self.added = {}
+            self.entries = entries
+            self._rebuild_tree()
+            self._write_index_file()
+            self.loaded = True
+
+    def cancel_refresh(self):
+        """
+        Dừng lần load/refresh đang chạy (chỉ mục giữ nguyên trạng thái chưa load).
+        """
+        self.cancel_event.set()
+
+    def is_ready(self):
+        """
+        :return: True nếu chỉ mục đã được load (find_duplicate không phải chờ).
+        """
+        return self.loaded
+
+    def _rebuild_tree(self):
+        """
+        Xây lại BK-tree từ các mục hiện có.
+        """
+        self.tree = BKTree()
+        for rel_path, (_, _, value) in self.entries.items():
+            self.tree.add(value, rel_path)
+
+    def _write_index_file(self):
+        """
+        Ghi toàn bộ chỉ mục ra file (thay thế file cũ một cách an toàn).
+        """
+        if not os.path.isdir(self.root):
+            return
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for rel_path, (mtime, size, value) in self.entries.items():
+                f.write(f"{rel_path}\t{mtime}\t{size}\t{value:016x}\n")
+        os.replace(tmp_path, self.index_path)
+
+    def find_duplicate(self, value, max_distance=None, wait=True):
+        """
+        Tìm ảnh đã có trong dataset gần trùng với hash cho trước.
+
+        Ảnh đã bị xóa khỏi đĩa (ví dụ bằng tab Labeling) được bỏ qua.
+
+        :param value: Hash cần kiểm tra.
+        :param max_distance: Khoảng cách tối đa; mặc định dùng self.max_distance.
+        :param wait: True để load chỉ mục nếu chưa có (có thể mất lâu); False để bỏ qua kiểm
+                     tra (trả về None) khi chỉ mục chưa sẵn sàng (xem is_ready).
+        :return: Đường dẫn ảnh trùng hoặc None.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        if wait:
+            self.ensure_loaded()
+        elif not self.loaded:
+            return None
+        with self.lock:
+            matches = self.tree.search(value, max_distance)
+        for _, rel_path in matches:
+            path = os.path.join(self.root, rel_path)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def add(self, path, value):
+        """
+        Thêm một ảnh vừa lưu vào chỉ mục và ghi nối tiếp một dòng vào file chỉ mục.
+
+        Không load chỉ mục: nếu chưa load, dòng mới được đọc lại khi load.
+
+        :param path: Đường dẫn file ảnh.
+        :param value: Hash của ảnh.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        rel_path = os.path.relpath(path, self.root)
+        with self.lock:
+            entry = (stat.st_mtime, stat.st_size, value)
+            self.entries[rel_path] = entry
+            self.tree.add(value, rel_path)
+            if self.refreshing:
+                self.added[rel_path] = entry
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(f"{rel_path}\t{stat.st_mtime}\t{stat.st_size}\t{value:016x}\n")
+
+    def clusters(self, max_distance=None):
+        """
+        Gom các ảnh đã có trong dataset thành các cụm gần trùng (union-find trên BK-tree).
+
+        :param max_distance: Khoảng cách tối đa; mặc định dùng self.max_distance.
+        :return: Danh sách cụm (list đường dẫn tương đối), chỉ gồm các cụm có từ 2 ảnh.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        self.ensure_loaded()
+        parent = {}
+
+        def find(item):
+            while parent.setdefault(item, item) != item:
+                parent[item] = parent[parent[item]]
+                item = parent[item]
+            return item
+
+        with self.lock:
+            for rel_path, (_, _, value) in self.entries.items():
+                for _, other in self.tree.search(value, max_distance):
+                    if other in self.entries:
+                        parent[find(other)] = find(rel_path)
+            groups = {}
+            for rel_path in self.entries:
+                groups.setdefault(find(rel_path), []).append(rel_path)
+        return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+_shared_indexes = {}
+_shared_lock = threading.Lock()
+
+def shared_index(root="dataset"):
+    """
+    Trả về DedupIndex dùng chung cho một thư mục dataset (giữa các tab và worker).
+    """
+    with _shared_lock:
+        index = _shared_indexes.get(root)
+        if index is None:
+            index = DedupIndex(root)
+            _shared_indexes[root] = index
+        return index
+
+def main():
+    """
+    Điểm vào dòng lệnh: cập nhật chỉ mục và báo cáo các cụm ảnh gần trùng.
+    """
+    parser = argparse.ArgumentParser(description="Chỉ mục perceptual hash cho dataset")
+    parser.add_argument("--root", default="dataset", help="Thư mục gốc của dataset")
+    parser.add_argument("--method", choices=sorted(HASH_FUNCTIONS), default="phash", help="Thuật toán hash")
+    parser.add_argument("--distance", type=int, default=6, help="Khoảng cách Hamming tối đa")
+    parser.add_argument("--report", action="store_true", help="In các cụm ảnh gần trùng")
+    args = parser.parse_args()
+
+    index = DedupIndex(args.root, method=args.method, max_distance=args.distance)
+    index.refresh()
+    print(f"Chỉ mục có {len(index.entries)} ảnh ({index.index_path})")
+    if args.report:
+        groups = index.clusters()
+        for number, group in enumerate(groups, 1):
+            print(f"Cụm {number} ({len(group)} ảnh):")
+            for rel_path in group:
+                print(f"    {rel_path}")
+        print(f"Tổng cộng {len(groups)} cụm, {sum(len(g) - 1 for g in groups)} ảnh có thể xóa.")
+
+if __name__ == '__main__':
+    main()
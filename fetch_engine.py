@@ -0,0 +1,321 @@
+"""
+File: fetch_engine.py
+Mô tả:
+    Engine tải dữ liệu bất đồng bộ (asyncio + aiohttp) cho phần scraping ảnh.
+
+    - Mỗi host có một token bucket giới hạn số request mỗi giây.
+    - Số request đồng thời trên mỗi host tự điều chỉnh theo độ trễ và tỉ lệ lỗi
+      (tăng dần khi host phản hồi nhanh, giảm một nửa khi gặp 429/5xx/timeout).
+    - Tôn trọng header Retry-After (tối đa MAX_RETRY_AFTER giây) và retry với backoff theo cấp số nhân.
+    - Dùng một ClientSession với keep-alive để tái sử dụng kết nối.
+
+    Engine chạy event loop trên một thread riêng nên có thể gọi từ code đồng bộ
+    (thread giao diện hoặc worker) qua fetch()/submit(); fetch() có thời hạn tổng (kể cả
+    retry và thời gian chờ Retry-After), quá hạn thì request bị hủy.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import aiohttp
+
+# Các status code cho thấy host đang quá tải hoặc giới hạn tần suất
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+# Thời gian chờ tối đa (giây) theo Retry-After, để một host không thể treo engine hàng giờ
+MAX_RETRY_AFTER = 30.0
+
+class FetchError(Exception):
+    """
+    Lỗi khi tải một URL (status code khác 200 hoặc hết số lần retry).
+    """
+
+def parse_retry_after(value):
+    """
+    Chuyển giá trị header Retry-After (số giây hoặc ngày giờ HTTP) thành số giây cần chờ.
+
+    :param value: Giá trị header (có thể None).
+    :return: Số giây cần chờ (không quá MAX_RETRY_AFTER) hoặc None nếu không có/không hợp lệ.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    if seconds != seconds:  # NaN
+        return None
+    return min(MAX_RETRY_AFTER, max(0.0, seconds))
+
+class TokenBucket:
+    """
+    Token bucket giới hạn tần suất: tối đa `rate` request mỗi giây, cho phép dồn `burst` request.
+    """
+    def __init__(self, rate, burst):
+        """
+        :param rate: Số token được nạp lại mỗi giây.
+        :param burst: Số token tối đa.
+        """
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Chờ đến khi có token và lấy một token.
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class HostState:
+    """
+    Trạng thái của một host: token bucket, giới hạn đồng thời thích ứng (AIMD),
+    độ trễ trung bình và thời điểm được phép gửi lại (theo Retry-After).
+    """
+    def __init__(self, rate, burst, initial, minimum, maximum, target_latency):
+        """
+        :param rate: Số request mỗi giây tối đa.
+        :param burst: Số request dồn tối đa.
+        :param initial: Số request đồng thời ban đầu.
+        :param minimum: Số request đồng thời tối thiểu.
+        :param maximum: Số request đồng thời tối đa.
+        :param target_latency: Độ trễ mục tiêu (giây); chậm hơn gấp đôi sẽ giảm đồng thời.
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.latency = None  # EWMA độ trễ (giây)
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.blocked_until = 0.0
+        self.cond = asyncio.Condition()
+
+    async def acquire(self):
+        """
+        Chờ đến khi còn chỗ trong giới hạn đồng thời, hết thời gian Retry-After và có token.
+        """
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            delay = self.blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.bucket.acquire()
+        except asyncio.CancelledError:
+            # Request bị hủy (quá thời hạn của fetch) khi đang chờ: trả lại chỗ đã giữ
+            async with self.cond:
+                self.in_flight -= 1
+                self.cond.notify_all()
+            raise
+
+    async def release(self, latency, throttled):
+        """
+        Trả chỗ và điều chỉnh giới hạn đồng thời theo kết quả request.
+
+        :param latency: Thời gian của request (giây).
+        :param throttled: True nếu host báo quá tải (429/5xx) hoặc lỗi kết nối/timeout.
+        """
+        async with self.cond:
+            self.in_flight -= 1
+            self.requests += 1
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if throttled:
+                self.errors += 1
+                self.limit = max(self.minimum, self.limit / 2)
+            elif self.latency > 2 * self.target_latency:
+                self.limit = max(self.minimum, self.limit * 0.75)
+            elif self.latency <= self.target_latency:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+    def block(self, seconds):
+        """
+        Tạm ngừng gửi request tới host trong một khoảng thời gian (theo Retry-After).
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class FetchEngine:
+    """
+    Engine tải URL bất đồng bộ với giới hạn tần suất theo host và đồng thời thích ứng.
+    """
+    def __init__(self, rate=8.0, burst=8, initial_concurrency=4, min_concurrency=1, max_concurrency=16,
+                 target_latency=1.5, retries=3, backoff=0.5, keepalive=30.0):
+        """
+        :param rate: Số request mỗi giây tối đa trên mỗi host.
+        :param burst: Số request dồn tối đa trên mỗi host.
+        :param initial_concurrency: Số request đồng thời ban đầu trên mỗi host.
+        :param min_concurrency: Số request đồng thời tối thiểu trên mỗi host.
+        :param max_concurrency: Số request đồng thời tối đa trên mỗi host.
+        :param target_latency: Độ trễ mục tiêu (giây) dùng để điều chỉnh đồng thời.
+        :param retries: Số lần thử lại khi host quá tải hoặc lỗi kết nối.
+        :param backoff: Hệ số backoff (giây) khi không có Retry-After.
+        :param keepalive: Thời gian giữ kết nối rảnh (giây).
+        """
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.retries = retries
+        self.backoff = backoff
+        self.keepalive = keepalive
+        self.hosts = {}
+        self.session = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="FetchEngine", daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        """
+        Chạy event loop của engine trên thread riêng.
+        """
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _host(self, url):
+        """
+        Lấy (hoặc tạo) trạng thái của host ứng với URL.
+        """
+        host = urlsplit(url).netloc
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(self.rate, self.burst, self.initial_concurrency, self.min_concurrency,
+                              self.max_concurrency, self.target_latency)
+            self.hosts[host] = state
+        return state
+
+    def _session(self):
+        """
+        Tạo ClientSession dùng chung (lần đầu được gọi, trong event loop của engine).
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.max_concurrency,
+                                             keepalive_timeout=self.keepalive)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def fetch_async(self, url, timeout=10):
+        """
+        Tải dữ liệu của URL (coroutine, chạy trong event loop của engine).
+
+        :param url: URL cần tải.
+        :param timeout: Thời gian chờ tối đa (giây) cho mỗi lần thử.
+        :return: Dữ liệu bytes.
+        :raises FetchError: Nếu status code khác 200 hoặc hết số lần retry.
+        """
+        state = self._host(url)
+        session = self._session()
+        error = None
+        for attempt in range(self.retries + 1):
+            await state.acquire()
+            start = time.monotonic()
+            throttled = False
+            retry_after = None
+            try:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    data = await response.read()
+                    if response.status == 200:
+                        return data
+                    error = FetchError(f"HTTP {response.status}")
+                    if response.status not in THROTTLE_STATUSES:
+                        raise error
+                    throttled = True
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                throttled = True
+                error = FetchError(f"{type(e).__name__}: {e}")
+            finally:
+                await state.release(time.monotonic() - start, throttled)
+            if attempt == self.retries:
+                break
+            if retry_after is not None:
+                # Retry-After áp dụng cho mọi request tới host, không chỉ request này
+                state.block(retry_after)
+            else:
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+        raise error
+
+    def submit(self, url, timeout=10):
+        """
+        Đưa một URL vào engine từ code đồng bộ.
+
+        :return: concurrent.futures.Future trả về dữ liệu bytes.
+        """
+        return asyncio.run_coroutine_threadsafe(self.fetch_async(url, timeout), self.loop)
+
+    def fetch(self, url, timeout=10, deadline=None):
+        """
+        Tải dữ liệu của URL và chờ kết quả (gọi từ code đồng bộ, không gọi trong event loop của engine).
+
+        :param timeout: Thời gian chờ tối đa (giây) cho mỗi lần thử.
+        :param deadline: Thời gian chờ tối đa (giây) cho cả lần tải, kể cả retry và Retry-After;
+                         mặc định bằng timeout. Quá hạn thì request bị hủy.
+        :return: Dữ liệu bytes.
+        :raises FetchError: Nếu tải thất bại hoặc quá thời hạn.
+        """
+        deadline = timeout if deadline is None else deadline
+        future = self.submit(url, timeout)
+        try:
+            return future.result(timeout=deadline)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise FetchError(f"Quá thời gian chờ ({deadline:g} s)") from None
+
+    def host_stats(self):
+        """
+        Thống kê theo host: giới hạn đồng thời hiện tại, độ trễ trung bình, số request và số lỗi.
+
+        :return: Dict host -> dict thống kê.
+        """
+        return {host: {"concurrency": int(state.limit), "latency": state.latency,
+                       "requests": state.requests, "errors": state.errors}
+                for host, state in list(self.hosts.items())}
+
+    async def _close_session(self):
+        """
+        Đóng ClientSession (trong event loop của engine).
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def close(self):
+        """
+        Đóng các kết nối và dừng event loop.
+        """
+        asyncio.run_coroutine_threadsafe(self._close_session(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+_shared_engine = None
+_shared_lock = threading.Lock()
+
+def shared_engine():
+    """
+    Trả về FetchEngine dùng chung cho toàn bộ ứng dụng (tạo khi được dùng lần đầu).
+    """
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is None:
+            _shared_engine = FetchEngine()
+        return _shared_engine
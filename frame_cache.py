@@ -0,0 +1,245 @@
+"""
+File: frame_cache.py
+Mô tả:
+    Cache các frame đã decode quanh vị trí đang xem, giới hạn theo dung lượng (MB) thay vì
+    số frame (một frame 4K BGR chiếm khoảng 25 MB), cùng với BackwardPrefetcher: decode trước
+    đoạn frame phía sau vị trí hiện tại trên worker thread (với bộ decode riêng), để các lần
+    bấm Previous Frame liên tiếp được lấy ngay từ bộ nhớ thay vì seek về keyframe và decode lại.
+"""
+
+import threading
+from collections import OrderedDict
+import cv2
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from video_decoder import open_capture
+
+class FrameCache:
+    """
+    Cache frame theo chỉ số, giới hạn theo tổng số byte, an toàn khi dùng từ nhiều thread.
+
+    Khi vượt dung lượng, frame xa vị trí đang xem (center) nhất bị loại trước, nên cache
+    luôn giữ một "cửa sổ" frame quanh vị trí hiện tại. Mỗi lần clear() tăng epoch; frame
+    được decode trước đó (ví dụ bởi BackwardPrefetcher cho video cũ) mang epoch cũ và bị bỏ.
+    """
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        """
+        :param max_bytes: Dung lượng tối đa (byte).
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.frames = OrderedDict()  # chỉ số frame -> frame BGR
+        self.center = 0
+        self.epoch = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, index):
+        """
+        :param index: Chỉ số frame.
+        :return: Frame hoặc None nếu không có trong cache.
+        """
+        with self.lock:
+            frame = self.frames.get(index)
+            if frame is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return frame
+
+    def __contains__(self, index):
+        """
+        Kiểm tra frame có trong cache hay không (không tính vào hit/miss).
+        """
+        with self.lock:
+            return index in self.frames
+
+    def put(self, index, frame, epoch=None):
+        """
+        Thêm frame vào cache, loại các frame xa vị trí đang xem nhất nếu vượt dung lượng.
+
+        Frame lớn hơn toàn bộ dung lượng cache sẽ không được lưu.
+
+        :param epoch: Epoch của cache lúc bắt đầu decode frame; nếu cache đã được clear() từ
+                      đó thì frame bị bỏ. None để luôn lưu.
+        """
+        if frame.nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            old = self.frames.pop(index, None)
+            if old is not None:
+                self.total_bytes -= old.nbytes
+            self.frames[index] = frame
+            self.total_bytes += frame.nbytes
+            self._evict()
+
+    def set_center(self, index):
+        """
+        Cập nhật vị trí đang xem (dùng để chọn frame bị loại).
+        """
+        with self.lock:
+            self.center = index
+
+    def set_max_bytes(self, max_bytes):
+        """
+        Đổi dung lượng tối đa, loại bớt frame nếu cần.
+        """
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def capacity(self, frame_bytes):
+        """
+        :param frame_bytes: Kích thước một frame (byte).
+        :return: Số frame có kích thước frame_bytes chứa được trong cache.
+        """
+        return self.max_bytes // frame_bytes if frame_bytes else 0
+
+    def clear(self):
+        """
+        Xóa toàn bộ cache (khi mở video khác).
+        """
+        with self.lock:
+            self.epoch += 1
+            self.frames.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(self):
+        """
+        Loại frame xa center nhất cho tới khi không vượt dung lượng (gọi khi đã giữ lock).
+        """
+        while self.total_bytes > self.max_bytes and self.frames:
+            farthest = max(self.frames, key=lambda i: abs(i - self.center))
+            self.total_bytes -= self.frames.pop(farthest).nbytes
+
+    def stats_text(self):
+        """
+        :return: Chuỗi thống kê cache để hiển thị trên giao diện.
+        """
+        with self.lock:
+            return (f"Frame cache: {len(self.frames)} frame, "
+                    f"{self.total_bytes / (1024 * 1024):.0f}/{self.max_bytes / (1024 * 1024):.0f} MB, "
+                    f"{self.hits} hit / {self.misses} miss")
+
+class _PrefetchSignals(QObject):
+    """
+    Tín hiệu báo một đoạn frame đã được decode vào cache.
+    """
+    finished = pyqtSignal(int, int, int)  # generation, frame đầu, frame cuối (không bao gồm)
+
+class _BackwardTask(QRunnable):
+    """
+    Tác vụ decode tuần tự đoạn [start, stop) vào cache bằng bộ decode riêng.
+    """
+    def __init__(self, prefetcher, generation, epoch, path, backend, start, stop):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.generation = generation
+        self.epoch = epoch
+        self.path = path
+        self.backend = backend
+        self.start = start
+        self.stop = stop
+
+    def run(self):
+        """
+        Seek tới start rồi đọc tuần tự tới stop; dừng sớm nếu có yêu cầu mới hơn.
+        """
+        cap = open_capture(self.path, self.backend)
+        try:
+            if not cap.isOpened():
+                return
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.start)
+            cache = self.prefetcher.cache
+            for index in range(self.start, self.stop):
+                if self.generation != self.prefetcher.generation:
+                    return
+                if index in cache:
+                    if not cap.grab():
+                        break
+                    continue
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                cache.put(index, frame, self.epoch)
+        finally:
+            cap.release()
+            self.prefetcher.signals.finished.emit(self.generation, self.start, self.stop)
+
+class BackwardPrefetcher(QObject):
+    """
+    Decode trước đoạn frame nằm ngay phía sau vị trí hiện tại vào FrameCache.
+
+    Mỗi yêu cầu mới thay thế yêu cầu đang chạy (tác vụ cũ tự dừng khi thấy generation thay đổi).
+    """
+    def __init__(self, cache, span=60, parent=None):
+        """
+        :param cache: FrameCache dùng chung với tab video.
+        :param span: Số frame decode trước phía sau vị trí hiện tại (khoảng một GOP).
+        """
+        super().__init__(parent)
+        self.cache = cache
+        self.span = span
+        self.path = None
+        self.backend = None
+        self.generation = 0
+        self.pending = None  # (start, stop) đang decode
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _PrefetchSignals()
+        self.signals.finished.connect(self._on_finished)
+
+    def set_video(self, path, backend=None):
+        """
+        Đổi video nguồn và hủy các yêu cầu đang chờ.
+
+        :param backend: Backend decode (xem video_decoder.py), cùng backend với tab video để
+                        chỉ số frame trong cache khớp nhau.
+        """
+        self.path = path
+        self.backend = backend
+        self.cancel()
+
+    def cancel(self):
+        """
+        Hủy yêu cầu đang chờ hoặc đang chạy.
+        """
+        self.generation += 1
+        self.pending = None
+        self.pool.clear()
+
+    def request(self, index, frame_bytes):
+        """
+        Yêu cầu decode trước đoạn frame phía sau index.
+
+        Độ dài đoạn bị giới hạn bởi span và một nửa dung lượng cache (nửa còn lại giữ
+        các frame phía trước). Nếu đoạn đó đã có trong cache hoặc đang được decode thì bỏ qua.
+
+        :param index: Vị trí frame hiện tại.
+        :param frame_bytes: Kích thước một frame đã decode (byte).
+        """
+        if self.path is None or index <= 0:
+            return
+        span = min(self.span, self.cache.capacity(frame_bytes) // 2)
+        if span <= 0:
+            return
+        start = max(0, index - span)
+        if self.pending is not None and self.pending[0] <= start and index <= self.pending[1]:
+            return
+        if all(i in self.cache for i in range(start, index)):
+            return
+        self.generation += 1
+        self.pending = (start, index)
+        self.pool.clear()
+        self.pool.start(_BackwardTask(self, self.generation, self.cache.epoch, self.path, self.backend, start, index))
+
+    def _on_finished(self, generation, start, stop):
+        """
+        Xóa trạng thái đang chờ khi tác vụ hiện tại kết thúc.
+        """
+        if generation == self.generation:
+            self.pending = None
@@ -0,0 +1,87 @@
+"""
+File: frame_display.py
+Mô tả:
+    Chuyển frame BGR của OpenCV thành QPixmap vừa khung hiển thị với ít bản sao nhất.
+
+    Cách cũ chuyển màu cả frame gốc sang RGB, bọc thành QImage, chuyển sang QPixmap rồi mới
+    thu nhỏ bằng Qt.SmoothTransformation: với video 4K đó là nhiều bản sao full-frame chỉ để
+    lấp một label 600x400. Ở đây frame được thu nhỏ trước bằng OpenCV (giảm một nửa bằng
+    INTER_AREA rồi INTER_LINEAR tới đúng kích thước) vào các buffer dùng lại giữa các frame,
+    rồi bọc trực tiếp bằng QImage.Format_BGR888 (không chuyển màu), nên chỉ ảnh đã thu nhỏ
+    được sao chép sang QPixmap.
+"""
+
+import cv2
+from PyQt5.QtGui import QImage, QPixmap
+
+def fit_size(width, height, box_width, box_height):
+    """
+    Kích thước lớn nhất vừa khung mà vẫn giữ tỉ lệ khung hình.
+
+    :return: Tuple (rộng, cao).
+    """
+    scale = min(box_width / width, box_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+class FrameDisplay:
+    """
+    Bộ chuyển frame BGR sang QPixmap dùng lại các buffer thu nhỏ giữa các frame.
+    """
+    def __init__(self):
+        self.buffers = {}  # (cao, rộng) -> ảnh BGR, dùng lại cho các frame cùng kích thước
+
+    def _resize(self, image, size, interpolation):
+        """
+        cv2.resize vào buffer có sẵn cùng kích thước (cấp phát lần đầu).
+        """
+        key = (size[1], size[0])
+        buffer = cv2.resize(image, size, dst=self.buffers.get(key), interpolation=interpolation)
+        self.buffers[key] = buffer
+        return buffer
+
+    def scale(self, frame, box_width, box_height):
+        """
+        Thu nhỏ (hoặc phóng to) frame vừa khung, giữ tỉ lệ khung hình.
+
+        INTER_AREA chỉ nhanh với hệ số nguyên, nên frame lớn được giảm một nửa nhiều lần
+        bằng INTER_AREA cho tới khi còn dưới hai lần kích thước đích, rồi INTER_LINEAR tới
+        đúng kích thước (với hệ số dưới 2, INTER_LINEAR vẫn dùng mọi pixel nguồn nên không
+        bị răng cưa).
+
+        :return: Ảnh BGR (buffer của FrameDisplay, hoặc chính frame nếu đã vừa khung).
+        """
+        height, width = frame.shape[:2]
+        size = fit_size(width, height, box_width, box_height)
+        image = frame
+        while image.shape[1] >= 2 * size[0] and image.shape[0] >= 2 * size[1]:
+            image = self._resize(image, (image.shape[1] // 2, image.shape[0] // 2), cv2.INTER_AREA)
+        if (image.shape[1], image.shape[0]) != size:
+            image = self._resize(image, size, cv2.INTER_LINEAR)
+        if not image.flags["C_CONTIGUOUS"]:
+            image = image.copy()
+        return image
+
+    def to_image(self, frame, box_width, box_height):
+        """
+        Thu nhỏ frame vừa khung và bọc thành QImage BGR888 (không chuyển màu).
+
+        QImage trả về dùng chung bộ nhớ với buffer, chỉ hợp lệ tới lần gọi tiếp theo.
+
+        :param frame: Frame BGR (numpy array).
+        :param box_width: Chiều rộng khung hiển thị.
+        :param box_height: Chiều cao khung hiển thị.
+        """
+        image = self.scale(frame, box_width, box_height)
+        return QImage(image.data, image.shape[1], image.shape[0], image.strides[0], QImage.Format_BGR888)
+
+    def to_pixmap(self, frame, box_width, box_height):
+        """
+        :return: QPixmap của frame vừa khung (giữ tỉ lệ khung hình).
+        """
+        return QPixmap.fromImage(self.to_image(frame, box_width, box_height))
+
+    def clear(self):
+        """
+        Giải phóng các buffer (khi đổi video có kích thước khác).
+        """
+        self.buffers.clear()
@@ -0,0 +1,42 @@
+"""
+File: frame_encode.py
+Mô tả:
+    Encode frame BGR theo định dạng cấu hình được (JPEG với chất lượng tùy chọn, PNG với mức
+    nén tùy chọn, WebP), có thể thu nhỏ trước khi encode. Không phụ thuộc Qt, nên CLI và
+    worker process của frame_extractor.py dùng được mà không cần PyQt5.
+"""
+
+import cv2
+
+FORMATS = {"jpg": ".jpg", "png": ".png", "webp": ".webp"}
+
+def encode_frame(frame, format="jpg", quality=95, png_compression=3, max_side=0):
+    """
+    Encode một frame BGR.
+
+    :param frame: Frame BGR (numpy array).
+    :param format: 'jpg', 'png' hoặc 'webp'.
+    :param quality: Chất lượng JPEG/WebP (1-100).
+    :param png_compression: Mức nén PNG (0-9).
+    :param max_side: Cạnh dài nhất tối đa (pixel) khi ghi; 0 để giữ nguyên kích thước.
+    :return: Tuple (phần mở rộng, dữ liệu bytes).
+    :raises ValueError: Nếu định dạng không hỗ trợ hoặc encode lỗi.
+    """
+    ext = FORMATS.get(format)
+    if ext is None:
+        raise ValueError(f"Định dạng không hỗ trợ: {format}")
+    height, width = frame.shape[:2]
+    if max_side and max(width, height) > max_side:
+        scale = max_side / max(width, height)
+        frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    if format == "jpg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    elif format == "png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+    else:
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    ok, encoded = cv2.imencode(ext, frame, params)
+    if not ok:
+        raise ValueError(f"Không encode được frame ({format})")
+    return ext, encoded.tobytes()
@@ -0,0 +1,356 @@
+"""
+File: frame_extractor.py
+Mô tả:
+    Trích xuất hàng loạt frame từ video vào dataset/<tên_video>/: mỗi N frame, mỗi T giây,
+    hoặc mọi frame trong một khoảng thời gian.
+
+    Các frame cần lấy được chia thành nhiều đoạn; mỗi đoạn bắt đầu tại keyframe (nếu biết
+    danh sách keyframe) và được decode tuần tự trong một worker process riêng, nên nhiều đoạn
+    được decode song song trên các CPU. Trong mỗi đoạn, frame không cần lấy chỉ được grab()
+    (không chuyển màu), và chỉ seek khi khoảng cách tới frame cần lấy quá xa.
+
+    Chạy không cần giao diện:
+        python frame_extractor.py video.mp4 --every-seconds 1
+        python frame_extractor.py video.mp4 --every-n 30 --start 1:00 --end 2:30 --workers 8
+        python frame_extractor.py video.mp4 --every-n 5 --filter --min-sharpness 80
+"""
+
+import argparse
+import bisect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+from utils import format_time, parse_time, sanitize_filename, get_allocator
+from dedup_index import HASH_FUNCTIONS, to_gray, shared_index
+from frame_filter import FrameFilter
+from frame_encode import FORMATS, encode_frame
+from video_decoder import open_capture
+
+def frame_output(video_title, root="dataset"):
+    """
+    Thư mục lưu và tiền tố tên file frame của một video (giống Save Frame).
+
+    :param video_title: Tiêu đề hoặc tên file video.
+    :param root: Thư mục gốc của dataset.
+    :return: Tuple (thư mục lưu, tiền tố tên file).
+    """
+    base = sanitize_filename(video_title)
+    # Rút gọn tên video (chỉ lấy 10 ký tự đầu)
+    short_base = base if len(base) <= 10 else base[:10]
+    return os.path.join(root, base), short_base
+
+def saved_frame_indices(out_dir, short_base):
+    """
+    Chỉ số các frame đã được lưu trong thư mục (file <short_base>_<chỉ số>.<đuôi>, không tính
+    các bản _2, _3, ... tạo khi trùng tên).
+
+    :return: Set chỉ số frame.
+    """
+    found = set()
+    prefix = f"{short_base}_"
+    if not os.path.isdir(out_dir):
+        return found
+    with os.scandir(out_dir) as entries:
+        for entry in entries:
+            stem = os.path.splitext(entry.name)[0]
+            if stem.startswith(prefix) and stem[len(prefix):].isdigit():
+                found.add(int(stem[len(prefix):]))
+    return found
+
+def select_frames(total_frames, fps, every_n=None, every_seconds=None, start=0.0, end=None, locate=None):
+    """
+    Tính danh sách chỉ số frame cần trích xuất.
+
+    Nếu không truyền every_n và every_seconds, lấy mọi frame trong khoảng [start, end].
+
+    :param total_frames: Tổng số frame của video.
+    :param fps: FPS của video.
+    :param every_n: Lấy một frame sau mỗi N frame.
+    :param every_seconds: Lấy một frame sau mỗi T giây.
+    :param start: Thời điểm bắt đầu (giây).
+    :param end: Thời điểm kết thúc (giây), None để lấy tới hết video.
+    :param locate: Hàm đổi thời điểm (giây) thành chỉ số frame cho start/end (ví dụ
+                   video_decoder.frame_at_time theo PTS); None để tính theo FPS.
+    :return: List chỉ số frame tăng dần.
+    :raises ValueError: Nếu cần FPS mà không xác định được FPS.
+    """
+    if fps <= 0 and (every_seconds or start or end is not None):
+        raise ValueError("Không xác định được FPS của video.")
+    if locate is not None:
+        first = max(0, locate(start)) if start else 0
+        last = total_frames - 1 if end is None else min(total_frames - 1, locate(end))
+    else:
+        first = max(0, int(round(start * fps))) if start else 0
+        last = total_frames - 1 if end is None else min(total_frames - 1, int(end * fps))
+    if last < first:
+        return []
+    if every_seconds:
+        step = every_seconds * fps
+        count = int((last - first) / step) + 1
+        return sorted({first + int(round(k * step)) for k in range(count)})
+    return list(range(first, last + 1, max(1, every_n or 1)))
+
+def plan_segments(indices, workers, keyframes=None, max_span=150):
+    """
+    Chia danh sách frame cần lấy thành các đoạn để decode song song.
+
+    Mỗi đoạn trải dài tối đa max_span frame (để tiến độ và hủy được cập nhật thường xuyên)
+    và có ít nhất khoảng 4 đoạn cho mỗi worker. Nếu biết danh sách keyframe, mỗi đoạn bắt
+    đầu decode tại keyframe gần nhất phía trước frame đầu tiên của đoạn.
+
+    :param indices: List chỉ số frame tăng dần.
+    :param workers: Số worker process.
+    :param keyframes: List chỉ số keyframe tăng dần, hoặc None nếu không biết.
+    :param max_span: Số frame tối đa mà một đoạn trải qua.
+    :return: List tuple (frame bắt đầu decode, list frame cần lấy).
+    """
+    if not indices:
+        return []
+    span = max(1, min(max_span, -(-(indices[-1] - indices[0] + 1) // (workers * 4))))
+    segments = []
+    current = []
+    for index in indices:
+        if current and index - current[0] >= span:
+            segments.append(current)
+            current = []
+        current.append(index)
+    segments.append(current)
+    planned = []
+    for targets in segments:
+        start = targets[0]
+        if keyframes:
+            position = bisect.bisect_right(keyframes, start) - 1
+            if position >= 0:
+                start = keyframes[position]
+        planned.append((start, targets))
+    return planned
+
+def extract_segment(path, seek_start, targets, out_dir, short_base, output_options=None,
+                    hash_method=None, filter_options=None, max_skip=250, batch_size=16, backend="opencv"):
+    """
+    Decode một đoạn video và lưu các frame cần lấy (chạy trong worker process).
+
+    :param path: Đường dẫn file video.
+    :param seek_start: Frame bắt đầu decode (keyframe hoặc frame đầu tiên cần lấy). Vị trí thật
+                       sau mỗi lần seek được đọc lại từ decoder (CAP_PROP_POS_FRAMES).
+    :param targets: List chỉ số frame cần lấy, tăng dần.
+    :param out_dir: Thư mục lưu.
+    :param short_base: Tiền tố tên file.
+    :param output_options: Dict tham số của frame_encode.encode_frame (format, quality,
+                           png_compression, max_side); None để ghi JPEG chất lượng 95.
+    :param hash_method: Thuật toán perceptual hash ('phash'/'dhash') để cập nhật chỉ mục trùng,
+                        None để không tính.
+    :param filter_options: Dict tham số của FrameFilter để bỏ frame mờ/gần trùng, None để không lọc.
+                           Điểm được tính theo lô batch_size frame.
+    :param max_skip: Nếu frame cần lấy cách vị trí hiện tại hơn max_skip frame thì seek thay vì grab.
+    :param batch_size: Số frame mỗi lô khi lọc.
+    :param backend: Backend decode (xem video_decoder.py); chỉ số frame và keyframe phải được
+                    đánh số theo cùng backend này.
+    :return: Tuple (số frame đã decode, list tuple (chỉ số frame, đường dẫn, hash hoặc None),
+             số frame mờ bị bỏ, số frame gần trùng bị bỏ).
+    """
+    cap = open_capture(path, backend)
+    saved = []
+    decoded = 0
+    frame_filter = FrameFilter(**filter_options) if filter_options is not None else None
+    if not cap.isOpened():
+        return decoded, saved, 0, 0
+    allocator = get_allocator(out_dir)
+    hash_func = HASH_FUNCTIONS[hash_method] if hash_method else None
+    batch = []
+
+    def flush():
+        reasons = frame_filter.filter_batch([frame for _, frame in batch]) if frame_filter else [None] * len(batch)
+        for (index, frame), reason in zip(batch, reasons):
+            if reason is not None:
+                continue
+            try:
+                ext, data = encode_frame(frame, **(output_options or {}))
+            except ValueError as e:
+                print(f"Lỗi encode frame {index}: {e}")
+                continue
+            filename = allocator.write(f"{short_base}_{index}", data, ext)
+            value = hash_func(to_gray(frame)) if hash_func else None
+            saved.append((index, filename, value))
+        batch.clear()
+
+    def seek(index):
+        # Vị trí sau seek lấy theo decoder báo lại, không giả định seek tới đúng index;
+        # seek lỗi hoặc vượt quá index thì đọc tuần tự từ đầu video
+        if cap.set(cv2.CAP_PROP_POS_FRAMES, index):
+            reported = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            if 0 <= reported <= index:
+                return reported
+        print(f"Seek tới frame {index} không chính xác, đọc tuần tự từ đầu video")
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return 0
+
+    try:
+        position = seek(seek_start)
+        for index in targets:
+            if index - position > max_skip:
+                position = seek(index)
+            while position < index and cap.grab():
+                position += 1
+                decoded += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            position += 1
+            decoded += 1
+            batch.append((index, frame))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        cap.release()
+    if frame_filter is None:
+        return decoded, saved, 0, 0
+    return decoded, saved, frame_filter.dropped_blurry, frame_filter.dropped_duplicate
+
+def extract_frames(path, indices, out_dir, short_base, workers=None, output_options=None, keyframes=None,
+                   hash_method=None, filter_options=None, progress=None, cancel_event=None, backend="opencv"):
+    """
+    Trích xuất các frame đã chọn bằng nhiều worker process.
+
+    :param path: Đường dẫn file video.
+    :param indices: List chỉ số frame cần lấy (từ select_frames).
+    :param out_dir: Thư mục lưu.
+    :param short_base: Tiền tố tên file.
+    :param workers: Số worker process; mặc định bằng số CPU.
+    :param output_options: Dict tham số của frame_encode.encode_frame; None để ghi JPEG chất lượng 95.
+    :param keyframes: List chỉ số keyframe (nếu biết, đánh số theo backend) để căn đầu đoạn.
+    :param hash_method: Thuật toán perceptual hash cho các frame đã lưu, None để không tính.
+    :param filter_options: Dict tham số của FrameFilter để bỏ frame mờ/gần trùng, None để không lọc.
+    :param progress: Hàm progress(số frame đã xử lý, tổng) gọi sau mỗi đoạn.
+    :param cancel_event: threading.Event; khi được set, không gửi thêm đoạn mới và các đoạn
+                         chưa chạy bị hủy (các đoạn đang chạy vẫn được lưu).
+    :param backend: Backend decode của các worker, cùng backend đã dùng để chọn chỉ số frame.
+    :return: Dict thống kê: saved (list tuple (chỉ số, đường dẫn, hash)), decoded, blurry,
+             duplicates, segments, elapsed, cancelled.
+    """
+    workers = workers or os.cpu_count() or 1
+    segments = plan_segments(indices, workers, keyframes)
+    total = len(indices)
+    saved = []
+    decoded = 0
+    blurry = 0
+    duplicates = 0
+    done = 0
+    cancelled = False
+    begin = time.perf_counter()
+    pending_segments = iter(segments)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Chỉ giữ tối đa 2 đoạn cho mỗi worker đang chờ, để khi hủy không còn nhiều đoạn đã xếp hàng
+        futures = {}
+
+        def submit_next():
+            for start, targets in pending_segments:
+                futures[executor.submit(extract_segment, path, start, targets, out_dir, short_base,
+                                        output_options, hash_method, filter_options,
+                                        backend=backend)] = len(targets)
+                return
+
+        for _ in range(workers * 2):
+            submit_next()
+        while futures:
+            future = next(as_completed(futures))
+            count = futures.pop(future)
+            done += count
+            try:
+                segment_decoded, segment_saved, segment_blurry, segment_duplicates = future.result()
+                decoded += segment_decoded
+                saved.extend(segment_saved)
+                blurry += segment_blurry
+                duplicates += segment_duplicates
+            except Exception as e:
+                print(f"Lỗi trích xuất đoạn video: {e}")
+            if progress is not None:
+                progress(done, total)
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                for other in futures:
+                    other.cancel()
+            else:
+                submit_next()
+            futures = {f: n for f, n in futures.items() if not f.cancelled()}
+    saved.sort()
+    return {
+        "saved": saved,
+        "decoded": decoded,
+        "blurry": blurry,
+        "duplicates": duplicates,
+        "segments": len(segments),
+        "elapsed": time.perf_counter() - begin,
+        "cancelled": cancelled,
+    }
+
+def summary_text(stats):
+    """
+    :param stats: Dict thống kê trả về từ extract_frames.
+    :return: Chuỗi tóm tắt kết quả trích xuất.
+    """
+    elapsed = stats["elapsed"] or 1e-9
+    text = (f"Đã lưu {len(stats['saved'])} frame ({stats['segments']} đoạn) trong {elapsed:.1f}s - "
+            f"{len(stats['saved']) / elapsed:.1f} frame lưu/s, {stats['decoded'] / elapsed:.1f} frame decode/s")
+    if stats["blurry"] or stats["duplicates"]:
+        text += f", bỏ {stats['blurry']} frame mờ và {stats['duplicates']} frame gần trùng"
+    if stats["cancelled"]:
+        text += " (đã hủy)"
+    return text
+
+def main():
+    parser = argparse.ArgumentParser(description="Trích xuất hàng loạt frame từ video vào dataset/<tên_video>/.")
+    parser.add_argument("video", help="Đường dẫn file video")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--every-n", type=int, help="Lấy một frame sau mỗi N frame")
+    mode.add_argument("--every-seconds", type=float, help="Lấy một frame sau mỗi T giây")
+    parser.add_argument("--start", default="0", help="Thời điểm bắt đầu (ss, mm:ss hoặc hh:mm:ss)")
+    parser.add_argument("--end", help="Thời điểm kết thúc (mặc định: hết video)")
+    parser.add_argument("--workers", type=int, default=None, help="Số worker process (mặc định: số CPU)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="jpg", help="Định dạng ảnh")
+    parser.add_argument("--quality", type=int, default=95, help="Chất lượng JPEG/WebP (1-100)")
+    parser.add_argument("--png-compression", type=int, default=3, help="Mức nén PNG (0-9)")
+    parser.add_argument("--max-side", type=int, default=0, help="Thu nhỏ cạnh dài nhất về giá trị này (0: giữ nguyên)")
+    parser.add_argument("--root", default="dataset", help="Thư mục gốc của dataset")
+    parser.add_argument("--filter", action="store_true", help="Bỏ frame mờ và frame gần trùng với frame vừa giữ")
+    parser.add_argument("--min-sharpness", type=float, default=60.0, help="Độ nét tối thiểu (phương sai Laplacian) khi lọc")
+    parser.add_argument("--max-distance", type=int, default=4, help="Khoảng cách Hamming tối đa để coi là trùng khi lọc")
+    parser.add_argument("--no-index", action="store_true", help="Không cập nhật chỉ mục perceptual hash của dataset")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise SystemExit(f"Không mở được video: {args.video}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    start = parse_time(args.start)
+    end = parse_time(args.end) if args.end else None
+    indices = select_frames(total_frames, fps, args.every_n, args.every_seconds, start, end)
+    out_dir, short_base = frame_output(os.path.splitext(os.path.basename(args.video))[0], args.root)
+    print(f"Trích xuất {len(indices)} frame ({format_time(start)} - "
+          f"{format_time(end if end is not None else total_frames / fps if fps > 0 else 0)}) vào {out_dir}")
+
+    def report(done, total):
+        print(f"\r{done}/{total} frame", end="", flush=True)
+
+    dedup_index = None if args.no_index else shared_index(args.root)
+    try:
+        filter_options = {"min_sharpness": args.min_sharpness, "max_distance": args.max_distance} if args.filter else None
+        output_options = {"format": args.format, "quality": args.quality,
+                          "png_compression": args.png_compression, "max_side": args.max_side}
+        stats = extract_frames(args.video, indices, out_dir, short_base, args.workers, output_options,
+                               hash_method=dedup_index.method if dedup_index else None,
+                               filter_options=filter_options, progress=report)
+    except KeyboardInterrupt:
+        raise SystemExit("\nĐã dừng.")
+    print()
+    if dedup_index is not None:
+        for _, filename, value in stats["saved"]:
+            dedup_index.add(filename, value)
+    print(summary_text(stats))
+
+if __name__ == "__main__":
+    main()
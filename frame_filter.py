@@ -0,0 +1,122 @@
+"""
+File: frame_filter.py
+Mô tả:
+    Bộ lọc frame trước khi lưu: bỏ frame bị mờ (phương sai Laplacian thấp) và frame gần trùng
+    với các frame vừa giữ lại (dHash 64 bit, khoảng cách Hamming nhỏ).
+
+    Điểm được tính theo lô trên ảnh xám đã thu nhỏ: các frame trong lô được thu nhỏ về cùng
+    kích thước rồi xếp thành một mảng 3 chiều, sau đó Laplacian, phương sai và hash của cả lô
+    được tính vector hóa bằng NumPy.
+"""
+
+from collections import deque
+import cv2
+import numpy as np
+
+def _small_grays(frames, width):
+    """
+    Thu nhỏ các frame về cùng kích thước (chiều rộng width, giữ tỉ lệ của frame đầu) và chuyển
+    sang ảnh xám float32.
+
+    :return: Mảng [số frame, cao, rộng].
+    """
+    height = max(3, frames[0].shape[0] * width // frames[0].shape[1])
+    grays = []
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        grays.append(cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA))
+    return np.stack(grays).astype(np.float32)
+
+def sharpness_batch(grays):
+    """
+    Phương sai Laplacian (4 lân cận) của từng ảnh trong lô; giá trị càng thấp ảnh càng mờ.
+
+    :param grays: Mảng ảnh xám [số ảnh, cao, rộng].
+    :return: Mảng float [số ảnh].
+    """
+    laplacian = (grays[:, :-2, 1:-1] + grays[:, 2:, 1:-1] + grays[:, 1:-1, :-2] + grays[:, 1:-1, 2:]
+                 - 4 * grays[:, 1:-1, 1:-1])
+    return laplacian.reshape(len(grays), -1).var(axis=1)
+
+def dhash_batch(grays):
+    """
+    dHash 64 bit của từng ảnh trong lô.
+
+    :param grays: Mảng ảnh xám [số ảnh, cao, rộng].
+    :return: Mảng uint64 [số ảnh].
+    """
+    small = np.stack([cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA) for gray in grays])
+    bits = (small[:, :, 1:] > small[:, :, :-1]).reshape(len(grays), 64)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+def hamming_many(value, values):
+    """
+    Khoảng cách Hamming giữa một hash và một mảng hash (uint64).
+    """
+    xor = np.bitwise_xor(values, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+class FrameFilter:
+    """
+    Lọc frame mờ và frame gần trùng với các frame giữ lại gần nhất.
+
+    Dùng trong Save Frame (từng frame) và trong trích xuất hàng loạt (theo lô, mỗi worker
+    process một bộ lọc riêng).
+    """
+    def __init__(self, min_sharpness=60.0, max_distance=4, history=8, width=320):
+        """
+        :param min_sharpness: Phương sai Laplacian tối thiểu (trên ảnh thu nhỏ); 0 để không lọc mờ.
+        :param max_distance: Khoảng cách Hamming tối đa để coi là trùng; số âm để không lọc trùng.
+        :param history: Số frame giữ lại gần nhất dùng để so trùng.
+        :param width: Chiều rộng ảnh thu nhỏ khi tính điểm.
+        """
+        self.min_sharpness = min_sharpness
+        self.max_distance = max_distance
+        self.width = width
+        self.recent = deque(maxlen=history)
+        self.dropped_blurry = 0
+        self.dropped_duplicate = 0
+
+    def filter_batch(self, frames):
+        """
+        Tính điểm cho cả lô và quyết định giữ/bỏ từng frame theo thứ tự.
+
+        :param frames: List frame BGR (cùng kích thước).
+        :return: List lý do bỏ (chuỗi) hoặc None nếu giữ, tương ứng với từng frame.
+        """
+        if not frames:
+            return []
+        grays = _small_grays(frames, self.width)
+        scores = sharpness_batch(grays)
+        hashes = dhash_batch(grays)
+        reasons = []
+        for score, value in zip(scores, hashes):
+            if self.min_sharpness > 0 and score < self.min_sharpness:
+                self.dropped_blurry += 1
+                reasons.append(f"mờ (độ nét {score:.0f} < {self.min_sharpness:.0f})")
+                continue
+            if self.max_distance >= 0 and self.recent:
+                distance = int(hamming_many(value, np.array(self.recent, dtype=np.uint64)).min())
+                if distance <= self.max_distance:
+                    self.dropped_duplicate += 1
+                    reasons.append(f"gần trùng frame vừa giữ (Hamming {distance})")
+                    continue
+            self.recent.append(int(value))
+            reasons.append(None)
+        return reasons
+
+    def check(self, frame):
+        """
+        Kiểm tra một frame.
+
+        :return: Lý do bỏ hoặc None nếu giữ (frame giữ lại được ghi nhận vào lịch sử).
+        """
+        return self.filter_batch([frame])[0]
+
+    def reset(self):
+        """
+        Xóa lịch sử frame đã giữ và bộ đếm (khi mở video khác).
+        """
+        self.recent.clear()
+        self.dropped_blurry = 0
+        self.dropped_duplicate = 0
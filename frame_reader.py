@@ -0,0 +1,118 @@
+"""
+File: frame_reader.py
+Mô tả:
+    Chứa lớp FrameReader: đọc frame theo chỉ số từ cv2.VideoCapture nhưng theo dõi vị trí
+    thực của decoder, để frame kế tiếp (hoặc cách vài frame phía trước) được đọc tuần tự
+    bằng grab()/read() thay vì seek. Seek (cap.set) buộc decoder quay về keyframe trước đó
+    và decode lại cả GOP, nên chỉ được dùng cho các bước nhảy thật sự (lùi hoặc nhảy xa).
+    Khi đã biết vị trí keyframe (video_index.py), quyết định seek dựa trên keyframe thay vì
+    khoảng cách cố định: chỉ seek khi có keyframe nằm giữa vị trí decoder và frame cần đọc.
+"""
+
+import bisect
+import time
+import cv2
+
+class FrameReader:
+    """
+    Đọc frame từ VideoCapture với đường đọc tuần tự nhanh và thống kê tốc độ decode.
+    """
+    def __init__(self, cap, max_skip=30):
+        """
+        :param cap: cv2.VideoCapture đã mở.
+        :param max_skip: Số frame tối đa bỏ qua bằng grab() thay vì seek khi nhảy tới trước.
+        """
+        self.cap = cap
+        self.max_skip = max_skip
+        self.keyframes = []  # chỉ số keyframe tăng dần (rỗng nếu chưa biết)
+        self.position = 0  # chỉ số frame mà lần read() tiếp theo sẽ trả về
+        self.last_index = -1
+        self.last_frame = None
+        self.frames = 0  # số frame đã trả về (không tính lần lấy lại frame vừa đọc)
+        self.decoded = 0  # số frame đã decode, kể cả frame bỏ qua bằng grab()
+        self.seeks = 0
+        self.elapsed = 0.0
+
+    def set_keyframes(self, keyframes):
+        """
+        Đặt danh sách keyframe dùng để quyết định seek.
+
+        :param keyframes: List chỉ số keyframe tăng dần.
+        """
+        self.keyframes = list(keyframes)
+
+    def should_skip(self, frame_index):
+        """
+        Quyết định đọc tuần tự (grab) hay seek để tới frame_index.
+
+        Không biết keyframe: grab nếu frame nằm trong max_skip frame phía trước vị trí decoder.
+        Biết keyframe: grab nếu không có keyframe nào trong (vị trí decoder, frame_index], vì
+        seek khi đó cũng phải decode lại từ keyframe trước vị trí decoder.
+
+        :return: True nếu nên grab() tới frame_index.
+        """
+        skip = frame_index - self.position
+        if self.position < 0 or skip < 0:
+            return False
+        if not self.keyframes:
+            return skip <= self.max_skip
+        position = bisect.bisect_right(self.keyframes, frame_index) - 1
+        return position < 0 or self.keyframes[position] <= self.position
+
+    def read(self, frame_index):
+        """
+        Đọc frame tại frame_index.
+
+        Nếu là frame vừa đọc thì trả lại ngay; nếu nằm phía trước vị trí decoder và không
+        cần seek (xem should_skip) thì grab() các frame ở giữa rồi read(); ngược lại seek rồi read().
+
+        :param frame_index: Chỉ số frame cần đọc.
+        :return: Frame BGR (numpy array) hoặc None nếu không đọc được.
+        """
+        if frame_index == self.last_index and self.last_frame is not None:
+            return self.last_frame
+        start = time.perf_counter()
+        if self.should_skip(frame_index):
+            for _ in range(frame_index - self.position):
+                if not self.cap.grab():
+                    break
+                self.decoded += 1
+        else:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            self.seeks += 1
+        ret, frame = self.cap.read()
+        self.elapsed += time.perf_counter() - start
+        if not ret:
+            # Vị trí decoder không còn chắc chắn; lần đọc sau sẽ seek lại
+            self.position = -1
+            self.last_index = -1
+            self.last_frame = None
+            return None
+        self.decoded += 1
+        self.frames += 1
+        self.position = frame_index + 1
+        self.last_index = frame_index
+        self.last_frame = frame
+        return frame
+
+    def reset_stats(self):
+        """
+        Đặt lại các bộ đếm thống kê.
+        """
+        self.frames = 0
+        self.decoded = 0
+        self.seeks = 0
+        self.elapsed = 0.0
+
+    def frames_per_second(self):
+        """
+        :return: Số frame trả về mỗi giây thời gian decode (0 nếu chưa đọc frame nào).
+        """
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    def stats_text(self):
+        """
+        :return: Chuỗi thống kê tốc độ đọc frame để hiển thị trên giao diện.
+        """
+        return (f"Decode: {self.frames_per_second():.1f} frame/s, "
+                f"{self.frames} frame, {self.decoded} decode, {self.seeks} seek")
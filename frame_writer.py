@@ -0,0 +1,106 @@
+"""
+File: frame_writer.py
+Mô tả:
+    FrameWriter thực hiện việc encode (frame_encode.py) và ghi frame ra file trên worker thread
+    thay vì thread giao diện, với hàng đợi giới hạn theo tổng dung lượng frame đang chờ để không
+    tốn bộ nhớ vô hạn khi người dùng lưu liên tục.
+"""
+
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from utils import get_allocator
+from dedup_index import HASH_FUNCTIONS, to_gray
+from frame_encode import encode_frame
+
+class _WriteSignals(QObject):
+    """
+    Tín hiệu báo kết quả ghi một frame.
+    """
+    finished = pyqtSignal(object)  # dict: path, hash, error, nbytes
+
+class _WriteTask(QRunnable):
+    """
+    Tác vụ encode và ghi một frame.
+    """
+    def __init__(self, frame, save_dir, base_name, options, hash_method, frame_hash, signals):
+        super().__init__()
+        self.frame = frame
+        self.save_dir = save_dir
+        self.base_name = base_name
+        self.options = options
+        self.hash_method = hash_method
+        self.frame_hash = frame_hash
+        self.signals = signals
+
+    def run(self):
+        """
+        Encode, ghi file với tên chưa tồn tại và tính perceptual hash nếu cần (khi chưa có sẵn).
+        """
+        result = {"path": None, "hash": self.frame_hash, "error": None, "nbytes": self.frame.nbytes}
+        try:
+            ext, data = encode_frame(self.frame, **self.options)
+            result["path"] = get_allocator(self.save_dir).write(self.base_name, data, ext)
+            if result["hash"] is None and self.hash_method:
+                result["hash"] = HASH_FUNCTIONS[self.hash_method](to_gray(self.frame))
+        except Exception as e:
+            result["error"] = str(e)
+        self.signals.finished.emit(result)
+
+class FrameWriter(QObject):
+    """
+    Hàng đợi ghi frame chạy nền, giới hạn theo tổng dung lượng frame đang chờ.
+
+    Phát written(dict kết quả) trên thread giao diện sau mỗi frame, với các khóa
+    path, hash, error.
+    """
+    written = pyqtSignal(object)
+
+    def __init__(self, max_pending_bytes=256 * 1024 * 1024, parent=None):
+        """
+        :param max_pending_bytes: Tổng dung lượng tối đa của các frame đang chờ ghi.
+        """
+        super().__init__(parent)
+        self.max_pending_bytes = max_pending_bytes
+        self.pending_bytes = 0
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)  # một thread để các frame được ghi theo đúng thứ tự
+        self.signals = _WriteSignals()
+        self.signals.finished.connect(self._on_finished)
+
+    def submit(self, frame, save_dir, base_name, options=None, hash_method=None, frame_hash=None):
+        """
+        Đưa một frame vào hàng đợi ghi.
+
+        :param frame: Frame BGR (không được sửa sau khi đưa vào).
+        :param save_dir: Thư mục lưu.
+        :param base_name: Tên file cơ bản (không có phần mở rộng).
+        :param options: Dict tham số của frame_encode.encode_frame (format, quality, png_compression, max_side).
+        :param hash_method: Thuật toán perceptual hash để tính cho frame, None để không tính.
+        :param frame_hash: Hash đã tính sẵn (ví dụ khi kiểm tra trùng) để worker không tính lại.
+        :return: False nếu hàng đợi đã đầy (frame không được nhận).
+        """
+        with self.lock:
+            if self.pending and self.pending_bytes + frame.nbytes > self.max_pending_bytes:
+                return False
+            self.pending_bytes += frame.nbytes
+            self.pending += 1
+        self.pool.start(_WriteTask(frame, save_dir, base_name, dict(options or {}), hash_method,
+                                    frame_hash, self.signals))
+        return True
+
+    def _on_finished(self, result):
+        """
+        Giải phóng dung lượng hàng đợi và chuyển tiếp kết quả.
+        """
+        with self.lock:
+            self.pending_bytes -= result["nbytes"]
+            self.pending -= 1
+        self.written.emit(result)
+
+    def wait(self):
+        """
+        Chờ ghi xong các frame đang chờ (ví dụ trước khi đóng ứng dụng).
+        """
+        self.pool.waitForDone()
@@ -0,0 +1,136 @@
+"""
+File: image_normalize.py
+Mô tả:
+    Bước kiểm tra và chuẩn hóa ảnh sau khi tải về, trước khi ghi xuống đĩa.
+
+    Mỗi ảnh được decode, loại bỏ nếu quá nhỏ hoặc hỏng (ví dụ trang HTML báo lỗi),
+    thu nhỏ cạnh dài nhất về giới hạn cho phép và encode lại thành JPEG thật với chất
+    lượng cố định (metadata như EXIF bị loại bỏ khi encode lại).
+    Việc decode/encode chạy trong process pool để không giữ GIL của process giao diện.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+
+# ok: ảnh hợp lệ; data: JPEG đã chuẩn hóa; reason: lý do bị loại; cpu_time: thời gian CPU (giây)
+NormalizeResult = namedtuple("NormalizeResult", ["ok", "data", "reason", "width", "height", "cpu_time"])
+
+def normalize_image(data, quality=90, max_side=1600, min_bytes=2048, min_side=64):
+    """
+    Kiểm tra và chuẩn hóa dữ liệu ảnh (chạy trong worker process).
+
+    :param data: Dữ liệu ảnh tải về (bytes).
+    :param quality: Chất lượng JPEG khi encode lại (0-100).
+    :param max_side: Cạnh dài nhất tối đa (pixel); 0 để không giới hạn.
+    :param min_bytes: Kích thước dữ liệu tối thiểu (byte).
+    :param min_side: Cạnh ngắn nhất tối thiểu (pixel).
+    :return: NormalizeResult.
+    """
+    start = time.process_time()
+
+    def reject(reason, width=0, height=0):
+        return NormalizeResult(False, None, reason, width, height, time.process_time() - start)
+
+    if len(data) < min_bytes:
+        return reject(f"dữ liệu quá nhỏ ({len(data)} byte)")
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return reject("không decode được (không phải ảnh hoặc file hỏng)")
+    height, width = image.shape[:2]
+    if min(width, height) < min_side:
+        return reject(f"ảnh quá nhỏ ({width}x{height})", width, height)
+    longest = max(width, height)
+    if max_side and longest > max_side:
+        scale = max_side / longest
+        width, height = max(1, round(width * scale)), max(1, round(height * scale))
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return reject("không encode được JPEG", width, height)
+    return NormalizeResult(True, encoded.tobytes(), "", width, height, time.process_time() - start)
+
+class ImageNormalizer:
+    """
+    Chạy normalize_image trên process pool và ghi nhận thời gian CPU của từng ảnh.
+
+    Pool được tạo khi có ảnh đầu tiên cần xử lý.
+    """
+    def __init__(self, quality=90, max_side=1600, min_bytes=2048, min_side=64, workers=None):
+        """
+        :param quality: Chất lượng JPEG khi encode lại.
+        :param max_side: Cạnh dài nhất tối đa (pixel).
+        :param min_bytes: Kích thước dữ liệu tối thiểu (byte).
+        :param min_side: Cạnh ngắn nhất tối thiểu (pixel).
+        :param workers: Số worker process; mặc định bằng số CPU.
+        """
+        self.quality = quality
+        self.max_side = max_side
+        self.min_bytes = min_bytes
+        self.min_side = min_side
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.rejected = 0
+        self.cpu_total = 0.0
+
+    def submit(self, data):
+        """
+        Đưa dữ liệu ảnh vào process pool.
+
+        :return: concurrent.futures.Future trả về NormalizeResult.
+        """
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            executor = self.executor
+        future = executor.submit(normalize_image, data, self.quality, self.max_side,
+                                 self.min_bytes, self.min_side)
+        future.add_done_callback(self._record)
+        return future
+
+    def normalize(self, data):
+        """
+        Chuẩn hóa một ảnh và chờ kết quả.
+
+        :return: NormalizeResult.
+        """
+        return self.submit(data).result()
+
+    def _record(self, future):
+        """
+        Cộng dồn thống kê khi một ảnh xử lý xong.
+        """
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        with self.lock:
+            self.processed += 1
+            self.cpu_total += result.cpu_time
+            if not result.ok:
+                self.rejected += 1
+
+    def stats_text(self):
+        """
+        :return: Chuỗi thống kê số ảnh đã xử lý, bị loại và thời gian CPU trung bình.
+        """
+        with self.lock:
+            average = self.cpu_total / self.processed * 1000 if self.processed else 0.0
+            return (f"Chuẩn hóa: {self.processed} ảnh, {self.rejected} bị loại, "
+                    f"CPU trung bình {average:.1f} ms/ảnh")
+
+    def shutdown(self, cancel_pending=False):
+        """
+        Dừng process pool.
+
+        :param cancel_pending: Hủy các ảnh còn chờ trong hàng đợi thay vì xử lý hết (khi thoát ứng dụng).
+        """
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=cancel_pending)
+                self.executor = None
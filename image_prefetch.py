@@ -0,0 +1,141 @@
+"""
+File: image_prefetch.py
+Mô tả:
+    Chứa lớp ImagePrefetcher dùng để tải trước (prefetch) và decode các ảnh kế tiếp
+    trên các worker thread, giữ lại một cache có giới hạn các QImage đã sẵn sàng để
+    ScrapingTab có thể hiển thị ngay khi người dùng bấm Skip/Download.
+"""
+
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+from byte_cache import ByteCache
+
+class _FetchSignals(QObject):
+    """
+    Tín hiệu dùng để gửi kết quả từ worker thread về thread giao diện.
+    """
+    finished = pyqtSignal(int, str, QImage, str)  # generation, url, ảnh, thông báo lỗi
+
+class _FetchTask(QRunnable):
+    """
+    Tác vụ chạy trên thread pool: tải dữ liệu ảnh từ URL và decode thành QImage.
+    """
+    def __init__(self, generation, url, byte_cache, timeout, signals):
+        """
+        :param generation: Thế hệ của danh sách URL lúc tác vụ được tạo (để bỏ kết quả cũ).
+        :param url: URL ảnh cần tải.
+        :param byte_cache: ByteCache dùng chung để lưu dữ liệu đã tải.
+        :param timeout: Thời gian chờ tối đa (giây) cho request.
+        :param signals: Đối tượng _FetchSignals để báo kết quả.
+        """
+        super().__init__()
+        self.generation = generation
+        self.url = url
+        self.byte_cache = byte_cache
+        self.timeout = timeout
+        self.signals = signals
+
+    def run(self):
+        """
+        Tải và decode ảnh. QImage có thể tạo an toàn ngoài thread giao diện.
+        """
+        try:
+            data = self.byte_cache.fetch(self.url, timeout=self.timeout)
+            image = QImage()
+            if not image.loadFromData(data):
+                self.signals.finished.emit(self.generation, self.url, QImage(),
+                                           "Lỗi: không load được dữ liệu ảnh!")
+                return
+            self.signals.finished.emit(self.generation, self.url, image, "")
+        except Exception as e:
+            print(f"Lỗi load ảnh: {e}")
+            self.signals.finished.emit(self.generation, self.url, QImage(), "Lỗi load ảnh!")
+
+class ImagePrefetcher(QObject):
+    """
+    Quản lý việc tải trước các ảnh kế tiếp trên thread pool.
+
+    Cache chỉ giữ các ảnh nằm trong cửa sổ đang được yêu cầu (ảnh hiện tại và
+    `depth` ảnh phía sau), nên bộ nhớ luôn bị giới hạn.
+    Khi một ảnh được decode xong, phát tín hiệu image_ready(url).
+    """
+    image_ready = pyqtSignal(str)
+
+    def __init__(self, depth=5, max_workers=4, timeout=10, byte_cache=None, parent=None):
+        """
+        :param depth: Số ảnh tải trước phía sau ảnh hiện tại.
+        :param max_workers: Số worker thread tối đa.
+        :param timeout: Thời gian chờ tối đa (giây) cho mỗi request.
+        :param byte_cache: ByteCache dùng chung; nếu None sẽ tạo cache riêng.
+        """
+        super().__init__(parent)
+        self.depth = depth
+        self.byte_cache = byte_cache if byte_cache is not None else ByteCache()
+        self.timeout = timeout
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = _FetchSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.generation = 0
+        self.cache = OrderedDict()  # url -> (QImage, thông báo lỗi)
+        self.pending = set()
+        self.wanted = set()
+
+    def set_depth(self, depth):
+        """
+        Thay đổi số ảnh tải trước.
+
+        :param depth: Số ảnh tải trước mới.
+        """
+        self.depth = max(0, depth)
+
+    def reset(self):
+        """
+        Xóa cache và bỏ qua kết quả của các tác vụ đang chạy (khi fetch danh sách mới).
+        """
+        self.generation += 1
+        self.cache.clear()
+        self.pending.clear()
+        self.wanted = set()
+
+    def prefetch(self, urls, index):
+        """
+        Lên lịch tải ảnh tại vị trí index và `depth` ảnh tiếp theo.
+
+        Các ảnh ngoài cửa sổ này bị loại khỏi cache.
+
+        :param urls: Danh sách URL ảnh.
+        :param index: Vị trí ảnh hiện tại.
+        """
+        window = urls[index:index + self.depth + 1]
+        self.wanted = set(window)
+        for url in list(self.cache):
+            if url not in self.wanted:
+                del self.cache[url]
+        for url in window:
+            if url in self.cache or url in self.pending:
+                continue
+            self.pending.add(url)
+            self.pool.start(_FetchTask(self.generation, url, self.byte_cache, self.timeout, self.signals))
+
+    def get(self, url):
+        """
+        Lấy ảnh đã decode từ cache.
+
+        :param url: URL ảnh.
+        :return: Tuple (QImage, thông báo lỗi) hoặc None nếu ảnh chưa sẵn sàng.
+        """
+        return self.cache.get(url)
+
+    def _on_finished(self, generation, url, image, error):
+        """
+        Nhận kết quả từ worker (chạy trên thread giao diện).
+        """
+        if generation != self.generation:
+            return
+        self.pending.discard(url)
+        if url not in self.wanted:
+            return
+        self.cache[url] = (image, error)
+        self.image_ready.emit(url)
@@ -0,0 +1,107 @@
+"""
+File: image_search.py
+Mô tả:
+    Chứa các hàm dùng chung (không phụ thuộc giao diện) cho việc tìm kiếm ảnh bằng
+    DuckDuckGo, tổ chức thư mục dataset theo tên class và lưu ảnh đã tải về.
+"""
+
+import os
+from duckduckgo_search import DDGS
+from utils import get_allocator
+
+def search_images(keyword, max_results=1000):
+    """
+    Tìm kiếm ảnh theo từ khóa bằng API của DuckDuckGo.
+
+    :param keyword: Từ khóa tìm ảnh.
+    :param max_results: Số kết quả tối đa.
+    :return: Danh sách kết quả (dict có các khóa 'image', 'thumbnail', 'title', ...).
+    """
+    with DDGS() as ddgs:
+        return ddgs.images(keyword, max_results=max_results)
+
+def class_folder(class_name, root="dataset"):
+    """
+    Trả về thư mục lưu ảnh của một class (dataset/<class_name>/), tạo mới nếu chưa có.
+
+    :param class_name: Tên class.
+    :param root: Thư mục gốc của dataset.
+    :return: Đường dẫn thư mục.
+    """
+    folder = os.path.join(root, class_name)
+    if not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+    return folder
+
+def store_image(data, class_name, index, root="dataset", normalizer=None, dedup_index=None, wait_for_index=True):
+    """
+    Lưu dữ liệu một ảnh đã tải vào dataset/<class_name>/<class_name>_<index>.jpg.
+
+    Nếu có normalizer, ảnh được kiểm tra và encode lại thành JPEG trước khi lưu.
+    Nếu có dedup_index, ảnh gần trùng với ảnh đã có trong dataset sẽ không được lưu.
+    An toàn khi gọi từ nhiều thread.
+
+    :param data: Dữ liệu ảnh (bytes).
+    :param class_name: Tên class.
+    :param index: Vị trí ảnh trong kết quả tìm kiếm.
+    :param root: Thư mục gốc của dataset.
+    :param normalizer: ImageNormalizer (None để lưu nguyên dữ liệu).
+    :param dedup_index: DedupIndex (None để không kiểm tra trùng).
+    :param wait_for_index: False để bỏ qua kiểm tra trùng thay vì chờ load chỉ mục khi chỉ
+                           mục chưa sẵn sàng (dùng trên giao diện).
+    :return: Tuple (trạng thái, chi tiết, NormalizeResult hoặc None). Trạng thái là 'saved'
+             (chi tiết là đường dẫn file), 'rejected' (chi tiết là lý do) hoặc 'duplicate'
+             (chi tiết là đường dẫn ảnh đã có).
+    """
+    result = None
+    if normalizer is not None:
+        result = normalizer.normalize(data)
+        if not result.ok:
+            return "rejected", result.reason, result
+        data = result.data
+    allocator = get_allocator(class_folder(class_name, root))
+    base_name = f"{class_name}_{index}"
+    if dedup_index is None:
+        return "saved", allocator.write(base_name, data), result
+    value = dedup_index.hash_bytes(data)
+    if value is None:
+        return "rejected", "không decode được dữ liệu ảnh", result
+    if wait_for_index:
+        # Load trước khi giữ khóa: việc load chỉ giữ khóa lúc gộp kết quả
+        dedup_index.ensure_loaded()
+    # Giữ khóa từ lúc kiểm tra đến lúc thêm vào chỉ mục để hai ảnh trùng không cùng được lưu
+    with dedup_index.lock:
+        duplicate = dedup_index.find_duplicate(value, wait=False)
+        if duplicate is not None:
+            return "duplicate", duplicate, result
+        filename = allocator.write(base_name, data)
+        dedup_index.add(filename, value)
+    return "saved", filename, result
+
+def iter_image_pages(keyword, page_size=100, max_results=1000, seen=None):
+    """
+    Generator trả về kết quả tìm ảnh theo từng trang, chỉ gửi request khi được đọc tiếp.
+
+    API DDGS.images() chỉ trả về một list hoàn chỉnh và không cho đọc tiếp từ vị trí cũ,
+    nên chỉ gọi tối đa hai lần: lần đầu lấy một trang (một request, để ảnh đầu tiên hiển
+    thị ngay), lần sau lấy luôn max_results rồi chia trang tại chỗ. Tổng số kết quả tải về
+    vì vậy tuyến tính theo max_results thay vì tải lại các trang trước cho mỗi trang mới.
+
+    :param keyword: Từ khóa tìm ảnh.
+    :param page_size: Số kết quả mỗi trang.
+    :param max_results: Số kết quả tối đa.
+    :param seen: Các URL ảnh đã có (khi tiếp tục một phiên); chỉ đọc các trang sau chúng.
+    :return: Generator các list kết quả mới.
+    """
+    seen = set(seen or ())
+    first = min(len(seen) + page_size, max_results)
+    with DDGS() as ddgs:
+        for limit in sorted({first, max_results}):
+            results = ddgs.images(keyword, max_results=limit)
+            new = [item for item in results if item['image'] not in seen]
+            seen.update(item['image'] for item in new)
+            for start in range(0, len(new), page_size):
+                yield new[start:start + page_size]
+            # Hết kết quả khi DDGS trả về ít hơn số yêu cầu
+            if len(results) < limit:
+                return
@@ -0,0 +1,45 @@
+"""
+File: index_warmup.py
+Mô tả:
+    Load chỉ mục perceptual hash (DedupIndex) trên worker thread khi các tab khởi động.
+
+    Lần load đầu phải hash mọi ảnh trong dataset chưa có trong file chỉ mục, có thể mất vài
+    phút với dataset lớn; trong lúc đó các tab bỏ qua kiểm tra trùng (DedupIndex.is_ready)
+    thay vì chặn thread giao diện.
+"""
+
+from PyQt5.QtCore import QCoreApplication, QRunnable, QThreadPool
+
+class _WarmUpTask(QRunnable):
+    """
+    Tác vụ load chỉ mục trên thread pool.
+    """
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    def run(self):
+        """
+        Load chỉ mục (không làm gì nếu đã load; chờ nếu thread khác đang load).
+        """
+        try:
+            self.index.ensure_loaded()
+        except Exception as e:
+            print(f"Lỗi load chỉ mục perceptual hash: {e}")
+
+_started = set()
+
+def warm_up_index(index):
+    """
+    Bắt đầu load chỉ mục nền (mỗi chỉ mục một lần). Khi ứng dụng thoát, lần load đang chạy
+    được dừng để không giữ thread pool.
+
+    :param index: DedupIndex (thường là shared_index("dataset")).
+    """
+    if index.is_ready() or id(index) in _started:
+        return
+    _started.add(id(index))
+    app = QCoreApplication.instance()
+    if app is not None:
+        app.aboutToQuit.connect(index.cancel_refresh)
+    QThreadPool.globalInstance().start(_WarmUpTask(index))
@@ -0,0 +1,247 @@
+"""
+File: label_prefetch.py
+Mô tả:
+    Load ảnh cho tab gán nhãn: decode ảnh ở kích thước hiển thị, đọc file label YOLO đi kèm,
+    và LabelPrefetcher: load trước K ảnh kế tiếp/phía trước ảnh đang xem trên worker thread
+    vào một cache LRU giới hạn theo dung lượng, để bấm Next/Previous chỉ là lấy từ bộ nhớ.
+
+    Worker chỉ tạo QImage (QPixmap phải được tạo trên thread giao diện). Mỗi mục cache ghi
+    lại mtime và kích thước của file ảnh và file label lúc load; mục nào có file đã thay đổi
+    (ví dụ vừa Save Label) bị bỏ và load lại.
+"""
+
+import os
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImageReader
+
+def load_scaled_image(image_path, box_width, box_height):
+    """
+    Decode ảnh ở kích thước vừa khung box_width x box_height (giữ tỉ lệ khung hình).
+
+    Kích thước gốc được đọc từ header, rồi QImageReader.setScaledSize để plugin decode thu
+    nhỏ ngay khi decode (JPEG dùng DCT scaling của libjpeg), nên không cần giữ ảnh gốc đầy đủ
+    độ phân giải trong bộ nhớ. Định dạng không báo kích thước trong header được decode đầy đủ
+    rồi thu nhỏ.
+
+    :param image_path: Đường dẫn tới file ảnh.
+    :return: Tuple (QImage đã thu nhỏ, QSize ảnh gốc, scale factor), hoặc None nếu không đọc được.
+    """
+    reader = QImageReader(image_path)
+    original_size = reader.size()
+    if not original_size.isValid():
+        image = reader.read()
+        if image.isNull():
+            return None
+        original_size = image.size()
+    else:
+        image = None
+    scale_factor = min(box_width / original_size.width(), box_height / original_size.height())
+    new_size = QSize(max(1, int(original_size.width() * scale_factor)),
+                     max(1, int(original_size.height() * scale_factor)))
+    if image is None:
+        reader.setScaledSize(new_size)
+        image = reader.read()
+        if image.isNull():
+            return None
+    if image.size() != new_size:
+        image = image.scaled(new_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image, original_size, scale_factor
+
+def label_path(image_path):
+    """
+    :return: Đường dẫn file label (.txt) của ảnh.
+    """
+    return os.path.splitext(image_path)[0] + ".txt"
+
+def read_labels(label_file):
+    """
+    Đọc file label định dạng: class cx cy w h (các giá trị normalized).
+
+    :param label_file: Đường dẫn tới file label (.txt).
+    :return: List tuple (class, cx, cy, w, h); list rỗng nếu chưa có file.
+    """
+    labels = []
+    if not os.path.exists(label_file):
+        return labels
+    try:
+        with open(label_file, "r") as f:
+            for line in f:
+                parts = line.strip().split()
+                if len(parts) == 5:
+                    try:
+                        labels.append((int(parts[0]),) + tuple(float(v) for v in parts[1:]))
+                    except Exception as e:
+                        print("Lỗi parse label:", e)
+    except Exception as e:
+        print("Lỗi load file label:", e)
+    return labels
+
+def file_stamp(path):
+    """
+    :return: Tuple (mtime_ns, kích thước) của file, hoặc None nếu file không tồn tại.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def load_entry(image_path, box_width, box_height):
+    """
+    Load ảnh (ở kích thước hiển thị) và label của nó thành một mục cache.
+
+    :return: Dict: image (QImage), image_size (QSize gốc), scale_factor, labels, box
+             (kích thước khung), stamps (file_stamp của ảnh và label); None nếu không đọc được ảnh.
+    """
+    stamps = (file_stamp(image_path), file_stamp(label_path(image_path)))
+    loaded = load_scaled_image(image_path, box_width, box_height)
+    if loaded is None:
+        return None
+    image, image_size, scale_factor = loaded
+    return {
+        "image": image,
+        "image_size": image_size,
+        "scale_factor": scale_factor,
+        "labels": read_labels(label_path(image_path)),
+        "box": (box_width, box_height),
+        "stamps": stamps,
+    }
+
+class _LoadSignals(QObject):
+    """
+    Tín hiệu báo một ảnh đã được load xong trên worker thread.
+    """
+    finished = pyqtSignal(int, str, object)  # generation, đường dẫn ảnh, mục cache (hoặc None)
+
+class _LoadTask(QRunnable):
+    """
+    Tác vụ load một ảnh và label của nó trên thread pool.
+    """
+    def __init__(self, prefetcher, generation, image_path, box_width, box_height):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.generation = generation
+        self.image_path = image_path
+        self.box_width = box_width
+        self.box_height = box_height
+
+    def run(self):
+        """
+        Load ảnh, bỏ qua nếu ảnh đã ra khỏi cửa sổ prefetch trong lúc chờ.
+        """
+        entry = None
+        if self.generation == self.prefetcher.generation and self.image_path in self.prefetcher.wanted:
+            try:
+                entry = load_entry(self.image_path, self.box_width, self.box_height)
+            except Exception as e:
+                print(f"Lỗi load ảnh: {e}")
+        self.prefetcher.signals.finished.emit(self.generation, self.image_path, entry)
+
+class LabelPrefetcher(QObject):
+    """
+    Cache LRU các ảnh đã load cho tab gán nhãn (giới hạn theo dung lượng) và tải trước các
+    ảnh lân cận trên thread pool.
+    """
+    def __init__(self, depth=3, max_bytes=128 * 1024 * 1024, max_workers=2, parent=None):
+        """
+        :param depth: Số ảnh load trước mỗi phía (K ảnh kế tiếp và K ảnh phía trước).
+        :param max_bytes: Dung lượng tối đa của các QImage trong cache (byte).
+        :param max_workers: Số worker thread tối đa.
+        """
+        super().__init__(parent)
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.cache = OrderedDict()  # đường dẫn ảnh -> mục cache (load_entry)
+        self.generation = 0
+        self.pending = set()
+        self.wanted = set()
+        self.hits = 0
+        self.misses = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = _LoadSignals()
+        self.signals.finished.connect(self._on_finished)
+
+    def reset(self):
+        """
+        Xóa cache và bỏ qua kết quả của các tác vụ đang chạy (khi đổi folder).
+        """
+        self.generation += 1
+        self.cache.clear()
+        self.total_bytes = 0
+        self.pending.clear()
+        self.wanted = set()
+
+    def get(self, image_path, box_width, box_height):
+        """
+        Lấy mục cache của ảnh nếu còn hợp lệ (cùng kích thước khung, file ảnh và label chưa đổi).
+
+        :return: Mục cache (xem load_entry) hoặc None.
+        """
+        entry = self.cache.get(image_path)
+        if entry is not None and (entry["box"] != (box_width, box_height) or
+                                  entry["stamps"] != (file_stamp(image_path),
+                                                      file_stamp(label_path(image_path)))):
+            self.discard(image_path)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.cache.move_to_end(image_path)
+        return entry
+
+    def put(self, image_path, entry):
+        """
+        Thêm mục vào cache, loại các mục dùng lâu nhất nếu vượt dung lượng.
+        """
+        self.discard(image_path)
+        size = entry["image"].sizeInBytes()
+        if size > self.max_bytes:
+            return
+        self.cache[image_path] = entry
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, old = self.cache.popitem(last=False)
+            self.total_bytes -= old["image"].sizeInBytes()
+
+    def discard(self, image_path):
+        """
+        Bỏ mục của ảnh khỏi cache (ví dụ khi ảnh bị xóa).
+        """
+        entry = self.cache.pop(image_path, None)
+        if entry is not None:
+            self.total_bytes -= entry["image"].sizeInBytes()
+
+    def prefetch(self, image_paths, box_width, box_height):
+        """
+        Lên lịch load các ảnh chưa có trong cache; ảnh đang chờ mà không còn trong danh sách
+        sẽ bị bỏ qua khi tới lượt.
+
+        :param image_paths: Đường dẫn các ảnh lân cận, theo thứ tự ưu tiên.
+        """
+        self.wanted = set(image_paths)
+        for image_path in image_paths:
+            if image_path in self.cache or image_path in self.pending:
+                continue
+            self.pending.add(image_path)
+            self.pool.start(_LoadTask(self, self.generation, image_path, box_width, box_height))
+
+    def _on_finished(self, generation, image_path, entry):
+        """
+        Nhận kết quả từ worker (chạy trên thread giao diện).
+        """
+        if generation != self.generation:
+            return
+        self.pending.discard(image_path)
+        if entry is not None and image_path in self.wanted:
+            self.put(image_path, entry)
+
+    def stats_text(self):
+        """
+        :return: Chuỗi thống kê cache để hiển thị trên giao diện.
+        """
+        return (f"Cache ảnh: {len(self.cache)} ảnh, {self.total_bytes / (1024 * 1024):.0f}/"
+                f"{self.max_bytes / (1024 * 1024):.0f} MB, {self.hits} hit / {self.misses} miss")
@@ -9,9 +9,10 @@ Mô tả:
 import os
 from PyQt5.QtWidgets import (QWidget, QLabel, QComboBox, QHBoxLayout, QVBoxLayout, 
                              QPushButton, QMessageBox, QInputDialog, QDialog)
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen
+from PyQt5.QtGui import QPixmap, QPainter, QPen
 from PyQt5.QtCore import Qt, QRect, QPoint, QSize
 from dialogs import EditBoxDialog
+from label_prefetch import LabelPrefetcher, label_path, load_entry, load_scaled_image, read_labels
 
 class ImageLabelerWidget(QLabel):
     """
@@ -29,7 +30,8 @@ class ImageLabelerWidget(QLabel):
         """
         super().__init__(parent)
         self.setMouseTracking(True)
-        self.image = None          # Ảnh gốc (QImage)
+        self.image = None          # Ảnh đã decode ở kích thước hiển thị (QImage)
+        self.image_size = QSize()  # Kích thước ảnh gốc (đọc từ header)
         self.scaled_image = None   # Ảnh đã scale để hiển thị
         self.boxes = []            # Danh sách các bounding box: list of tuples (QRect, label)
         self.drawing = False
@@ -74,24 +76,33 @@ class ImageLabelerWidget(QLabel):
 
     def setImage(self, image_path):
         """
-        Load ảnh từ đường dẫn và scale ảnh phù hợp với kích thước widget.
+        Load ảnh từ đường dẫn, decode thẳng ở kích thước vừa widget (xem load_scaled_image).
         
         Sau đó, xóa các bounding box hiện có và reset undo/redo.
         
         :param image_path: Đường dẫn tới file ảnh.
         """
+        self.showImage(image_path, load_scaled_image(image_path, self.width(), self.height()))
+
+    def showImage(self, image_path, loaded):
+        """
+        Hiển thị ảnh đã được decode sẵn (ví dụ lấy từ cache của LabelPrefetcher).
+
+        Sau đó, xóa các bounding box hiện có và reset undo/redo.
+
+        :param image_path: Đường dẫn tới file ảnh.
+        :param loaded: Tuple (QImage đã thu nhỏ, QSize ảnh gốc, scale factor) hoặc None.
+        """
         self.image_file = image_path
-        self.image = QImage(image_path)
-        if self.image.isNull():
+        if loaded is None:
+            self.image = None
             return
+        # Scale factor (ảnh gốc -> ảnh hiển thị) dùng để chuyển tọa độ bounding box
+        self.image, self.image_size, self.scale_factor = loaded
         # Đảm bảo widget không có margins và căn lề lên trên – trái
         self.setContentsMargins(0, 0, 0, 0)
         self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
-        # Tính scale factor dựa trên kích thước widget hiện tại và ảnh gốc
-        self.scale_factor = min(self.width() / self.image.width(), self.height() / self.image.height())
-        new_width = int(self.image.width() * self.scale_factor)
-        new_height = int(self.image.height() * self.scale_factor)
-        self.scaled_image = self.image.scaled(new_width, new_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.scaled_image = self.image
         self.setPixmap(QPixmap.fromImage(self.scaled_image))
         self.boxes = []
         self.undo_stack.clear()
@@ -207,41 +218,38 @@ class ImageLabelerWidget(QLabel):
         """
         if self.image is None:
             return
+        self.setLabels(read_labels(label_file))
+
+    def setLabels(self, labels):
+        """
+        Hiển thị các bounding box đã đọc từ file label (xem read_labels).
+
+        Chuyển đổi tọa độ normalized theo ảnh gốc sang tọa độ ảnh đã scale.
+
+        :param labels: List tuple (class, cx, cy, w, h) với giá trị normalized.
+        """
         self.boxes = []
-        if not os.path.exists(label_file):
-            return
-        img_width = self.image.width()
-        img_height = self.image.height()
-        try:
-            with open(label_file, "r") as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) == 5:
-                        cls, cx, cy, w, h = parts
-                        try:
-                            cls = int(cls)
-                            # Tính tọa độ gốc dựa trên ảnh gốc
-                            cx = float(cx) * img_width
-                            cy = float(cy) * img_height
-                            w = float(w) * img_width
-                            h = float(h) * img_height
-                            x1 = int(cx - w / 2)
-                            y1 = int(cy - h / 2)
-                            # Lưu bounding box theo tọa độ ảnh gốc
-                            rect = QRect(x1, y1, int(w), int(h))
-                            # Chuyển đổi sang tọa độ của ảnh đã scale
-                            scaled_rect = QRect(
-                                int(rect.x() * self.scale_factor),
-                                int(rect.y() * self.scale_factor),
-                                int(rect.width() * self.scale_factor),
-                                int(rect.height() * self.scale_factor)
-                            )
-                            self.boxes.append((scaled_rect, cls))
-                        except Exception as e:
-                            print("Lỗi parse label:", e)
-            self.update()
-        except Exception as e:
-            print("Lỗi load file label:", e)
+        img_width = self.image_size.width()
+        img_height = self.image_size.height()
+        for cls, cx, cy, w, h in labels:
+            # Tính tọa độ gốc dựa trên ảnh gốc
+            cx = cx * img_width
+            cy = cy * img_height
+            w = w * img_width
+            h = h * img_height
+            x1 = int(cx - w / 2)
+            y1 = int(cy - h / 2)
+            # Lưu bounding box theo tọa độ ảnh gốc
+            rect = QRect(x1, y1, int(w), int(h))
+            # Chuyển đổi sang tọa độ của ảnh đã scale
+            scaled_rect = QRect(
+                int(rect.x() * self.scale_factor),
+                int(rect.y() * self.scale_factor),
+                int(rect.width() * self.scale_factor),
+                int(rect.height() * self.scale_factor)
+            )
+            self.boxes.append((scaled_rect, cls))
+        self.update()
 
     def clearBoxes(self):
         """
@@ -259,7 +267,8 @@ class LabelingTab(QWidget):
     Cho phép:
       - Chọn folder chứa ảnh (theo tên class).
       - Duyệt các ảnh trong folder.
-      - Hiển thị ảnh và load các bounding box (nếu có).
+      - Hiển thị ảnh và load các bounding box (nếu có); các ảnh lân cận được load trước trên
+        worker thread (LabelPrefetcher) nên Previous/Next thường chỉ lấy từ cache.
       - Thực hiện các thao tác: Previous/Next, Save Label, Clear Annotations, Undo, Redo, Delete Image.
     """
     def __init__(self, parent=None):
@@ -270,6 +279,7 @@ class LabelingTab(QWidget):
         self.image_files = []
         self.current_index = -1
         self.current_folder = ""
+        self.prefetcher = LabelPrefetcher(parent=self)
         self.initUI()
 
     def initUI(self):
@@ -349,7 +359,8 @@ class LabelingTab(QWidget):
         """
         folder = os.path.join("dataset", self.folder_combo.currentText())
         self.current_folder = folder
-        self.image_files = [f for f in os.listdir(folder) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+        self.prefetcher.reset()
+        self.image_files = [f for f in os.listdir(folder) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))]
         self.image_files.sort()
         if self.image_files:
             self.current_index = 0
@@ -364,14 +375,36 @@ class LabelingTab(QWidget):
         """
         Load và hiển thị ảnh hiện tại dựa trên chỉ số current_index.
         Cùng với đó, load các bounding box từ file label (nếu có).
+
+        Ảnh và label được lấy từ cache của prefetcher nếu có (và chưa thay đổi trên đĩa),
+        ngược lại được load ngay; sau đó các ảnh lân cận được lên lịch load trước.
         """
         if self.current_index < 0 or self.current_index >= len(self.image_files):
             return
         image_path = os.path.join(self.current_folder, self.image_files[self.current_index])
         self.image_name_label.setText(f"Ảnh: {self.image_files[self.current_index]}")
-        self.image_labeler.setImage(image_path)
-        label_file = os.path.splitext(image_path)[0] + ".txt"
-        self.image_labeler.loadBoxesFromFile(label_file)
+        box_width, box_height = self.image_labeler.width(), self.image_labeler.height()
+        entry = self.prefetcher.get(image_path, box_width, box_height)
+        if entry is None:
+            entry = load_entry(image_path, box_width, box_height)
+            if entry is not None:
+                self.prefetcher.put(image_path, entry)
+        if entry is None:
+            self.image_labeler.showImage(image_path, None)
+        else:
+            self.image_labeler.showImage(image_path, (entry["image"], entry["image_size"], entry["scale_factor"]))
+            self.image_labeler.setLabels(entry["labels"])
+        self.prefetch_neighbors()
+
+    def prefetch_neighbors(self):
+        """
+        Lên lịch load trước K ảnh kế tiếp và K ảnh phía trước ảnh hiện tại (gần trước, xa sau).
+        """
+        order = [self.current_index + offset
+                 for step in range(1, self.prefetcher.depth + 1) for offset in (step, -step)]
+        paths = [os.path.join(self.current_folder, self.image_files[i])
+                 for i in order if 0 <= i < len(self.image_files)]
+        self.prefetcher.prefetch(paths, self.image_labeler.width(), self.image_labeler.height())
 
     def load_next_image(self):
         """
@@ -398,11 +431,11 @@ class LabelingTab(QWidget):
         if self.current_index < 0 or self.current_index >= len(self.image_files):
             return
         image_path = os.path.join(self.current_folder, self.image_files[self.current_index])
-        label_file = os.path.splitext(image_path)[0] + ".txt"
+        label_file = label_path(image_path)
         if self.image_labeler.image is None:
             return
-        img_width = self.image_labeler.image.width()
-        img_height = self.image_labeler.image.height()
+        img_width = self.image_labeler.image_size.width()
+        img_height = self.image_labeler.image_size.height()
         scale = self.image_labeler.scale_factor
         try:
             with open(label_file, "w") as f:
@@ -456,7 +489,8 @@ class LabelingTab(QWidget):
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Lỗi khi xóa ảnh: {e}")
                 return
-            label_file = os.path.splitext(image_path)[0] + ".txt"
+            self.prefetcher.discard(image_path)
+            label_file = label_path(image_path)
             if os.path.exists(label_file):
                 try:
                     os.remove(label_file)
@@ -0,0 +1,129 @@
+"""
+File: result_stream.py
+Mô tả:
+    Chứa lớp ResultStream: đọc kết quả tìm ảnh của DuckDuckGo theo từng trang trên
+    worker thread, chỉ tải thêm trang mới khi được yêu cầu (khi người dùng duyệt gần
+    hết các kết quả đã có).
+"""
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from image_search import iter_image_pages
+
+class _StreamSignals(QObject):
+    """
+    Tín hiệu gửi kết quả đọc trang từ worker thread về thread giao diện.
+    """
+    page = pyqtSignal(list)
+    done = pyqtSignal()
+    failed = pyqtSignal(str)
+
+class _NextPageTask(QRunnable):
+    """
+    Tác vụ lấy trang kết quả tiếp theo từ generator.
+    """
+    def __init__(self, pages, signals):
+        """
+        :param pages: Generator trả về từng trang kết quả.
+        :param signals: Đối tượng _StreamSignals để báo kết quả.
+        """
+        super().__init__()
+        self.pages = pages
+        self.signals = signals
+
+    def run(self):
+        """
+        Đọc một trang; báo done khi generator đã hết.
+        """
+        try:
+            self.signals.page.emit(next(self.pages))
+        except StopIteration:
+            self.signals.done.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+class ResultStream(QObject):
+    """
+    Luồng kết quả tìm ảnh được tải lười (lazy) theo trang.
+
+    Mỗi lần gọi request_more() sẽ tải tối đa một trang trên worker thread; khi có
+    trang mới phát tín hiệu page_ready(list các kết quả), khi hết kết quả phát finished(),
+    khi lỗi phát error(str).
+    """
+    page_ready = pyqtSignal(list)
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, keyword, page_size=100, max_results=1000, seen=None, parent=None):
+        """
+        :param keyword: Từ khóa tìm ảnh.
+        :param page_size: Số kết quả mỗi trang.
+        :param max_results: Số kết quả tối đa.
+        :param seen: Các URL ảnh đã có (khi tiếp tục một phiên).
+        """
+        super().__init__(parent)
+        self.pages = iter_image_pages(keyword, page_size=page_size, max_results=max_results, seen=seen)
+        self.busy = False
+        self.exhausted = False
+        self.cancelled = False
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _StreamSignals()
+        self.signals.page.connect(self._on_page)
+        self.signals.done.connect(self._on_done)
+        self.signals.failed.connect(self._on_failed)
+
+    def request_more(self):
+        """
+        Yêu cầu tải trang tiếp theo nếu chưa có trang nào đang tải và chưa hết kết quả.
+        """
+        if self.busy or self.exhausted or self.cancelled:
+            return
+        self.busy = True
+        self.pool.start(_NextPageTask(self.pages, self.signals))
+
+    def cancel(self):
+        """
+        Hủy luồng (khi người dùng fetch từ khóa khác). Đối tượng được giải phóng sau khi
+        trang đang tải (nếu có) kết thúc, để không phải chờ request trên thread giao diện.
+        """
+        self.cancelled = True
+        if not self.busy:
+            self.deleteLater()
+
+    def _finish_task(self):
+        """
+        Đánh dấu trang hiện tại đã tải xong.
+
+        :return: True nếu luồng đã bị hủy (kết quả cần bỏ qua).
+        """
+        self.busy = False
+        if self.cancelled:
+            self.deleteLater()
+            return True
+        return False
+
+    def _on_page(self, results):
+        """
+        Nhận một trang kết quả mới (chạy trên thread giao diện).
+        """
+        if self._finish_task():
+            return
+        self.page_ready.emit(results)
+
+    def _on_done(self):
+        """
+        Đánh dấu đã hết kết quả.
+        """
+        if self._finish_task():
+            return
+        self.exhausted = True
+        self.finished.emit()
+
+    def _on_failed(self, message):
+        """
+        Dừng luồng khi có lỗi và chuyển thông báo lỗi ra ngoài.
+        """
+        if self._finish_task():
+            return
+        self.exhausted = True
+        self.error.emit(message)
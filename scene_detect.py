@@ -0,0 +1,236 @@
+"""
+File: scene_detect.py
+Mô tả:
+    Phát hiện chuyển cảnh (shot boundary) trong video để chọn frame đại diện cho mỗi cảnh,
+    thay vì lấy mẫu đều (lấy mẫu đều cho ra nhiều frame gần giống nhau ở các cảnh tĩnh).
+
+    Mỗi frame lấy mẫu được thu nhỏ ngay sau khi decode (INTER_AREA về chiều rộng ~160 px),
+    đổi sang HSV và tính histogram màu bằng NumPy; khoảng cách giữa các histogram liên tiếp
+    được tính vector hóa cho cả video. Chỉ lấy mẫu vài frame mỗi giây (các frame ở giữa chỉ
+    được grab(), không chuyển màu), và video được chia thành nhiều đoạn phân tích song song
+    trong các worker process.
+
+    Chạy không cần giao diện:
+        python scene_detect.py video.mp4 --export --frames-per-shot 1
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+import numpy as np
+from utils import format_time
+from dedup_index import shared_index
+from frame_extractor import frame_output, extract_frames, summary_text
+
+HISTOGRAM_BINS = (8, 4, 4)  # số bin cho H, S, V
+
+def frame_signature(frame, width=160):
+    """
+    Histogram HSV đã chuẩn hóa của frame thu nhỏ.
+
+    :param frame: Frame BGR.
+    :param width: Chiều rộng sau khi thu nhỏ.
+    :return: Vector float32 có tổng bằng 1.
+    """
+    height = max(1, frame.shape[0] * width // frame.shape[1])
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV).reshape(-1, 3).astype(np.int32)
+    h_bins, s_bins, v_bins = HISTOGRAM_BINS
+    # H trong OpenCV nằm trong [0, 180), S và V trong [0, 256)
+    codes = ((hsv[:, 0] * h_bins // 180) * s_bins + hsv[:, 1] * s_bins // 256) * v_bins + hsv[:, 2] * v_bins // 256
+    histogram = np.bincount(codes, minlength=h_bins * s_bins * v_bins).astype(np.float32)
+    return histogram / histogram.sum()
+
+def analyze_segment(path, start, stop, step, width=160):
+    """
+    Tính histogram của các frame lấy mẫu trong đoạn [start, stop) (chạy trong worker process).
+
+    :param path: Đường dẫn file video.
+    :param start: Frame đầu đoạn.
+    :param stop: Frame cuối đoạn (không bao gồm).
+    :param step: Lấy mẫu mỗi step frame.
+    :param width: Chiều rộng thu nhỏ khi tính histogram.
+    :return: Tuple (mảng chỉ số frame, ma trận histogram [số mẫu, số bin]).
+    """
+    cap = cv2.VideoCapture(path)
+    indices = []
+    signatures = []
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for index in range(start, stop):
+            if not cap.grab():
+                break
+            if (index - start) % step:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            indices.append(index)
+            signatures.append(frame_signature(frame, width))
+    finally:
+        cap.release()
+    bins = int(np.prod(HISTOGRAM_BINS))
+    return np.array(indices, dtype=np.int64), np.array(signatures, dtype=np.float32).reshape(-1, bins)
+
+def find_boundaries(indices, signatures, threshold=0.35, ratio=3.0, min_distance=0.08,
+                    min_scene_frames=15, window=4):
+    """
+    Tìm các vị trí chuyển cảnh từ histogram của các frame lấy mẫu.
+
+    Khoảng cách giữa hai mẫu liên tiếp là một nửa tổng chênh lệch tuyệt đối của histogram
+    (trong [0, 1]). Một mẫu là chuyển cảnh nếu khoảng cách vượt threshold, hoặc vượt
+    min_distance và lớn hơn ratio lần trung vị khoảng cách của các mẫu lân cận (bắt được các
+    cảnh có bảng màu gần nhau mà không nhạy với chuyển động/máy quay lia liên tục).
+    Hai chuyển cảnh phải cách nhau ít nhất min_scene_frames frame.
+
+    :param indices: Mảng chỉ số frame của các mẫu (tăng dần).
+    :param signatures: Ma trận histogram tương ứng.
+    :param threshold: Ngưỡng khoảng cách tuyệt đối.
+    :param ratio: Tỉ lệ so với trung vị lân cận.
+    :param min_distance: Khoảng cách tối thiểu khi xét theo tỉ lệ.
+    :param min_scene_frames: Độ dài tối thiểu của một cảnh (frame).
+    :param window: Số mẫu lân cận mỗi bên khi tính trung vị.
+    :return: Tuple (list chỉ số frame bắt đầu cảnh mới, mảng khoảng cách của từng mẫu).
+    """
+    if len(indices) < 2:
+        return [], np.zeros(len(indices), dtype=np.float32)
+    distances = np.abs(signatures[1:] - signatures[:-1]).sum(axis=1) / 2
+    distances = np.concatenate(([0.0], distances)).astype(np.float32)
+    # Trung vị của các mẫu lân cận (không tính chính mẫu đó), tính vector hóa bằng cửa sổ trượt
+    padded = np.pad(distances, window, mode="edge")
+    neighbours = np.lib.stride_tricks.sliding_window_view(padded, 2 * window + 1)
+    neighbours = np.delete(neighbours, window, axis=1)
+    local = np.median(neighbours, axis=1)
+    candidates = (distances > threshold) | ((distances > min_distance) & (distances > ratio * local))
+    boundaries = []
+    last = indices[0]
+    for position in np.flatnonzero(candidates):
+        index = int(indices[position])
+        if index - last >= min_scene_frames:
+            boundaries.append(index)
+            last = index
+    return boundaries, distances
+
+def shots_from_boundaries(boundaries, total_frames):
+    """
+    :return: List tuple (frame đầu, frame cuối không bao gồm) của từng cảnh.
+    """
+    starts = [0] + list(boundaries)
+    ends = list(boundaries) + [total_frames]
+    return [(start, end) for start, end in zip(starts, ends) if end > start]
+
+def representative_frames(shots, per_shot=1):
+    """
+    Chọn frame đại diện cho mỗi cảnh: per_shot frame cách đều nhau (bỏ phần đầu và cuối cảnh,
+    nơi thường có hiệu ứng chuyển cảnh).
+
+    :param shots: List tuple (frame đầu, frame cuối không bao gồm).
+    :param per_shot: Số frame mỗi cảnh.
+    :return: List chỉ số frame tăng dần.
+    """
+    indices = set()
+    for start, end in shots:
+        length = end - start
+        for k in range(per_shot):
+            indices.add(start + length * (2 * k + 1) // (2 * per_shot))
+    return sorted(indices)
+
+def detect_scenes(path, threshold=0.35, samples_per_second=6, min_scene_seconds=0.5, width=160,
+                  workers=None, progress=None, cancel_event=None):
+    """
+    Phát hiện chuyển cảnh của cả video bằng nhiều worker process.
+
+    :param path: Đường dẫn file video.
+    :param threshold: Ngưỡng khoảng cách histogram.
+    :param samples_per_second: Số frame lấy mẫu mỗi giây video.
+    :param min_scene_seconds: Độ dài tối thiểu của một cảnh (giây).
+    :param width: Chiều rộng thu nhỏ khi tính histogram.
+    :param workers: Số worker process; mặc định bằng số CPU.
+    :param progress: Hàm progress(số frame đã phân tích, tổng).
+    :param cancel_event: threading.Event; khi được set, các đoạn chưa chạy bị hủy.
+    :return: Dict: boundaries, shots, total_frames, fps, cancelled.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Không mở được video: {path}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    workers = workers or os.cpu_count() or 1
+    step = max(1, round(fps / samples_per_second))
+    # Đoạn dài tối đa ~60 giây, ít nhất 2 đoạn cho mỗi worker; độ dài đoạn là bội số của step
+    chunk = max(step, min(int(fps * 60), -(-total_frames // (workers * 2))))
+    chunk = -(-chunk // step) * step
+    ranges = [(start, min(start + chunk, total_frames)) for start in range(0, total_frames, chunk)]
+    parts = {}
+    done = 0
+    cancelled = False
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(analyze_segment, path, start, stop, step, width): (start, stop)
+                   for start, stop in ranges}
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            start, stop = futures[future]
+            try:
+                parts[start] = future.result()
+            except Exception as e:
+                print(f"Lỗi phân tích đoạn video: {e}")
+            done += stop - start
+            if progress is not None:
+                progress(done, total_frames)
+            if cancel_event is not None and cancel_event.is_set() and not cancelled:
+                cancelled = True
+                for other in futures:
+                    other.cancel()
+    boundaries = []
+    if parts and not cancelled:
+        indices = np.concatenate([parts[start][0] for start in sorted(parts)])
+        signatures = np.concatenate([parts[start][1] for start in sorted(parts)])
+        boundaries, _ = find_boundaries(indices, signatures, threshold,
+                                        min_scene_frames=max(1, int(min_scene_seconds * fps)))
+    return {
+        "boundaries": boundaries,
+        "shots": shots_from_boundaries(boundaries, total_frames) if not cancelled else [],
+        "total_frames": total_frames,
+        "fps": fps,
+        "cancelled": cancelled,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Phát hiện chuyển cảnh và xuất frame đại diện cho mỗi cảnh.")
+    parser.add_argument("video", help="Đường dẫn file video")
+    parser.add_argument("--threshold", type=float, default=0.35, help="Ngưỡng khoảng cách histogram (0-1)")
+    parser.add_argument("--samples-per-second", type=float, default=6, help="Số frame lấy mẫu mỗi giây")
+    parser.add_argument("--min-scene", type=float, default=0.5, help="Độ dài tối thiểu của một cảnh (giây)")
+    parser.add_argument("--workers", type=int, default=None, help="Số worker process (mặc định: số CPU)")
+    parser.add_argument("--export", action="store_true", help="Lưu frame đại diện vào dataset/<tên_video>/")
+    parser.add_argument("--frames-per-shot", type=int, default=1, help="Số frame đại diện mỗi cảnh")
+    parser.add_argument("--root", default="dataset", help="Thư mục gốc của dataset")
+    args = parser.parse_args()
+
+    begin = time.perf_counter()
+    result = detect_scenes(args.video, args.threshold, args.samples_per_second, args.min_scene,
+                           workers=args.workers)
+    elapsed = time.perf_counter() - begin
+    fps = result["fps"]
+    duration = result["total_frames"] / fps
+    print(f"{len(result['shots'])} cảnh, phân tích {format_time(duration)} video trong {elapsed:.1f}s "
+          f"({duration / elapsed:.1f}x thời gian thực)")
+    for start, end in result["shots"]:
+        print(f"  {format_time(start / fps)} - {format_time(end / fps)} (frame {start}-{end - 1})")
+    if args.export:
+        out_dir, short_base = frame_output(os.path.splitext(os.path.basename(args.video))[0], args.root)
+        indices = representative_frames(result["shots"], args.frames_per_shot)
+        dedup_index = shared_index(args.root)
+        stats = extract_frames(args.video, indices, out_dir, short_base, args.workers,
+                               hash_method=dedup_index.method)
+        for _, filename, value in stats["saved"]:
+            dedup_index.add(filename, value)
+        print(summary_text(stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+File: scrape_session.py
+Mô tả:
+    Lưu các phiên scraping (từ khóa, kết quả tìm kiếm, vị trí đang duyệt và trạng thái của
+    từng URL) vào một file SQLite gọn trong thư mục dataset, để có thể tiếp tục ngay sau khi
+    khởi động lại ứng dụng mà không phải truy vấn hoặc tải lại, và để chế độ bulk tiếp tục
+    sau khi bị dừng giữa chừng.
+
+    Trạng thái được lưu theo URL (không theo vị trí), nên khi truy vấn lại cùng từ khóa,
+    các ảnh đã tải vẫn được nhận ra.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DOWNLOADED = "downloaded"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    class_name TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    exhausted INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL,
+    UNIQUE (class_name, keyword)
+);
+CREATE TABLE IF NOT EXISTS results (
+    session_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    image TEXT NOT NULL,
+    thumbnail TEXT,
+    title TEXT,
+    width INTEGER,
+    height INTEGER,
+    PRIMARY KEY (session_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS url_status (
+    session_id INTEGER NOT NULL,
+    image TEXT NOT NULL,
+    status TEXT NOT NULL,
+    content_hash TEXT,
+    PRIMARY KEY (session_id, image)
+) WITHOUT ROWID;
+"""
+
+def content_hash(data):
+    """
+    Hash nội dung (SHA-1) của dữ liệu ảnh đã tải.
+
+    :param data: Dữ liệu bytes.
+    :return: Chuỗi hex.
+    """
+    return hashlib.sha1(data).hexdigest()
+
+def session_status(store_status):
+    """
+    Chuyển trạng thái trả về từ image_search.store_image sang trạng thái lưu trong phiên.
+
+    :param store_status: 'saved', 'duplicate', 'rejected' hoặc 'failed'.
+    :return: DOWNLOADED, SKIPPED hoặc FAILED.
+    """
+    if store_status == "saved":
+        return DOWNLOADED
+    if store_status == "duplicate":
+        return SKIPPED
+    return FAILED
+
+class SessionStore:
+    """
+    Kho lưu các phiên scraping trên SQLite, an toàn khi dùng từ nhiều thread.
+    """
+    def __init__(self, path=os.path.join("dataset", ".scrape_sessions.db")):
+        """
+        :param path: Đường dẫn file SQLite (thư mục cha được tạo nếu chưa có).
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def open_session(self, class_name, keyword):
+        """
+        Lấy phiên của cặp (class, từ khóa), tạo mới nếu chưa có.
+
+        :return: ID phiên.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO sessions (class_name, keyword, updated) VALUES (?, ?, ?)",
+                              (class_name, keyword, time.time()))
+            row = self.conn.execute("SELECT id FROM sessions WHERE class_name = ? AND keyword = ?",
+                                    (class_name, keyword)).fetchone()
+        return row[0]
+
+    def list_sessions(self):
+        """
+        Danh sách các phiên, mới cập nhật nhất trước.
+
+        :return: List tuple (id, class, từ khóa, cursor, số kết quả, số ảnh đã tải).
+        """
+        with self.lock:
+            return self.conn.execute("""
+                SELECT s.id, s.class_name, s.keyword, s.cursor,
+                       (SELECT COUNT(*) FROM results r WHERE r.session_id = s.id),
+                       (SELECT COUNT(*) FROM url_status u WHERE u.session_id = s.id AND u.status = ?)
+                FROM sessions s ORDER BY s.updated DESC""", (DOWNLOADED,)).fetchall()
+
+    def session_info(self, session_id):
+        """
+        :return: Tuple (class, từ khóa, cursor, exhausted) của phiên, hoặc None nếu không có.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT class_name, keyword, cursor, exhausted FROM sessions WHERE id = ?",
+                                    (session_id,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2], bool(row[3])
+
+    def reset_results(self, session_id):
+        """
+        Xóa danh sách kết quả của phiên (khi truy vấn lại); trạng thái theo URL được giữ lại.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM results WHERE session_id = ?", (session_id,))
+            self.conn.execute("UPDATE sessions SET cursor = 0, exhausted = 0, updated = ? WHERE id = ?",
+                              (time.time(), session_id))
+
+    def add_results(self, session_id, start, results):
+        """
+        Thêm một trang kết quả tìm kiếm vào phiên.
+
+        :param session_id: ID phiên.
+        :param start: Vị trí của kết quả đầu tiên trong trang.
+        :param results: List dict kết quả của DDGS.
+        """
+        rows = [(session_id, start + i, item['image'], item.get('thumbnail'), item.get('title'),
+                 item.get('width'), item.get('height')) for i, item in enumerate(results)]
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def load_results(self, session_id):
+        """
+        :return: List dict kết quả của phiên theo đúng thứ tự.
+        """
+        with self.lock:
+            rows = self.conn.execute("""SELECT image, thumbnail, title, width, height FROM results
+                                        WHERE session_id = ? ORDER BY position""", (session_id,)).fetchall()
+        return [{'image': image, 'thumbnail': thumbnail, 'title': title, 'width': width, 'height': height}
+                for image, thumbnail, title, width, height in rows]
+
+    def set_cursor(self, session_id, cursor):
+        """
+        Lưu vị trí ảnh đang duyệt.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE sessions SET cursor = ?, updated = ? WHERE id = ?",
+                              (cursor, time.time(), session_id))
+
+    def set_exhausted(self, session_id, exhausted=True):
+        """
+        Đánh dấu đã đọc hết kết quả tìm kiếm của phiên.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE sessions SET exhausted = ? WHERE id = ?", (int(exhausted), session_id))
+
+    def mark(self, session_id, url, status, data_hash=None):
+        """
+        Ghi trạng thái của một URL trong phiên.
+
+        :param session_id: ID phiên.
+        :param url: URL ảnh.
+        :param status: DOWNLOADED, SKIPPED hoặc FAILED.
+        :param data_hash: Hash nội dung (content_hash) nếu đã tải được dữ liệu.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO url_status VALUES (?, ?, ?, ?)",
+                              (session_id, url, status, data_hash))
+
+    def statuses(self, session_id):
+        """
+        :return: Dict URL -> trạng thái của phiên.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT image, status FROM url_status WHERE session_id = ?",
+                                     (session_id,)).fetchall()
+        return dict(rows)
+
+    def close(self):
+        """
+        Đóng kết nối SQLite.
+        """
+        with self.lock:
+            self.conn.close()
@@ -6,34 +6,77 @@ Mô tả:
 """
 
 import os
-import requests
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
-from duckduckgo_search import DDGS
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox,
+                             QSpinBox, QCheckBox, QStackedWidget, QComboBox)
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt, QCoreApplication
+from byte_cache import ByteCache
+from dedup_index import shared_index
+from index_warmup import warm_up_index
+from image_normalize import ImageNormalizer
+from image_prefetch import ImagePrefetcher
+from image_search import store_image
+from result_stream import ResultStream
+from scrape_session import SessionStore, content_hash, session_status, DOWNLOADED, SKIPPED, FAILED
+from thumbnail_grid import ThumbnailModel, ThumbnailGrid, SelectionDownloader
 
 class ScrapingTab(QWidget):
     """
     Widget để tìm kiếm và tải hình ảnh.
     Cho phép người dùng nhập tên class và từ khóa, sau đó fetch ảnh từ internet và hiển thị ảnh mẫu.
-    Người dùng có thể tải ảnh về hoặc bỏ qua ảnh hiện tại.
+    Người dùng có thể tải ảnh về hoặc bỏ qua ảnh hiện tại, hoặc chuyển sang chế độ lưới
+    thumbnail để chọn nhiều ảnh và tải ảnh gốc của chúng cùng lúc.
+    Mỗi cặp (class, từ khóa) là một phiên được lưu trên đĩa (SessionStore) và có thể tiếp tục sau.
     """
     def __init__(self, parent=None):
         """
         Khởi tạo widget ScrapingTab.
         """
         super().__init__(parent)
+        self.results = []
         self.image_urls = []
         self.current_index = 0
+        # Kết quả tìm kiếm được tải lười theo trang; tải thêm khi còn ít hơn stream_lookahead ảnh chưa xem
+        self.result_stream = None
+        self.stream_lookahead = 20
+        self.waiting_for_results = False
+        # Dữ liệu ảnh đã tải được dùng chung giữa bước xem trước và bước lưu ảnh
+        self.byte_cache = ByteCache()
+        # Tải trước các ảnh kế tiếp trên worker thread để Skip/Download không bị đứng giao diện
+        self.prefetcher = ImagePrefetcher(depth=5, byte_cache=self.byte_cache)
+        self.prefetcher.image_ready.connect(self.on_image_ready)
+        # Chỉ mục perceptual hash của dataset để bỏ qua ảnh gần trùng
+        self.dedup_index = shared_index("dataset")
+        warm_up_index(self.dedup_index)
+        # Kiểm tra và chuẩn hóa ảnh (JPEG thật, giới hạn kích thước) trong process pool trước khi lưu
+        self.normalizer = ImageNormalizer(quality=90, max_side=1600)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+        self.destroyed.connect(self.normalizer.shutdown)
+        # Lưới thumbnail: chỉ tải thumbnail của các ô đang hiển thị, ảnh gốc chỉ tải cho ảnh được chọn
+        self.thumbnail_model = ThumbnailModel()
+        self.thumbnail_model.can_fetch_more = self.can_fetch_more_results
+        self.thumbnail_model.fetch_more = self.fetch_more_results
+        self.selection_downloader = SelectionDownloader(self.byte_cache, self.normalizer)
+        self.selection_downloader.progress.connect(self.on_selection_progress)
+        self.selection_downloader.finished.connect(self.on_selection_finished)
+        self.selection_downloader.item_finished.connect(self.on_selection_item)
+        # Phiên scraping được lưu trên đĩa: kết quả, vị trí đang duyệt và trạng thái từng URL
+        self.session_store = SessionStore(os.path.join("dataset", ".scrape_sessions.db"))
+        self.session_id = None
+        self.url_status = {}
         self.initUI()
 
     def initUI(self):
         """
         Thiết lập giao diện cho tab scraping:
           - Các ô nhập tên class và từ khóa.
-          - Nút fetch ảnh.
-          - Label hiển thị ảnh mẫu.
-          - Các nút download và skip ảnh.
+          - Danh sách phiên đã lưu và nút tiếp tục phiên.
+          - Nút fetch ảnh và ô chọn số ảnh tải trước.
+          - Label hiển thị ảnh mẫu hoặc lưới thumbnail (chuyển bằng nút Grid View).
+          - Các nút download, skip ảnh, download các ảnh đã chọn và tùy chọn bỏ qua ảnh gần trùng.
+          - Nhãn thống kê cache dữ liệu ảnh và bước chuẩn hóa.
         """
         layout = QVBoxLayout()
 
@@ -49,17 +92,47 @@ class ScrapingTab(QWidget):
         input_layout.addWidget(self.keyword_input)
         layout.addLayout(input_layout)
 
-        # Nút fetch ảnh
+        # Các phiên scraping đã lưu
+        session_layout = QHBoxLayout()
+        session_layout.addWidget(QLabel("Session:"))
+        self.session_combo = QComboBox()
+        session_layout.addWidget(self.session_combo, 1)
+        self.resume_button = QPushButton("Resume Session")
+        self.resume_button.clicked.connect(self.resume_session)
+        session_layout.addWidget(self.resume_button)
+        layout.addLayout(session_layout)
+        self.load_sessions()
+
+        # Nút fetch ảnh và số ảnh tải trước
+        fetch_layout = QHBoxLayout()
         self.fetch_button = QPushButton("Fetch Images")
         self.fetch_button.clicked.connect(self.fetch_images)
-        layout.addWidget(self.fetch_button)
+        fetch_layout.addWidget(self.fetch_button)
+        fetch_layout.addWidget(QLabel("Prefetch:"))
+        self.prefetch_spin = QSpinBox()
+        self.prefetch_spin.setRange(0, 50)
+        self.prefetch_spin.setValue(self.prefetcher.depth)
+        self.prefetch_spin.setToolTip("Số ảnh được tải trước phía sau ảnh hiện tại")
+        self.prefetch_spin.valueChanged.connect(self.set_prefetch_depth)
+        fetch_layout.addWidget(self.prefetch_spin)
+        self.grid_button = QPushButton("Grid View")
+        self.grid_button.setCheckable(True)
+        self.grid_button.toggled.connect(self.set_grid_mode)
+        fetch_layout.addWidget(self.grid_button)
+        layout.addLayout(fetch_layout)
 
-        # Label hiển thị ảnh mẫu
+        # Label hiển thị ảnh mẫu và lưới thumbnail
+        self.view_stack = QStackedWidget()
+        self.view_stack.setFixedSize(600, 400)
         self.image_label = QLabel("Ảnh sẽ hiển thị tại đây")
         self.image_label.setFixedSize(600, 400)
         self.image_label.setStyleSheet("border: 1px solid black;")
         self.image_label.setAlignment(Qt.AlignCenter)
-        layout.addWidget(self.image_label)
+        self.view_stack.addWidget(self.image_label)
+        self.thumbnail_grid = ThumbnailGrid(self.thumbnail_model)
+        self.thumbnail_grid.doubleClicked.connect(self.open_from_grid)
+        self.view_stack.addWidget(self.thumbnail_grid)
+        layout.addWidget(self.view_stack)
 
         # Các nút download và skip ảnh
         btn_layout = QHBoxLayout()
@@ -69,101 +142,383 @@ class ScrapingTab(QWidget):
         self.skip_button.clicked.connect(self.skip_image)
         btn_layout.addWidget(self.download_button)
         btn_layout.addWidget(self.skip_button)
+        self.download_selected_button = QPushButton("Download Selected")
+        self.download_selected_button.setEnabled(False)
+        self.download_selected_button.clicked.connect(self.download_selected)
+        btn_layout.addWidget(self.download_selected_button)
+        self.skip_duplicates_check = QCheckBox("Bỏ qua ảnh gần trùng")
+        self.skip_duplicates_check.setChecked(True)
+        btn_layout.addWidget(self.skip_duplicates_check)
         layout.addLayout(btn_layout)
 
+        # Thống kê cache dữ liệu ảnh và bước chuẩn hóa
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+        self.update_stats_label()
+
         self.setLayout(layout)
 
     def fetch_images(self):
         """
         Lấy danh sách URL hình ảnh dựa trên từ khóa và tên class nhập vào.
         
-        Sử dụng API của DuckDuckGo để lấy kết quả, sau đó lưu URL ảnh và hiển thị ảnh đầu tiên.
-        Nếu không nhập đủ thông tin hoặc có lỗi xảy ra, hiển thị thông báo cho người dùng.
+        Kết quả của DuckDuckGo được đọc lười theo từng trang trên worker thread (ResultStream):
+        ảnh đầu tiên hiển thị ngay khi có trang đầu, các trang sau chỉ được tải khi người dùng
+        duyệt gần hết các kết quả đã có.
+        Nếu không nhập đủ thông tin, hiển thị thông báo cho người dùng.
         """
         self.class_name = self.class_input.text().strip()
         self.keyword = self.keyword_input.text().strip()
         if not self.class_name or not self.keyword:
             QMessageBox.warning(self, "Warning", "Vui lòng nhập đầy đủ tên class và từ khóa!")
             return
-        try:
-            with DDGS() as ddgs:
-                results = ddgs.images(self.keyword, max_results=1000)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Lỗi khi fetch ảnh: {e}")
+        self.session_id = self.session_store.open_session(self.class_name, self.keyword)
+        self.session_store.reset_results(self.session_id)
+        self.url_status = self.session_store.statuses(self.session_id)
+        self.load_sessions()
+        self.start_stream()
+        self.results = []
+        self.image_urls = []
+        self.current_index = 0
+        self.prefetcher.reset()
+        self.thumbnail_model.set_results([])
+        self.show_current_image()
+
+    def start_stream(self, seen=None):
+        """
+        Tạo ResultStream mới cho từ khóa hiện tại (hủy luồng cũ nếu có).
+
+        :param seen: Các URL ảnh đã có khi tiếp tục một phiên.
+        """
+        if self.result_stream is not None:
+            self.result_stream.cancel()
+        self.result_stream = ResultStream(self.keyword, page_size=100, max_results=1000, seen=seen, parent=self)
+        self.result_stream.page_ready.connect(self.on_results_page)
+        self.result_stream.finished.connect(self.on_results_finished)
+        self.result_stream.error.connect(self.on_results_error)
+
+    def load_sessions(self):
+        """
+        Cập nhật danh sách các phiên đã lưu vào combobox.
+        """
+        self.session_combo.clear()
+        for session_id, class_name, keyword, cursor, count, downloaded in self.session_store.list_sessions():
+            self.session_combo.addItem(f"{class_name} | {keyword} - ảnh {cursor}/{count}, đã tải {downloaded}",
+                                       session_id)
+
+    def resume_session(self):
+        """
+        Tiếp tục phiên được chọn: khôi phục kết quả, vị trí đang duyệt và trạng thái từng URL
+        từ đĩa mà không truy vấn lại. Trang kết quả tiếp theo chỉ được tải khi cần.
+        """
+        session_id = self.session_combo.currentData()
+        info = self.session_store.session_info(session_id) if session_id is not None else None
+        if info is None:
+            QMessageBox.information(self, "Info", "Chưa có phiên nào được lưu.")
             return
-        if not results:
+        self.class_name, self.keyword, cursor, exhausted = info
+        self.class_input.setText(self.class_name)
+        self.keyword_input.setText(self.keyword)
+        self.session_id = session_id
+        self.results = self.session_store.load_results(session_id)
+        self.image_urls = [item['image'] for item in self.results]
+        self.url_status = self.session_store.statuses(session_id)
+        if exhausted:
+            if self.result_stream is not None:
+                self.result_stream.cancel()
+            self.result_stream = None
+        else:
+            self.start_stream(seen=self.image_urls)
+        self.current_index = min(cursor, len(self.image_urls))
+        self.prefetcher.reset()
+        self.thumbnail_model.set_results(self.results)
+        self.show_current_image()
+
+    def record_status(self, url, status, data_hash=None):
+        """
+        Ghi trạng thái của một URL vào phiên hiện tại.
+
+        :param url: URL ảnh.
+        :param status: DOWNLOADED, SKIPPED hoặc FAILED.
+        :param data_hash: Hash nội dung của dữ liệu đã tải (nếu có).
+        """
+        if self.session_id is None:
+            return
+        self.url_status[url] = status
+        self.session_store.mark(self.session_id, url, status, data_hash)
+
+    def on_results_page(self, results):
+        """
+        Thêm một trang kết quả mới vào danh sách và hiển thị ảnh nếu đang chờ kết quả.
+
+        :param results: Danh sách kết quả (dict) của trang mới.
+        """
+        if self.session_id is not None:
+            self.session_store.add_results(self.session_id, len(self.results), results)
+        self.results.extend(results)
+        self.image_urls.extend(item['image'] for item in results)
+        self.thumbnail_model.append_results(results)
+        if self.waiting_for_results:
+            self.show_current_image()
+        else:
+            self.prefetcher.prefetch(self.image_urls, self.current_index)
+
+    def on_results_finished(self):
+        """
+        Được gọi khi đã đọc hết kết quả tìm kiếm.
+        """
+        if self.session_id is not None:
+            self.session_store.set_exhausted(self.session_id)
+        if not self.image_urls:
+            self.waiting_for_results = False
+            self.image_label.setText("Ảnh sẽ hiển thị tại đây")
             QMessageBox.information(self, "Info", "Không tìm thấy ảnh nào.")
+        elif self.waiting_for_results:
+            self.show_current_image()
+
+    def on_results_error(self, message):
+        """
+        Được gọi khi việc đọc kết quả tìm kiếm bị lỗi.
+
+        :param message: Thông báo lỗi.
+        """
+        if not self.image_urls:
+            self.waiting_for_results = False
+            self.image_label.setText("Ảnh sẽ hiển thị tại đây")
+            QMessageBox.critical(self, "Error", f"Lỗi khi fetch ảnh: {message}")
             return
+        print(f"Lỗi khi tải thêm kết quả: {message}")
+        if self.waiting_for_results:
+            self.show_current_image()
 
-        self.image_urls = [item['image'] for item in results]
-        self.current_index = 0
-        self.show_current_image()
+    def can_fetch_more_results(self):
+        """
+        Lưới thumbnail gọi hàm này khi cuộn tới cuối để biết còn trang kết quả hay không.
+        """
+        stream = self.result_stream
+        return stream is not None and not stream.exhausted and not stream.busy
+
+    def fetch_more_results(self):
+        """
+        Yêu cầu tải thêm một trang kết quả (khi lưới thumbnail cuộn tới cuối).
+        """
+        if self.result_stream is not None:
+            self.result_stream.request_more()
+
+    def set_grid_mode(self, enabled):
+        """
+        Chuyển giữa chế độ xem từng ảnh và chế độ lưới thumbnail.
+
+        :param enabled: True để hiển thị lưới thumbnail.
+        """
+        self.view_stack.setCurrentWidget(self.thumbnail_grid if enabled else self.image_label)
+        self.download_selected_button.setEnabled(enabled)
+        self.download_button.setEnabled(not enabled)
+        self.skip_button.setEnabled(not enabled)
+        if not enabled:
+            self.show_current_image()
+
+    def open_from_grid(self, index):
+        """
+        Mở ảnh được double-click trong lưới ở chế độ xem từng ảnh.
+
+        :param index: QModelIndex của ô được chọn.
+        """
+        self.current_index = index.row()
+        self.grid_button.setChecked(False)
+
+    def download_selected(self):
+        """
+        Tải ảnh gốc của các ảnh được chọn trong lưới thumbnail và lưu vào dataset.
+
+        Các ảnh được tải song song trên worker thread; tiến độ hiển thị trên nhãn thống kê.
+        """
+        class_name = self.class_input.text().strip()
+        if not class_name:
+            QMessageBox.warning(self, "Warning", "Vui lòng nhập tên class!")
+            return
+        if self.selection_downloader.is_busy():
+            QMessageBox.information(self, "Info", "Đang tải các ảnh đã chọn, vui lòng chờ.")
+            return
+        rows = self.thumbnail_grid.selected_rows()
+        if not rows:
+            QMessageBox.information(self, "Info", "Chưa chọn ảnh nào.")
+            return
+        # Bỏ qua các ảnh đã tải trong phiên
+        items = [(row, self.image_urls[row]) for row in rows if self.url_status.get(self.image_urls[row]) != DOWNLOADED]
+        if not items:
+            QMessageBox.information(self, "Info", "Các ảnh đã chọn đều đã được tải.")
+            return
+        dedup_index = self.dedup_index if self.skip_duplicates_check.isChecked() else None
+        self.selection_downloader.start(items, class_name, dedup_index)
+
+    def on_selection_item(self, url, status, data_hash):
+        """
+        Ghi trạng thái của một ảnh vừa được tải từ lưới vào phiên.
+        """
+        self.record_status(url, session_status(status), data_hash or None)
+
+    def on_selection_progress(self, done, total):
+        """
+        Cập nhật tiến độ tải các ảnh đã chọn.
+        """
+        self.cache_label.setText(f"Đang tải ảnh đã chọn: {done}/{total}")
+
+    def on_selection_finished(self, counts):
+        """
+        Hiển thị kết quả sau khi tải xong các ảnh đã chọn.
+
+        :param counts: Dict đếm số ảnh theo trạng thái.
+        """
+        self.update_stats_label()
+        self.load_sessions()
+        self.thumbnail_grid.clearSelection()
+        QMessageBox.information(self, "Info",
+                                f"Đã lưu {counts.get('saved', 0)} ảnh, "
+                                f"{counts.get('duplicate', 0)} ảnh gần trùng, "
+                                f"{counts.get('rejected', 0)} ảnh không hợp lệ, "
+                                f"{counts.get('failed', 0)} ảnh lỗi.")
+
+    def set_prefetch_depth(self, value):
+        """
+        Thay đổi số ảnh được tải trước và lên lịch tải lại theo cửa sổ mới.
+
+        :param value: Số ảnh tải trước.
+        """
+        self.prefetcher.set_depth(value)
+        if self.current_index < len(self.image_urls):
+            self.prefetcher.prefetch(self.image_urls, self.current_index)
 
     def show_current_image(self):
         """
         Hiển thị ảnh hiện tại từ danh sách URL.
         
-        Nếu đã duyệt hết ảnh hoặc không thể load ảnh được, hiển thị thông báo tương ứng.
+        Ảnh được lấy từ cache của prefetcher; nếu chưa sẵn sàng, hiển thị trạng thái
+        đang tải và ảnh sẽ được vẽ khi worker báo xong (on_image_ready).
+        Khi gần hết các kết quả đã có, yêu cầu ResultStream tải thêm trang tiếp theo.
+        Nếu đã duyệt hết ảnh, hiển thị thông báo tương ứng.
         """
+        stream = self.result_stream
         if self.current_index >= len(self.image_urls):
+            if stream is not None and not stream.exhausted:
+                self.waiting_for_results = True
+                self.image_label.setText("Đang tải kết quả...")
+                stream.request_more()
+                return
+            self.waiting_for_results = False
             QMessageBox.information(self, "Info", "Đã duyệt hết ảnh!")
             self.image_label.setText("Hết ảnh!")
             return
-        url = self.image_urls[self.current_index]
-        try:
-            response = requests.get(url, timeout=10)
-            image_data = response.content
-            image = QImage()
-            if not image.loadFromData(image_data):
-                self.image_label.setText("Lỗi: không load được dữ liệu ảnh!")
-                return
-            pixmap = QPixmap.fromImage(image)
-            if pixmap.isNull():
-                self.image_label.setText("Lỗi: QPixmap là null!")
-                return
-            scaled_pixmap = pixmap.scaled(self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.image_label.setPixmap(scaled_pixmap)
-        except Exception as e:
-            print(f"Lỗi load ảnh: {e}")
-            self.image_label.setText("Lỗi load ảnh!")
+        self.waiting_for_results = False
+        if self.session_id is not None:
+            self.session_store.set_cursor(self.session_id, self.current_index)
+        if stream is not None and len(self.image_urls) - self.current_index <= self.stream_lookahead:
+            stream.request_more()
+        self.prefetcher.prefetch(self.image_urls, self.current_index)
+        entry = self.prefetcher.get(self.image_urls[self.current_index])
+        if entry is None:
+            self.image_label.setText("Đang tải ảnh...")
+            return
+        self.display_image(*entry)
+
+    def on_image_ready(self, url):
+        """
+        Được gọi khi prefetcher decode xong một ảnh; nếu đó là ảnh hiện tại thì hiển thị.
+
+        :param url: URL ảnh vừa sẵn sàng.
+        """
+        if self.current_index < len(self.image_urls) and self.image_urls[self.current_index] == url:
+            self.display_image(*self.prefetcher.get(url))
+
+    def display_image(self, image, error):
+        """
+        Hiển thị một QImage đã decode lên label.
+
+        :param image: Ảnh đã decode (QImage).
+        :param error: Thông báo lỗi nếu không load được ảnh, ngược lại là chuỗi rỗng.
+        """
+        self.update_stats_label()
+        if error:
+            self.image_label.setText(error)
+            return
+        pixmap = QPixmap.fromImage(image)
+        if pixmap.isNull():
+            self.image_label.setText("Lỗi: QPixmap là null!")
+            return
+        scaled_pixmap = pixmap.scaled(self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.image_label.setPixmap(scaled_pixmap)
 
     def download_image(self):
         """
         Tải hình ảnh hiện tại về và lưu vào thư mục dataset theo tên class.
         
+        Dữ liệu được lấy từ ByteCache (đã tải khi xem trước) nên thường chỉ là một lần ghi đĩa.
+        Trước khi lưu, ảnh được kiểm tra và encode lại thành JPEG (ImageNormalizer); ảnh hỏng
+        hoặc quá nhỏ bị loại.
+        Nếu bật tùy chọn bỏ qua ảnh gần trùng và ảnh đã có trong dataset (theo perceptual hash),
+        ảnh sẽ không được lưu.
         Nếu file đã tồn tại, sẽ tự động thêm số thứ tự để tránh ghi đè.
-        Sau khi tải xong, chuyển sang ảnh tiếp theo.
+        Ảnh đã được tải trong phiên (kể cả trước khi khởi động lại) không được lưu lần nữa.
+        Trạng thái của ảnh được ghi vào phiên; sau khi tải xong, chuyển sang ảnh tiếp theo.
         """
         if self.current_index >= len(self.image_urls):
             return
         url = self.image_urls[self.current_index]
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                folder = os.path.join("dataset", self.class_input.text().strip())
-                if not os.path.exists(folder):
-                    os.makedirs(folder)
-                # Xây dựng tên file cơ bản
-                base_name = f"{self.class_input.text().strip()}_{self.current_index}"
-                filename = os.path.join(folder, f"{base_name}.jpg")
-                # Nếu file đã tồn tại, thêm đuôi số (_2, _3, ...)
-                counter = 2
-                while os.path.exists(filename):
-                    filename = os.path.join(folder, f"{base_name}_{counter}.jpg")
-                    counter += 1
-                with open(filename, "wb") as f:
-                    f.write(response.content)
-                QMessageBox.information(self, "Info", f"Ảnh đã lưu: {filename}")
-            else:
-                QMessageBox.warning(self, "Warning", "Download ảnh thất bại!")
-        except Exception as e:
-            QMessageBox.warning(self, "Warning", f"Lỗi download ảnh: {e}")
+        if self.url_status.get(url) == DOWNLOADED:
+            QMessageBox.information(self, "Info", "Ảnh này đã được tải trong phiên này, bỏ qua.")
+            data = None
+        else:
+            try:
+                data = self.byte_cache.fetch(url, timeout=10)
+            except Exception as e:
+                QMessageBox.warning(self, "Warning", f"Download ảnh thất bại: {e}")
+                self.record_status(url, FAILED)
+                data = None
+        if data is not None:
+            dedup_index = self.dedup_index if self.skip_duplicates_check.isChecked() else None
+            try:
+                # Tên file cơ bản: <class>_<index>; nếu file đã tồn tại, thêm đuôi số (_2, _3, ...)
+                status, detail, result = store_image(data, self.class_input.text().strip(), self.current_index,
+                                                     normalizer=self.normalizer, dedup_index=dedup_index,
+                                                     wait_for_index=False)
+                self.record_status(url, session_status(status), content_hash(data))
+                if status == "saved":
+                    note = ""
+                    if dedup_index is not None and not dedup_index.is_ready():
+                        note = "\nChỉ mục ảnh trùng đang được tạo, chưa kiểm tra trùng."
+                    QMessageBox.information(self, "Info", f"Ảnh đã lưu: {detail} "
+                                            f"({result.width}x{result.height}, CPU {result.cpu_time * 1000:.1f} ms)"
+                                            + note)
+                elif status == "duplicate":
+                    QMessageBox.information(self, "Info", f"Ảnh gần trùng với ảnh đã có, bỏ qua: {detail}")
+                else:
+                    QMessageBox.warning(self, "Warning", f"Ảnh không hợp lệ, bỏ qua: {detail}")
+            except Exception as e:
+                QMessageBox.warning(self, "Warning", f"Lỗi download ảnh: {e}")
+                self.record_status(url, FAILED)
+        self.update_stats_label()
         self.current_index += 1
         self.show_current_image()
 
+    def update_stats_label(self):
+        """
+        Cập nhật nhãn thống kê cache dữ liệu ảnh và bước chuẩn hóa.
+        """
+        self.cache_label.setText(f"{self.byte_cache.stats_text()} | {self.normalizer.stats_text()}")
+
     def skip_image(self):
         """
-        Bỏ qua ảnh hiện tại và chuyển sang ảnh tiếp theo.
+        Bỏ qua ảnh hiện tại (ghi trạng thái vào phiên) và chuyển sang ảnh tiếp theo.
         """
+        if self.current_index < len(self.image_urls):
+            url = self.image_urls[self.current_index]
+            if self.url_status.get(url) != DOWNLOADED:
+                self.record_status(url, SKIPPED)
         self.current_index += 1
         self.show_current_image()
+
+    def shutdown(self):
+        """
+        Dừng process pool chuẩn hóa ảnh khi ứng dụng thoát (bỏ các ảnh còn chờ).
+        """
+        self.normalizer.shutdown(cancel_pending=True)
@@ -0,0 +1,211 @@
+"""
+File: scrub_preview.py
+Mô tả:
+    Chứa lớp ScrubPreviewer: ảnh xem trước khi kéo slider của tab video.
+
+    Vị trí đang kéo được làm tròn về lưới điểm neo (mặc định mỗi giây; khi đã biết keyframe,
+    mỗi điểm neo được dời về keyframe gần nhất để chỉ phải decode một frame) và ảnh thu nhỏ của
+    điểm neo được decode trên một worker thread với bộ decode riêng. Chỉ có tối đa một
+    tác vụ decode tại một thời điểm và chỉ vị trí kéo mới nhất được giữ lại, nên các sự kiện
+    slider ở giữa được gộp lại và độ trễ không phụ thuộc độ dài video. Ảnh thu nhỏ đã decode
+    được giữ trong cache LRU để kéo qua lại cùng một đoạn không phải decode lại.
+"""
+
+import bisect
+from collections import OrderedDict
+import cv2
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt5.QtGui import QImage
+from video_index import snap_to_keyframes
+from frame_display import FrameDisplay
+from video_decoder import open_capture
+
+class _ScrubSignals(QObject):
+    """
+    Tín hiệu báo ảnh xem trước đã decode xong.
+    """
+    loaded = pyqtSignal(int, int, QImage)  # generation, chỉ số điểm neo, ảnh (null nếu lỗi)
+
+class _ScrubTask(QRunnable):
+    """
+    Tác vụ decode và thu nhỏ frame tại một điểm neo.
+    """
+    def __init__(self, previewer, generation, index):
+        super().__init__()
+        self.previewer = previewer
+        self.generation = generation
+        self.index = index
+
+    def run(self):
+        """
+        Seek tới điểm neo, decode và thu nhỏ về kích thước xem trước.
+        """
+        image = QImage()
+        try:
+            frame = self.previewer.decode(self.index)
+            if frame is not None:
+                image = self.previewer.to_thumbnail(frame)
+        except Exception as e:
+            print(f"Lỗi decode ảnh xem trước: {e}")
+        self.previewer.signals.loaded.emit(self.generation, self.index, image)
+
+class _ReleaseTask(QRunnable):
+    """
+    Tác vụ đóng bộ decode cũ trên worker thread khi đổi video.
+    """
+    def __init__(self, previewer):
+        super().__init__()
+        self.previewer = previewer
+
+    def run(self):
+        """
+        Đóng bộ decode đang mở của ScrubPreviewer.
+        """
+        self.previewer.release()
+
+class ScrubPreviewer(QObject):
+    """
+    Cung cấp ảnh xem trước có độ trễ giới hạn khi kéo slider.
+
+    Phát preview_ready(chỉ số điểm neo, QImage) khi có ảnh cho vị trí đang kéo.
+    """
+    preview_ready = pyqtSignal(int, QImage)
+
+    def __init__(self, size=QSize(600, 400), max_cached=300, parent=None):
+        """
+        :param size: Kích thước tối đa của ảnh xem trước.
+        :param max_cached: Số ảnh xem trước tối đa giữ trong bộ nhớ.
+        """
+        super().__init__(parent)
+        self.size = size
+        self.max_cached = max_cached
+        self.step = 1
+        self.last_index = 0
+        self.anchors = []  # điểm neo dời về keyframe (rỗng: dùng lưới mỗi step frame)
+        self.path = None
+        self.backend = None
+        self.cap = None  # chỉ dùng trên worker thread (tối đa một tác vụ tại một thời điểm)
+        self.display = FrameDisplay()  # buffer thu nhỏ, cũng chỉ dùng trên worker thread
+        self.generation = 0
+        self.thumbnails = OrderedDict()  # chỉ số điểm neo -> QImage
+        self.busy = False
+        self.wanted = None  # điểm neo mới nhất đang chờ decode
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _ScrubSignals()
+        self.signals.loaded.connect(self._on_loaded)
+
+    def set_video(self, path, fps, total_frames, backend=None):
+        """
+        Đổi video nguồn: xóa cache ảnh xem trước và đặt lưới điểm neo mỗi giây.
+
+        :param path: Đường dẫn file video.
+        :param fps: FPS của video.
+        :param total_frames: Tổng số frame của video.
+        :param backend: Backend decode (xem video_decoder.py).
+        """
+        self.generation += 1
+        self.path = path
+        self.backend = backend
+        self.last_index = max(0, total_frames - 1)
+        self.step = max(1, round(fps)) if fps > 0 else 1
+        self.anchors = []
+        self.thumbnails.clear()
+        self.wanted = None
+        # Tác vụ đang chạy (nếu có) sẽ bị bỏ kết quả nhờ generation; bộ decode cũ được đóng
+        # trên worker thread sau khi nó kết thúc
+        self.pool.start(_ReleaseTask(self))
+
+    def set_keyframes(self, keyframes):
+        """
+        Dời các điểm neo về keyframe gần nhất (trong nửa bước lưới).
+
+        :param keyframes: List chỉ số keyframe tăng dần.
+        """
+        grid = range(0, self.last_index + 1, self.step)
+        self.anchors = snap_to_keyframes(grid, [k for k in keyframes if k <= self.last_index], self.step // 2)
+        self.thumbnails.clear()
+
+    def anchor(self, index):
+        """
+        :return: Điểm neo gần index nhất.
+        """
+        if self.anchors:
+            position = bisect.bisect_left(self.anchors, index)
+            return min(self.anchors[max(0, position - 1):position + 1], key=lambda a: abs(a - index))
+        return min(round(index / self.step) * self.step, self.last_index)
+
+    def request(self, index):
+        """
+        Yêu cầu ảnh xem trước cho vị trí index.
+
+        Nếu ảnh của điểm neo đã có trong cache thì phát preview_ready ngay; ngược lại ghi
+        nhận là vị trí mới nhất cần decode (thay cho vị trí đang chờ trước đó).
+
+        :param index: Vị trí frame trên slider.
+        """
+        if self.path is None:
+            return
+        anchor = self.anchor(index)
+        image = self.thumbnails.get(anchor)
+        if image is not None:
+            self.thumbnails.move_to_end(anchor)
+            self.wanted = None
+            self.preview_ready.emit(anchor, image)
+            return
+        self.wanted = anchor
+        self._start_next()
+
+    def cancel(self):
+        """
+        Bỏ vị trí đang chờ decode (khi thả slider).
+        """
+        self.wanted = None
+
+    def decode(self, index):
+        """
+        Seek và decode frame tại index (chạy trên worker thread).
+
+        :return: Frame BGR hoặc None.
+        """
+        if self.cap is None:
+            self.cap = open_capture(self.path, self.backend)
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def to_thumbnail(self, frame):
+        """
+        Thu nhỏ frame BGR về kích thước xem trước và chuyển thành QImage (chạy trên worker thread).
+        """
+        return self.display.to_image(frame, self.size.width(), self.size.height()).copy()
+
+    def release(self):
+        """
+        Đóng bộ decode của worker (chạy trên worker thread).
+        """
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _start_next(self):
+        """
+        Bắt đầu decode điểm neo đang chờ nếu worker rảnh.
+        """
+        if self.busy or self.wanted is None:
+            return
+        self.busy = True
+        anchor, self.wanted = self.wanted, None
+        self.pool.start(_ScrubTask(self, self.generation, anchor))
+
+    def _on_loaded(self, generation, index, image):
+        """
+        Lưu ảnh xem trước vào cache, phát preview_ready và chuyển sang vị trí chờ mới nhất.
+        """
+        self.busy = False
+        if generation == self.generation and not image.isNull():
+            self.thumbnails[index] = image
+            while len(self.thumbnails) > self.max_cached:
+                self.thumbnails.popitem(last=False)
+            self.preview_ready.emit(index, image)
+        self._start_next()
@@ -0,0 +1,8 @@
+"""
+Cấu hình chung cho các test: cho phép import các module ở thư mục gốc của repo.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,125 @@
+"""
+Test FetchEngine với một HTTP server giả chạy trên 127.0.0.1 (http.server).
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from fetch_engine import FetchEngine, FetchError, MAX_RETRY_AFTER, parse_retry_after
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    /ok: 200; /slow: 200 sau 0.2 s; /busy: 503;
+    /retry/<giây>/<mã>: lần đầu của mỗi mã trả 429 với Retry-After, các lần sau 200.
+    """
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits.append((self.path, time.monotonic()))
+        if self.path.startswith("/retry/"):
+            _, _, seconds, key = self.path.split("/")
+            with server.lock:
+                first = key not in server.seen
+                server.seen.add(key)
+            if first:
+                self._reply(429, {"Retry-After": seconds})
+                return
+        elif self.path == "/busy":
+            self._reply(503)
+            return
+        elif self.path == "/slow":
+            time.sleep(0.2)
+        self._reply(200, body=b"data")
+
+    def _reply(self, status, headers=None, body=b""):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.lock = threading.Lock()
+    httpd.hits = []
+    httpd.seen = set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def engine():
+    engine = FetchEngine(backoff=0.05)
+    yield engine
+    engine.close()
+
+def test_parse_retry_after_is_capped():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("3600") == MAX_RETRY_AFTER
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after("nan") is None
+    assert parse_retry_after("không hợp lệ") is None
+    assert parse_retry_after(None) is None
+
+def test_retry_after_is_respected(server, engine):
+    begin = time.monotonic()
+    assert engine.fetch(f"{server.url}/retry/1/a", timeout=5) == b"data"
+    assert time.monotonic() - begin >= 0.9
+    first, second = [t for path, t in server.hits]
+    assert second - first >= 0.9
+    assert engine.host_stats()[server.url[len("http://"):]]["errors"] == 1
+
+def test_fetch_deadline_cancels_long_retry_after(server, engine):
+    begin = time.monotonic()
+    with pytest.raises(FetchError):
+        engine.fetch(f"{server.url}/retry/3600/b", timeout=1)
+    assert time.monotonic() - begin < 2
+    # Request bị hủy trả lại chỗ đồng thời của host
+    time.sleep(0.1)
+    assert all(state.in_flight == 0 for state in engine.hosts.values())
+
+def test_per_host_rate_limit(server):
+    engine = FetchEngine(rate=5.0, burst=1)
+    try:
+        futures = [engine.submit(f"{server.url}/ok") for _ in range(6)]
+        for future in futures:
+            assert future.result(timeout=10) == b"data"
+    finally:
+        engine.close()
+    times = sorted(t for _, t in server.hits)
+    # burst 1, 5 request/s: 6 request cần ít nhất 5 khoảng 0.2 s
+    assert times[-1] - times[0] >= 0.9
+
+def test_concurrency_backs_off_on_throttling(server):
+    engine = FetchEngine(initial_concurrency=8, retries=0)
+    try:
+        with pytest.raises(FetchError):
+            engine.fetch(f"{server.url}/busy", timeout=5)
+        host = server.url[len("http://"):]
+        assert engine.host_stats()[host]["concurrency"] == 4
+        with pytest.raises(FetchError):
+            engine.fetch(f"{server.url}/busy", timeout=5)
+        assert engine.host_stats()[host]["concurrency"] == 2
+    finally:
+        engine.close()
+
+def test_concurrency_is_limited_per_host(server):
+    engine = FetchEngine(rate=100.0, burst=100, initial_concurrency=2, max_concurrency=2)
+    try:
+        begin = time.monotonic()
+        futures = [engine.submit(f"{server.url}/slow") for _ in range(4)]
+        for future in futures:
+            assert future.result(timeout=10) == b"data"
+        # 4 request 0.2 s, tối đa 2 đồng thời: ít nhất hai lượt
+        assert time.monotonic() - begin >= 0.38
+    finally:
+        engine.close()
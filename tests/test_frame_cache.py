@@ -0,0 +1,15 @@
+import numpy as np
+from frame_cache import FrameCache
+
+def test_put_drops_frames_decoded_before_clear():
+    cache = FrameCache(max_bytes=1024 * 1024)
+    frame = np.zeros((4, 4, 3), np.uint8)
+    epoch = cache.epoch
+    cache.put(1, frame, epoch)
+    assert cache.get(1) is frame
+    cache.clear()
+    cache.put(2, frame, epoch)
+    assert cache.get(2) is None
+    cache.put(3, frame, cache.epoch)
+    cache.put(4, frame)
+    assert cache.get(3) is frame and cache.get(4) is frame
@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+import frame_extractor
+from frame_extractor import extract_segment
+
+class LooseSeekCapture:
+    """
+    Bộ decode giả: seek chỉ tới được keyframe (bội của 10) trước frame yêu cầu và báo lại
+    vị trí thật qua CAP_PROP_POS_FRAMES; mỗi frame là ảnh 8x8 có giá trị bằng chỉ số.
+    """
+    def __init__(self, path, backend=None):
+        self.position = 0
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        self.position = int(value) // 10 * 10
+        return True
+
+    def get(self, prop):
+        return self.position
+
+    def grab(self):
+        self.position += 1
+        return self.position <= 100
+
+    def read(self):
+        if self.position >= 100:
+            return False, None
+        frame = np.full((8, 8, 3), self.position, dtype=np.uint8)
+        self.position += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+def test_segment_resyncs_position_after_an_inexact_seek(monkeypatch, tmp_path):
+    monkeypatch.setattr(frame_extractor, "open_capture", LooseSeekCapture)
+    targets = [13, 17, 55, 96]
+    _, saved, _, _ = extract_segment("video.mp4", 13, targets, str(tmp_path), "v",
+                                     output_options={"format": "png"}, max_skip=20)
+    assert [index for index, _, _ in saved] == targets
+    for index, filename, _ in saved:
+        assert cv2.imread(filename)[0, 0, 0] == index
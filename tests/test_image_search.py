@@ -0,0 +1,49 @@
+import pytest
+import image_search
+
+class FakeDDGS:
+    """
+    DDGS giả: trả về `available` kết quả đầu tiên, ghi lại max_results của mỗi lần gọi.
+    """
+    calls = []
+    available = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def images(self, keyword, max_results=None):
+        FakeDDGS.calls.append(max_results)
+        return [{"image": f"http://img/{i}"} for i in range(min(max_results, FakeDDGS.available))]
+
+@pytest.fixture
+def ddgs(monkeypatch):
+    FakeDDGS.calls = []
+    monkeypatch.setattr(image_search, "DDGS", FakeDDGS)
+    return FakeDDGS
+
+def urls(pages):
+    return [item["image"] for page in pages for item in page]
+
+def test_pages_are_fetched_with_two_requests(ddgs):
+    ddgs.available = 1000
+    pages = iter(image_search.iter_image_pages("cat", page_size=100, max_results=1000))
+    assert len(next(pages)) == 100 and ddgs.calls == [100]
+    rest = list(pages)
+    assert ddgs.calls == [100, 1000]
+    assert [len(page) for page in rest] == [100] * 9
+    assert urls(rest) == [f"http://img/{i}" for i in range(100, 1000)]
+
+def test_stops_when_results_run_out_and_skips_seen(ddgs):
+    ddgs.available = 150
+    seen = [f"http://img/{i}" for i in range(20)]
+    pages = list(image_search.iter_image_pages("cat", page_size=100, max_results=1000, seen=seen))
+    assert ddgs.calls == [120, 1000]
+    assert urls(pages) == [f"http://img/{i}" for i in range(20, 150)]
+
+    ddgs.calls = []
+    ddgs.available = 50
+    assert urls(image_search.iter_image_pages("cat", page_size=100)) == [f"http://img/{i}" for i in range(50)]
+    assert ddgs.calls == [100]
@@ -0,0 +1,58 @@
+"""
+Test hàng đợi batch (video_batch.py): tiếp tục video dở dang và khoảng thời gian.
+"""
+
+import os
+import cv2
+import numpy as np
+import pytest
+from video_batch import BatchStore, PENDING, plan_key, run_batch
+from video_download import VIDEO_CACHE_DIR
+
+FRAMES = 60
+FPS = 30
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # cache video mặc định nằm trong thư mục hiện tại
+    os.makedirs("videos")
+    writer = cv2.VideoWriter(os.path.join("videos", "clip.avi"), cv2.VideoWriter_fourcc(*"MJPG"), FPS, (64, 48))
+    for index in range(FRAMES):
+        writer.write(np.full((48, 64, 3), index * 4, dtype=np.uint8))
+    writer.release()
+    return tmp_path
+
+def saved_names():
+    return sorted(os.listdir(os.path.join("dataset", "clip")))
+
+def test_interrupted_video_resumes_without_copies(workspace):
+    source = os.path.join("videos", "clip.avi")
+    stats = run_batch(["videos"], every_n=10, workers=1)
+    assert stats["done"] == 1 and len(stats["saved"]) == 6
+    first = saved_names()
+
+    # Giả lập lần chạy bị ngắt sau frame 20: trạng thái PENDING, điểm tiếp tục 21, mất file frame 50
+    store = BatchStore(os.path.join("dataset", ".video_batch.db"))
+    store.mark(source, PENDING)
+    store.set_resume(source, plan_key(10), 21)
+    store.close()
+    os.remove(os.path.join("dataset", "clip", "clip_50.jpg"))
+    stats = run_batch(["videos"], every_n=10, workers=1)
+    assert [index for index, _, _ in stats["saved"]] == [50]
+    assert stats["existing"] == 5
+    assert saved_names() == first
+
+    # Chạy lại từ đầu cũng không tạo bản _2 của frame đã có
+    stats = run_batch(["videos"], every_n=10, workers=1, fresh=True)
+    assert stats["saved"] == [] and saved_names() == first
+
+def test_range_is_applied_to_every_video(workspace):
+    stats = run_batch(["videos"], start=1.0, end=1.2, workers=1)
+    assert [index for index, _, _ in stats["saved"]] == list(range(30, 37))
+    assert not os.path.exists(VIDEO_CACHE_DIR)  # video trên máy không cần thư mục cache
+
+def test_done_videos_are_redone_for_a_new_plan(workspace):
+    assert run_batch(["videos"], every_n=30, workers=1)["done"] == 1
+    assert run_batch(["videos"], every_n=30, workers=1)["skipped"] == 1
+    stats = run_batch(["videos"], every_n=20, workers=1)
+    assert stats["done"] == 1 and [index for index, _, _ in stats["saved"]] == [20, 40]
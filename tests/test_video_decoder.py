@@ -0,0 +1,118 @@
+"""
+Test backend PyAV (video_decoder.py) với một video VFR tổng hợp: khoảng cách PTS giữa các
+frame không đều, nên chỉ số tính theo FPS trung bình sẽ bị nhảy cóc hoặc trùng nhau.
+"""
+
+import os
+import random
+from fractions import Fraction
+import numpy as np
+import pytest
+
+av = pytest.importorskip("av")
+
+from frame_reader import FrameReader
+from frame_extractor import select_frames, extract_frames
+from video_decoder import PyAVCapture, frame_at_time, frame_time
+from video_index import scan_keyframes, load_or_build
+import cv2
+
+FRAMES = 90
+GAPS = (10, 60, 20, 45, 33)  # khoảng cách PTS (ms) lặp lại
+
+@pytest.fixture(scope="module")
+def vfr_clip(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("vfr") / "vfr.mp4")
+    with av.open(path, "w") as container:
+        stream = container.add_stream("libx264", rate=30)
+        stream.width, stream.height = 64, 48
+        stream.pix_fmt = "yuv420p"
+        stream.codec_context.time_base = Fraction(1, 1000)
+        stream.codec_context.gop_size = 12
+        pts = 0
+        for index in range(FRAMES):
+            image = np.full((48, 64, 3), (index * 5) % 200, dtype=np.uint8)
+            image[(index // 8) * 4:(index // 8) * 4 + 4, (index % 8) * 8:(index % 8) * 8 + 8] = 255
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+            frame.pts = pts
+            frame.time_base = Fraction(1, 1000)
+            pts += GAPS[index % len(GAPS)]
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return path
+
+@pytest.fixture(scope="module")
+def sequential(vfr_clip):
+    cap = PyAVCapture(vfr_clip)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        assert cap.get(cv2.CAP_PROP_POS_FRAMES) == len(frames) + 1
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def test_frames_are_numbered_in_order(vfr_clip, sequential):
+    cap = PyAVCapture(vfr_clip)
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == FRAMES
+    assert len(sequential) == FRAMES
+    cap.release()
+
+def test_seek_returns_the_same_frame_as_sequential_read(vfr_clip, sequential):
+    cap = PyAVCapture(vfr_clip)
+    for index in random.Random(0).sample(range(FRAMES), 30) + [0, FRAMES - 1]:
+        assert cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, frame = cap.read()
+        assert ret and np.array_equal(frame, sequential[index]), index
+        assert cap.get(cv2.CAP_PROP_POS_FRAMES) == index + 1
+    assert not cap.set(cv2.CAP_PROP_POS_FRAMES, FRAMES)
+    cap.release()
+
+def test_frame_reader_steps_and_jumps_agree(vfr_clip, sequential):
+    reader = FrameReader(PyAVCapture(vfr_clip))
+    reader.set_keyframes(scan_keyframes(vfr_clip, 30.0)[0])
+    for index in list(range(0, 20)) + [45, 46, 47, 30, 31, 89, 5]:
+        assert np.array_equal(reader.read(index), sequential[index]), index
+
+def test_keyframes_use_the_same_numbering(vfr_clip, sequential):
+    keyframes, _ = scan_keyframes(vfr_clip, 30.0)
+    assert keyframes[0] == 0 and len(keyframes) > 1
+    cap = PyAVCapture(vfr_clip)
+    for index in keyframes:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        assert np.array_equal(cap.read()[1], sequential[index])
+    cap.release()
+
+def test_time_and_index_follow_pts(vfr_clip):
+    cap = PyAVCapture(vfr_clip)
+    pts = [sum(GAPS[i % len(GAPS)] for i in range(index)) / 1000 for index in range(FRAMES)]
+    for index in range(FRAMES):
+        assert frame_time(cap, index) == pytest.approx(pts[index])
+        assert frame_at_time(cap, pts[index]) == index
+        assert frame_at_time(cap, pts[index] + 0.005) == index
+    assert frame_time(cap, FRAMES) > pts[-1]
+    # Khoảng thời gian theo PTS, không theo FPS trung bình
+    indices = select_frames(FRAMES, cap.fps, start=1.0, end=2.0, locate=lambda seconds: frame_at_time(cap, seconds))
+    assert pts[indices[0]] <= 1.0 < pts[indices[0] + 1]
+    assert all(pts[index] <= 2.0 for index in indices) and pts[indices[-1] + 1] > 2.0
+    cap.release()
+
+def test_index_records_the_backend_that_numbered_keyframes(vfr_clip):
+    index, cached = load_or_build(vfr_clip)
+    assert not cached and index.backend == "pyav"
+    again, cached = load_or_build(vfr_clip)
+    assert cached and again.backend == "pyav" and again.keyframes == index.keyframes
+
+def test_extract_frames_saves_the_frame_of_each_index(vfr_clip, sequential, tmp_path):
+    keyframes, _ = scan_keyframes(vfr_clip, 30.0)
+    indices = list(range(0, FRAMES, 7)) + [FRAMES - 1]
+    stats = extract_frames(vfr_clip, indices, str(tmp_path), "vfr", workers=2, keyframes=keyframes,
+                           output_options={"format": "png"}, backend="pyav")
+    assert [index for index, _, _ in stats["saved"]] == indices
+    for index, filename, _ in stats["saved"]:
+        assert os.path.basename(filename) == f"vfr_{index}.png"
+        assert np.array_equal(cv2.imread(filename), sequential[index]), index
@@ -0,0 +1,83 @@
+"""
+Test download_video với một lớp YoutubeDL giả (không gọi mạng).
+"""
+
+import os
+import threading
+import pytest
+from video_download import DownloadCancelled, VideoCache, download_video, url_key, video_format
+
+class FakeYoutubeDL:
+    """
+    Giả lập YoutubeDL: ghi một file nhỏ theo outtmpl và gọi progress hook như yt_dlp.
+    """
+    calls = []
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def extract_info(self, url, download=True):
+        FakeYoutubeDL.calls.append((url, self.opts))
+        video_id = url.split("v=")[1].split("&")[0]
+        info = {"id": video_id, "title": f"Video {video_id}", "extractor_key": "Youtube", "ext": "mp4"}
+        for done in (0, 50, 100):
+            for hook in self.opts["progress_hooks"]:
+                hook({"status": "downloading", "downloaded_bytes": done, "total_bytes": 100, "speed": 10})
+        with open(self.prepare_filename(info), "wb") as f:
+            f.write(b"video")
+        for hook in self.opts["progress_hooks"]:
+            hook({"status": "finished"})
+        return info
+
+    def prepare_filename(self, info):
+        return self.opts["outtmpl"] % info
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    FakeYoutubeDL.calls = []
+
+def test_download_then_cache_hit(tmp_path):
+    cache = VideoCache(str(tmp_path))
+    progress = []
+    url = "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+    path, title, cached = download_video(url, 720, cache, lambda f, text: progress.append(f),
+                                         ydl_class=FakeYoutubeDL)
+    assert not cached and title == "Video aaaaaaaaaaa" and os.path.exists(path)
+    assert progress == [0.0, 0.5, 1.0, 1.0]
+    opts = FakeYoutubeDL.calls[0][1]
+    assert opts["format"] == video_format(720) and opts["noplaylist"]
+    assert "[height<=720]" in opts["format"]
+
+    again = download_video(url, 720, cache, ydl_class=FakeYoutubeDL)
+    assert again == (path, title, True)
+    assert len(FakeYoutubeDL.calls) == 1
+    # Độ phân giải khác là một mục cache khác
+    download_video(url, 0, cache, ydl_class=FakeYoutubeDL)
+    assert len(FakeYoutubeDL.calls) == 2 and FakeYoutubeDL.calls[1][1]["format"] == video_format(0)
+
+def test_cancel_stops_download(tmp_path):
+    cache = VideoCache(str(tmp_path))
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(DownloadCancelled):
+        download_video("https://www.youtube.com/watch?v=bbbbbbbbbbb", 720, cache,
+                       cancel_event=cancel_event, ydl_class=FakeYoutubeDL)
+    assert cache.lookup("Youtube_bbbbbbbbbbb", 720) is None
+
+def test_playlist_links_are_cached_by_video(tmp_path):
+    cache = VideoCache(str(tmp_path))
+    assert url_key("https://www.youtube.com/watch?v=ccccccccccc&list=PLplaylist") is None
+    first = download_video("https://www.youtube.com/watch?v=ccccccccccc&list=PLplaylist", 720, cache,
+                           ydl_class=FakeYoutubeDL)
+    second = download_video("https://www.youtube.com/watch?v=ddddddddddd&list=PLplaylist", 720, cache,
+                            ydl_class=FakeYoutubeDL)
+    assert first[1] == "Video ccccccccccc" and second[1] == "Video ddddddddddd"
+    assert not second[2]
+    # Link video đơn của video đã tải từ playlist lấy được từ cache
+    assert download_video("https://youtu.be/ccccccccccc", 720, cache, ydl_class=FakeYoutubeDL)[2]
@@ -0,0 +1,321 @@
+"""
+File: thumbnail_grid.py
+Mô tả:
+    Chứa các thành phần cho chế độ xem lưới thumbnail của ScrapingTab:
+      - ThumbnailModel: model danh sách kết quả tìm ảnh, chỉ tải thumbnail của các ô
+        đang hiển thị (view chỉ hỏi dữ liệu của các ô nhìn thấy) trên worker thread.
+      - ThumbnailGrid: QListView dạng lưới, chọn nhiều ảnh.
+      - SelectionDownloader: tải ảnh gốc (full-size) của các ảnh được chọn song song và lưu vào dataset.
+"""
+
+from collections import OrderedDict
+from PyQt5.QtCore import (Qt, QSize, QAbstractListModel, QModelIndex, QObject, QRunnable,
+                          QThreadPool, pyqtSignal)
+from PyQt5.QtGui import QImage, QPixmap, QColor
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+from fetch_engine import shared_engine
+from image_search import store_image
+from scrape_session import content_hash
+
+THUMBNAIL_SIZE = QSize(140, 140)
+
+class _ThumbnailSignals(QObject):
+    """
+    Tín hiệu gửi thumbnail đã decode từ worker thread về thread giao diện.
+    """
+    loaded = pyqtSignal(int, str, QImage)  # generation, url, ảnh (null nếu lỗi)
+
+class _ThumbnailTask(QRunnable):
+    """
+    Tác vụ tải và thu nhỏ một thumbnail.
+    """
+    def __init__(self, generation, url, signals):
+        """
+        :param generation: Thế hệ danh sách kết quả lúc tạo tác vụ.
+        :param url: URL thumbnail.
+        :param signals: Đối tượng _ThumbnailSignals để báo kết quả.
+        """
+        super().__init__()
+        self.generation = generation
+        self.url = url
+        self.signals = signals
+
+    def run(self):
+        """
+        Tải thumbnail qua FetchEngine, decode và scale về kích thước ô lưới.
+        """
+        image = QImage()
+        try:
+            data = shared_engine().fetch(self.url, timeout=10)
+            if image.loadFromData(data):
+                image = image.scaled(THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        except Exception as e:
+            print(f"Lỗi load thumbnail: {e}")
+        self.signals.loaded.emit(self.generation, self.url, image)
+
+class ThumbnailModel(QAbstractListModel):
+    """
+    Model danh sách kết quả tìm ảnh cho ThumbnailGrid.
+
+    Thumbnail được tải khi view hỏi DecorationRole của một ô (tức là ô đang hiển thị).
+    Các thumbnail đã tải được giữ trong cache LRU giới hạn số lượng; ô bị loại khỏi cache
+    sẽ được tải lại khi cuộn tới.
+    """
+    def __init__(self, max_cached=600, max_workers=8, parent=None):
+        """
+        :param max_cached: Số thumbnail tối đa giữ trong bộ nhớ.
+        :param max_workers: Số worker thread tải thumbnail.
+        """
+        super().__init__(parent)
+        self.results = []
+        self.max_cached = max_cached
+        self.pixmaps = OrderedDict()  # url thumbnail -> QPixmap
+        self.failed = set()
+        self.pending = set()
+        self.generation = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = _ThumbnailSignals()
+        self.signals.loaded.connect(self._on_loaded)
+        self.placeholder = QPixmap(THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor("#ddd"))
+        self.fetch_more = None  # hàm được gọi khi view cuộn tới cuối danh sách
+        self.can_fetch_more = None
+
+    def rowCount(self, parent=QModelIndex()):
+        """
+        Số kết quả trong model.
+        """
+        if parent.isValid():
+            return 0
+        return len(self.results)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        Trả về thumbnail (DecorationRole) hoặc tiêu đề (ToolTipRole) của một kết quả.
+        """
+        if not index.isValid() or index.row() >= len(self.results):
+            return None
+        item = self.results[index.row()]
+        if role == Qt.DecorationRole:
+            url = item.get('thumbnail') or item['image']
+            pixmap = self.pixmaps.get(url)
+            if pixmap is not None:
+                self.pixmaps.move_to_end(url)
+                return pixmap
+            self._request(url)
+            return self.placeholder
+        if role == Qt.ToolTipRole:
+            return f"{item.get('title', '')}\n{item.get('width', '?')}x{item.get('height', '?')}"
+        return None
+
+    def canFetchMore(self, parent):
+        """
+        View gọi hàm này khi cuộn tới cuối; cho biết còn trang kết quả để tải hay không.
+        """
+        if parent.isValid() or self.can_fetch_more is None:
+            return False
+        return self.can_fetch_more()
+
+    def fetchMore(self, parent):
+        """
+        Yêu cầu tải thêm trang kết quả (kết quả mới được thêm qua append_results).
+        """
+        if self.fetch_more is not None:
+            self.fetch_more()
+
+    def set_results(self, results):
+        """
+        Thay toàn bộ danh sách kết quả (khi fetch từ khóa mới).
+        """
+        self.beginResetModel()
+        self.results = list(results)
+        self.generation += 1
+        self.pool.clear()
+        self.pixmaps.clear()
+        self.failed.clear()
+        self.pending.clear()
+        self.endResetModel()
+
+    def append_results(self, results):
+        """
+        Thêm kết quả của một trang mới vào cuối danh sách.
+        """
+        if not results:
+            return
+        start = len(self.results)
+        self.beginInsertRows(QModelIndex(), start, start + len(results) - 1)
+        self.results.extend(results)
+        self.endInsertRows()
+
+    def drop_queued(self):
+        """
+        Bỏ các thumbnail đang xếp hàng nhưng chưa tải (khi người dùng cuộn đi chỗ khác).
+
+        Các ô còn hiển thị sẽ tự yêu cầu lại khi view vẽ lại.
+        """
+        self.pool.clear()
+        self.pending.clear()
+
+    def _request(self, url):
+        """
+        Xếp hàng tải một thumbnail nếu chưa tải, chưa lỗi và chưa đang chờ.
+        """
+        if url in self.pending or url in self.failed:
+            return
+        self.pending.add(url)
+        self.pool.start(_ThumbnailTask(self.generation, url, self.signals))
+
+    def _on_loaded(self, generation, url, image):
+        """
+        Lưu thumbnail vừa tải vào cache và báo view vẽ lại các ô tương ứng.
+        """
+        if generation != self.generation:
+            return
+        self.pending.discard(url)
+        if image.isNull():
+            self.failed.add(url)
+            return
+        self.pixmaps[url] = QPixmap.fromImage(image)
+        while len(self.pixmaps) > self.max_cached:
+            self.pixmaps.popitem(last=False)
+        for row, item in enumerate(self.results):
+            if (item.get('thumbnail') or item['image']) == url:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+class ThumbnailGrid(QListView):
+    """
+    Lưới thumbnail ảo hóa: chỉ các ô đang hiển thị được vẽ và tải thumbnail.
+    Hỗ trợ chọn nhiều ảnh (Ctrl/Shift + click).
+    """
+    def __init__(self, model, parent=None):
+        """
+        :param model: ThumbnailModel chứa kết quả tìm ảnh.
+        """
+        super().__init__(parent)
+        self.setModel(model)
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(100)
+        self.setIconSize(THUMBNAIL_SIZE)
+        self.setGridSize(THUMBNAIL_SIZE + QSize(12, 12))
+        self.setSpacing(4)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.verticalScrollBar().valueChanged.connect(lambda _: model.drop_queued())
+
+    def selected_rows(self):
+        """
+        :return: Danh sách chỉ số các ảnh đang được chọn (tăng dần).
+        """
+        return sorted(index.row() for index in self.selectionModel().selectedIndexes())
+
+class _SaveSignals(QObject):
+    """
+    Tín hiệu báo kết quả lưu một ảnh gốc.
+    """
+    # url, trạng thái ('saved', 'duplicate', 'rejected', 'failed'), chi tiết, hash nội dung
+    finished = pyqtSignal(str, str, str, str)
+
+class _SaveTask(QRunnable):
+    """
+    Tác vụ tải ảnh gốc và lưu vào dataset.
+    """
+    def __init__(self, url, class_name, index, byte_cache, normalizer, dedup_index, signals):
+        """
+        :param url: URL ảnh gốc.
+        :param class_name: Tên class.
+        :param index: Vị trí ảnh trong kết quả tìm kiếm.
+        :param byte_cache: ByteCache dùng chung.
+        :param normalizer: ImageNormalizer.
+        :param dedup_index: DedupIndex hoặc None.
+        :param signals: Đối tượng _SaveSignals để báo kết quả.
+        """
+        super().__init__()
+        self.url = url
+        self.class_name = class_name
+        self.index = index
+        self.byte_cache = byte_cache
+        self.normalizer = normalizer
+        self.dedup_index = dedup_index
+        self.signals = signals
+
+    def run(self):
+        """
+        Tải, chuẩn hóa, kiểm tra trùng và lưu ảnh.
+        """
+        data_hash = ""
+        try:
+            data = self.byte_cache.fetch(self.url, timeout=10)
+            data_hash = content_hash(data)
+            status, detail, _ = store_image(data, self.class_name, self.index,
+                                            normalizer=self.normalizer, dedup_index=self.dedup_index,
+                                            wait_for_index=False)
+        except Exception as e:
+            status, detail = "failed", f"{self.url}: {e}"
+        self.signals.finished.emit(self.url, status, detail, data_hash)
+
+class SelectionDownloader(QObject):
+    """
+    Tải ảnh gốc của các ảnh được chọn song song trên thread pool.
+
+    Phát item_finished(url, trạng thái, hash nội dung) và progress(số đã xong, tổng) sau mỗi ảnh,
+    finished(dict đếm theo trạng thái) khi xong.
+    """
+    item_finished = pyqtSignal(str, str, str)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(dict)
+
+    def __init__(self, byte_cache, normalizer, max_workers=6, parent=None):
+        """
+        :param byte_cache: ByteCache dùng chung với chế độ xem từng ảnh.
+        :param normalizer: ImageNormalizer dùng để chuẩn hóa ảnh.
+        :param max_workers: Số worker thread tải ảnh.
+        """
+        super().__init__(parent)
+        self.byte_cache = byte_cache
+        self.normalizer = normalizer
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = _SaveSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.total = 0
+        self.done = 0
+        self.counts = {}
+
+    def is_busy(self):
+        """
+        :return: True nếu đang có ảnh chưa tải xong.
+        """
+        return self.done < self.total
+
+    def start(self, items, class_name, dedup_index=None):
+        """
+        Bắt đầu tải các ảnh đã chọn.
+
+        :param items: Danh sách tuple (vị trí trong kết quả, URL ảnh gốc).
+        :param class_name: Tên class.
+        :param dedup_index: DedupIndex hoặc None để không kiểm tra trùng.
+        """
+        self.total = len(items)
+        self.done = 0
+        self.counts = {}
+        for index, url in items:
+            self.pool.start(_SaveTask(url, class_name, index, self.byte_cache, self.normalizer,
+                                      dedup_index, self.signals))
+
+    def _on_finished(self, url, status, detail, data_hash):
+        """
+        Ghi nhận kết quả một ảnh (chạy trên thread giao diện).
+        """
+        self.item_finished.emit(url, status, data_hash)
+        self.done += 1
+        self.counts[status] = self.counts.get(status, 0) + 1
+        if status != "saved":
+            print(f"Ảnh không được lưu ({status}): {detail}")
+        self.progress.emit(self.done, self.total)
+        if self.done == self.total:
+            self.finished.emit(dict(self.counts))
@@ -0,0 +1,125 @@
+"""
+File: timeline_slider.py
+Mô tả:
+    Chứa lớp TimelineSlider: QSlider ngang của tab video có thể vẽ thêm các vạch đánh dấu
+    (ví dụ vị trí chuyển cảnh) lên rãnh trượt, và hiện thumbnail xem trước (từ dải thumbnail
+    của video_index.py) khi rê chuột trên slider.
+"""
+
+from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtGui import QPainter, QPen, QColor, QPixmap, QImage
+from PyQt5.QtWidgets import QSlider, QStyle, QStyleOptionSlider, QLabel
+from utils import format_time
+
+class TimelineSlider(QSlider):
+    """
+    Slider chọn frame có vạch đánh dấu và thumbnail xem trước khi rê chuột.
+    """
+    def __init__(self, parent=None):
+        super().__init__(Qt.Horizontal, parent)
+        self.marks = []
+        self.mark_color = QColor("#d22")
+        self.preview_index = None  # VideoIndex cung cấp thumbnail, None nếu chưa có
+        self.fps = 0
+        self.preview_cache = {}  # chỉ số frame của thumbnail -> QPixmap
+        self.popup = QLabel(self, Qt.ToolTip)
+        self.popup.setStyleSheet("border: 1px solid gray;")
+        self.setMouseTracking(True)
+
+    def set_marks(self, marks):
+        """
+        Đặt danh sách vị trí (giá trị slider) cần đánh dấu.
+
+        :param marks: List chỉ số frame.
+        """
+        self.marks = list(marks)
+        self.update()
+
+    def set_previews(self, index, fps):
+        """
+        Đặt nguồn thumbnail xem trước khi rê chuột.
+
+        :param index: VideoIndex (có thumb_frames, thumbnail_at), hoặc None để tắt xem trước.
+        :param fps: FPS của video (để hiện thời gian).
+        """
+        self.preview_index = index
+        self.fps = fps
+        self.preview_cache.clear()
+        self.popup.hide()
+
+    def x_to_value(self, x):
+        """
+        Giá trị slider tương ứng với tọa độ x (pixel) trên widget.
+        """
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderGroove, self)
+        handle = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderHandle, self)
+        span = groove.width() - handle.width()
+        return QStyle.sliderValueFromPosition(self.minimum(), self.maximum(),
+                                              x - groove.x() - handle.width() // 2, span)
+
+    def mouseMoveEvent(self, event):
+        """
+        Hiện thumbnail gần vị trí chuột nhất phía trên slider.
+        """
+        super().mouseMoveEvent(event)
+        if self.preview_index is None or self.maximum() <= self.minimum():
+            return
+        value = self.x_to_value(event.pos().x())
+        found = self.preview_index.thumbnail_at(value)
+        if found is None:
+            return
+        frame_index, thumbnail = found
+        pixmap = self.preview_cache.get(frame_index)
+        if pixmap is None:
+            height, width = thumbnail.shape[:2]
+            image = QImage(thumbnail.data, width, height, thumbnail.strides[0], QImage.Format_BGR888)
+            pixmap = QPixmap.fromImage(image)  # fromImage sao chép dữ liệu của mảng thumbnail
+            self.preview_cache[frame_index] = pixmap
+        # Vẽ thời gian tại vị trí chuột lên bản sao của thumbnail
+        labeled = QPixmap(pixmap)
+        painter = QPainter(labeled)
+        painter.fillRect(0, labeled.height() - 16, labeled.width(), 16, QColor(0, 0, 0, 160))
+        painter.setPen(Qt.white)
+        text = format_time(value / self.fps) if self.fps > 0 else str(value)
+        painter.drawText(0, labeled.height() - 16, labeled.width(), 16, Qt.AlignCenter, text)
+        painter.end()
+        self.popup.setPixmap(labeled)
+        self.popup.adjustSize()
+        self.popup.move(self.mapToGlobal(QPoint(event.pos().x() - self.popup.width() // 2,
+                                                -self.popup.height() - 4)))
+        self.popup.show()
+
+    def leaveEvent(self, event):
+        """
+        Ẩn thumbnail khi chuột rời slider.
+        """
+        self.popup.hide()
+        super().leaveEvent(event)
+
+    def value_to_x(self, value):
+        """
+        Tọa độ x (pixel) trên widget tương ứng với một giá trị slider.
+        """
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderGroove, self)
+        handle = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderHandle, self)
+        span = groove.width() - handle.width()
+        offset = QStyle.sliderPositionFromValue(self.minimum(), self.maximum(), value, span)
+        return groove.x() + handle.width() // 2 + offset
+
+    def paintEvent(self, event):
+        """
+        Vẽ slider rồi vẽ các vạch đánh dấu lên trên.
+        """
+        super().paintEvent(event)
+        if not self.marks or self.maximum() <= self.minimum():
+            return
+        painter = QPainter(self)
+        painter.setPen(QPen(self.mark_color, 2))
+        for value in self.marks:
+            x = self.value_to_x(value)
+            painter.drawLine(x, 0, x, self.height() // 2)
+        painter.end()
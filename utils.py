@@ -1,10 +1,12 @@
 """
 File: utils.py
 Mô tả:
-    Chứa các hàm tiện ích dùng để xử lý tên file và định dạng thời gian.
+    Chứa các hàm tiện ích dùng để xử lý tên file, cấp phát tên file lưu ảnh và định dạng thời gian.
 """
 
+import os
 import re
+import threading
 import unicodedata
 
 def sanitize_filename(filename):
@@ -20,6 +22,85 @@ def sanitize_filename(filename):
     filename = re.sub(r'[^\w\-\.]', '_', filename)
     return filename
 
+class FilenameAllocator:
+    """
+    Cấp phát tên file chưa tồn tại trong một thư mục mà không phải gọi os.path.exists lặp lại.
+
+    Thư mục chỉ được liệt kê một lần khi khởi tạo; sau đó tập tên đã dùng và số thứ tự
+    tiếp theo cho mỗi tên cơ bản được giữ trong bộ nhớ. File được tạo bằng O_EXCL nên
+    nếu process khác tạo trùng tên cùng lúc, allocator chỉ chuyển sang tên kế tiếp.
+    """
+    def __init__(self, folder):
+        """
+        :param folder: Thư mục chứa file (tạo mới nếu chưa có).
+        """
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        with os.scandir(folder) as entries:
+            self.names = {entry.name for entry in entries}
+        self.next_suffix = {}  # (tên cơ bản, phần mở rộng) -> số thứ tự tiếp theo
+        self.lock = threading.Lock()
+
+    def create(self, base_name, ext=".jpg"):
+        """
+        Tạo (độc quyền) một file mới với tên chưa tồn tại.
+
+        Thử lần lượt {base_name}{ext}, {base_name}_2{ext}, {base_name}_3{ext}, ...
+
+        :param base_name: Tên file cơ bản (không có phần mở rộng).
+        :param ext: Phần mở rộng của file.
+        :return: Tuple (đường dẫn file, file object mở ở chế độ 'wb').
+        """
+        key = (base_name, ext)
+        with self.lock:
+            name = f"{base_name}{ext}"
+            counter = self.next_suffix.get(key, 2)
+            while True:
+                if name not in self.names:
+                    path = os.path.join(self.folder, name)
+                    self.names.add(name)
+                    try:
+                        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+                    except FileExistsError:
+                        pass
+                    else:
+                        return path, os.fdopen(fd, "wb")
+                name = f"{base_name}_{counter}{ext}"
+                counter += 1
+                self.next_suffix[key] = counter
+
+    def write(self, base_name, data, ext=".jpg"):
+        """
+        Ghi dữ liệu vào một file mới với tên chưa tồn tại.
+
+        :param base_name: Tên file cơ bản (không có phần mở rộng).
+        :param data: Dữ liệu bytes cần ghi.
+        :param ext: Phần mở rộng của file.
+        :return: Đường dẫn file đã ghi.
+        """
+        path, f = self.create(base_name, ext)
+        with f:
+            f.write(data)
+        return path
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+def get_allocator(folder):
+    """
+    Trả về FilenameAllocator dùng chung cho một thư mục (mỗi thư mục chỉ được liệt kê một lần).
+
+    :param folder: Thư mục chứa file.
+    :return: Đối tượng FilenameAllocator.
+    """
+    key = os.path.abspath(folder)
+    with _allocators_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = FilenameAllocator(folder)
+            _allocators[key] = allocator
+        return allocator
+
 def format_time(seconds):
     """
     Chuyển số giây thành định dạng thời gian hh:mm:ss hoặc mm:ss (nếu video ngắn).
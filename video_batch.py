@@ -0,0 +1,412 @@
+"""
+File: video_batch.py
+Mô tả:
+    Hàng đợi xử lý nhiều video không cần giao diện: nhận thư mục, mẫu glob hoặc link playlist
+    (yt_dlp), tải các video từ link (qua cache của video_download.py) và trích xuất frame của
+    từng video vào dataset/<tên_video>/.
+
+    Mỗi video là một tác vụ trong process pool có số worker bằng số CPU, nên nhiều video được
+    xử lý song song. Trong một worker, các frame cần lấy của video được chia thành các đoạn
+    liên tiếp (plan_segments, tối đa 150 frame mỗi đoạn) và decode lần lượt; mỗi đoạn mở lại
+    file và seek tới đầu đoạn (extract_segment), để sau mỗi đoạn có thể lưu điểm tiếp tục và
+    dừng khi bị hủy. Tiến độ của từng video được gửi về process chính qua một hàng đợi. Trạng thái từng video được lưu
+    trong dataset/.video_batch.db (SQLite); chạy lại cùng lệnh sẽ bỏ qua các video đã xong và
+    tiếp tục video dở dang từ đoạn chưa xong (frame đã có file <tên>_<chỉ số>.* cũng được
+    bỏ qua, nên không sinh bản _2). Process chính là nơi duy nhất ghi file trạng thái và danh
+    mục cache video.
+
+    Chạy không cần giao diện:
+        python video_batch.py videos/ --every-seconds 1
+        python video_batch.py "clips/**/*.mp4" "https://www.youtube.com/playlist?list=..." --workers 8
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import Manager
+import cv2
+from yt_dlp import YoutubeDL
+from dedup_index import shared_index
+from frame_extractor import frame_output, select_frames, plan_segments, extract_segment, saved_frame_indices
+from frame_encode import FORMATS
+from utils import parse_time
+from video_download import VideoCache, download_video
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".webm", ".m4v", ".mpg", ".mpeg", ".wmv", ".flv"}
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    source TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    title TEXT,
+    saved INTEGER NOT NULL DEFAULT 0,
+    decoded INTEGER NOT NULL DEFAULT 0,
+    elapsed REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL NOT NULL,
+    plan TEXT,
+    resume_from INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+def plan_key(every_n=None, every_seconds=None, start=0.0, end=None):
+    """
+    Chuỗi mô tả cách chọn frame; điểm tiếp tục của một video chỉ dùng được với cùng cách chọn.
+    """
+    return json.dumps([every_n, every_seconds, start or 0.0, end])
+
+def expand_sources(sources, ydl_class=YoutubeDL):
+    """
+    Liệt kê các video từ danh sách nguồn.
+
+    :param sources: List nguồn: thư mục (tìm đệ quy các file video), mẫu glob, link playlist
+                    hoặc link video, đường dẫn file.
+    :param ydl_class: Lớp YoutubeDL (thay bằng lớp giả khi kiểm thử).
+    :return: List nguồn video (đường dẫn file hoặc link), không trùng, giữ thứ tự.
+    """
+    found = []
+    for source in sources:
+        if source.startswith("http"):
+            with ydl_class({"quiet": True, "extract_flat": "in_playlist", "noprogress": True}) as ydl:
+                info = ydl.extract_info(source, download=False)
+            entries = info.get("entries") if info else None
+            if entries is None:
+                found.append(source)
+            for entry in entries or []:
+                url = entry.get("webpage_url") or entry.get("url") if entry else None
+                if url:
+                    found.append(url)
+        elif os.path.isdir(source):
+            for folder, _, files in sorted(os.walk(source)):
+                found.extend(os.path.join(folder, name) for name in sorted(files)
+                             if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS)
+        elif glob.has_magic(source):
+            found.extend(path for path in sorted(glob.glob(source, recursive=True)) if os.path.isfile(path))
+        else:
+            found.append(source)
+    return list(dict.fromkeys(found))
+
+class BatchStore:
+    """
+    Trạng thái các video trong hàng đợi batch trên SQLite, an toàn khi dùng từ nhiều thread.
+    """
+    def __init__(self, path=os.path.join("dataset", ".video_batch.db")):
+        """
+        :param path: Đường dẫn file SQLite (thư mục cha được tạo nếu chưa có).
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(videos)")}
+        if "plan" not in columns:  # file trạng thái tạo trước khi có điểm tiếp tục
+            self.conn.execute("ALTER TABLE videos ADD COLUMN plan TEXT")
+            self.conn.execute("ALTER TABLE videos ADD COLUMN resume_from INTEGER NOT NULL DEFAULT 0")
+        self.conn.commit()
+
+    def add(self, sources):
+        """
+        Thêm các video chưa có vào hàng đợi (trạng thái PENDING).
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO videos (source, status, updated) VALUES (?, ?, ?)",
+                                  [(source, PENDING, now) for source in sources])
+
+    def reset(self, sources):
+        """
+        Đưa các video về trạng thái PENDING (xử lý lại từ đầu).
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE videos SET status = ?, saved = 0, decoded = 0, elapsed = 0, error = NULL, "
+                                  "resume_from = 0, updated = ? WHERE source = ?",
+                                  [(PENDING, now, source) for source in sources])
+
+    def mark(self, source, status, title=None, saved=0, decoded=0, elapsed=0.0, error=None, plan=None):
+        """
+        Ghi kết quả xử lý một video (điểm tiếp tục được giữ nguyên).
+
+        :param plan: Chuỗi plan_key của lần chạy (None để giữ nguyên).
+        """
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE videos SET status = ?, title = ?, saved = ?, decoded = ?, elapsed = ?, "
+                              "error = ?, updated = ?, plan = COALESCE(?, plan) WHERE source = ?",
+                              (status, title, saved, decoded, elapsed, error, time.time(), plan, source))
+
+    def set_resume(self, source, plan, resume_from):
+        """
+        Ghi điểm tiếp tục: mọi frame cần lấy trước resume_from đã được xử lý.
+
+        :param plan: Chuỗi plan_key của lần chạy.
+        :param resume_from: Chỉ số frame.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE videos SET plan = ?, resume_from = ?, updated = ? WHERE source = ?",
+                              (plan, resume_from, time.time(), source))
+
+    def resume_point(self, source, plan):
+        """
+        :return: Chỉ số frame để tiếp tục video với cùng cách chọn frame (0 nếu chưa có).
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT plan, resume_from FROM videos WHERE source = ?", (source,)).fetchone()
+        return row[1] if row is not None and row[0] == plan else 0
+
+    def statuses(self, plan=None):
+        """
+        :param plan: Nếu có, video đã xong với cách chọn frame khác được coi là PENDING.
+        :return: Dict nguồn -> trạng thái.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT source, status, plan FROM videos").fetchall()
+        return {source: PENDING if plan is not None and status == DONE and stored != plan else status
+                for source, status, stored in rows}
+
+    def close(self):
+        """
+        Đóng kết nối SQLite.
+        """
+        with self.lock:
+            self.conn.close()
+
+def process_video(source, root, every_n, every_seconds, start, end, output_options, filter_options, hash_method,
+                  max_height, resume_from, messages, stop):
+    """
+    Tải (nếu là link) và trích xuất frame của một video (chạy trong worker process).
+
+    Bỏ qua các frame trước resume_from và các frame đã có file trong thư mục lưu.
+
+    :param source: Đường dẫn file hoặc link video.
+    :param root: Thư mục gốc của dataset.
+    :param every_n: Lấy một frame sau mỗi N frame.
+    :param every_seconds: Lấy một frame sau mỗi T giây.
+    :param start: Thời điểm bắt đầu (giây).
+    :param end: Thời điểm kết thúc (giây), None để lấy tới hết video.
+    :param output_options: Dict tham số của frame_encode.encode_frame.
+    :param filter_options: Dict tham số của FrameFilter, None để không lọc.
+    :param hash_method: Thuật toán perceptual hash cho các frame đã lưu, None để không tính.
+    :param max_height: Chiều cao tối đa khi tải video từ link.
+    :param resume_from: Chỉ số frame tiếp tục (điểm tiếp tục đã lưu của lần chạy trước).
+    :param messages: Hàng đợi (Manager.Queue) nhận tuple (nguồn, giai đoạn, đã xong, tổng,
+                     điểm tiếp tục mới hoặc None).
+    :param stop: Manager.Event; khi được set, dừng sau đoạn đang decode.
+    :return: Dict: title, saved (list tuple (chỉ số, đường dẫn, hash)), existing (số frame bỏ
+             qua vì đã xử lý), decoded, blurry, duplicates, elapsed, cancelled, cache_entries
+             (các mục cache video để process chính ghi).
+    """
+    begin = time.perf_counter()
+    cache_entries = []
+    if source.startswith("http"):
+        cache = VideoCache(deferred=True)
+        cache_entries = cache.pending
+
+        def report_download(fraction, _):
+            messages.put((source, "download", int(max(0.0, fraction) * 100), 100, None))
+        path, title, _ = download_video(source, max_height, cache, report_download, stop)
+    else:
+        path = source
+        title = os.path.splitext(os.path.basename(source))[0]
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Không mở được video: {path}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    indices = select_frames(total_frames, fps, every_n, every_seconds, start, end)
+    out_dir, short_base = frame_output(title, root)
+    existing = saved_frame_indices(out_dir, short_base)
+    remaining = [index for index in indices if index >= resume_from and index not in existing]
+    done = len(indices) - len(remaining)
+    result = {"title": title, "saved": [], "existing": done, "decoded": 0, "blurry": 0, "duplicates": 0,
+              "cancelled": False, "cache_entries": cache_entries}
+    if done:
+        messages.put((source, "extract", done, len(indices), None))
+    for seek_start, targets in plan_segments(remaining, 1):
+        if stop.is_set():
+            result["cancelled"] = True
+            break
+        decoded, saved, blurry, duplicates = extract_segment(path, seek_start, targets, out_dir, short_base,
+                                                             output_options, hash_method, filter_options)
+        result["decoded"] += decoded
+        result["saved"].extend(saved)
+        result["blurry"] += blurry
+        result["duplicates"] += duplicates
+        done += len(targets)
+        messages.put((source, "extract", done, len(indices), targets[-1] + 1))
+    result["elapsed"] = time.perf_counter() - begin
+    return result
+
+def run_batch(sources, root="dataset", every_n=None, every_seconds=None, start=0.0, end=None, output_options=None,
+              filter_options=None, hash_method=None, max_height=1080, workers=None, fresh=False,
+              progress=None, report=None, cancel_event=None):
+    """
+    Xử lý tất cả video của các nguồn bằng một process pool, bỏ qua video đã xong ở lần chạy
+    trước (với cùng cách chọn frame) và tiếp tục video dở dang từ điểm tiếp tục đã lưu.
+
+    Nếu không truyền every_n và every_seconds, lấy mọi frame trong khoảng [start, end] của mỗi video.
+
+    :param sources: List nguồn (xem expand_sources).
+    :param root: Thư mục gốc của dataset (chứa cả file trạng thái .video_batch.db).
+    :param every_n: Lấy một frame sau mỗi N frame.
+    :param every_seconds: Lấy một frame sau mỗi T giây.
+    :param start: Thời điểm bắt đầu trong mỗi video (giây).
+    :param end: Thời điểm kết thúc trong mỗi video (giây), None để lấy tới hết video.
+    :param output_options: Dict tham số của frame_encode.encode_frame; None để ghi JPEG chất lượng 95.
+    :param filter_options: Dict tham số của FrameFilter, None để không lọc.
+    :param hash_method: Thuật toán perceptual hash cho các frame đã lưu, None để không tính.
+    :param max_height: Chiều cao tối đa khi tải video từ link.
+    :param workers: Số worker process; mặc định bằng số CPU.
+    :param fresh: True để xử lý lại cả các video đã xong (frame đã có file vẫn được bỏ qua).
+    :param progress: Hàm progress(số video đã xử lý, tổng số video).
+    :param report: Hàm report(chuỗi) nhận tiến độ của từng video.
+    :param cancel_event: threading.Event; khi được set, video chưa bắt đầu bị bỏ và video đang
+                         xử lý dừng sau đoạn hiện tại.
+    :return: Dict thống kê: videos, done, failed, skipped, saved, existing, decoded, blurry,
+             duplicates, elapsed, cancelled.
+    """
+    begin = time.perf_counter()
+    items = expand_sources(sources)
+    store = BatchStore(os.path.join(root, ".video_batch.db"))
+    store.add(items)
+    if fresh:
+        store.reset(items)
+    plan = plan_key(every_n, every_seconds, start, end)
+    statuses = store.statuses(plan)
+    todo = [source for source in items if statuses.get(source) != DONE]
+    cache = None  # chỉ tạo thư mục cache khi có video tải từ link
+    stats = {"videos": len(items), "done": 0, "failed": 0, "skipped": len(items) - len(todo), "saved": [],
+             "existing": 0, "decoded": 0, "blurry": 0, "duplicates": 0, "cancelled": False}
+    if progress is not None:
+        progress(stats["skipped"], len(items))
+    workers = workers or os.cpu_count() or 1
+    with Manager() as manager, ProcessPoolExecutor(max_workers=workers) as executor:
+        messages = manager.Queue()
+        stop = manager.Event()
+        futures = {executor.submit(process_video, source, root, every_n, every_seconds, start, end, output_options,
+                                   filter_options, hash_method, max_height, store.resume_point(source, plan),
+                                   messages, stop): source
+                   for source in todo}
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            while True:
+                try:
+                    source, stage, done, total, resume_from = messages.get_nowait()
+                except queue.Empty:
+                    break
+                if resume_from is not None:
+                    store.set_resume(source, plan, resume_from)
+                if report is not None:
+                    name = os.path.basename(source) if not source.startswith("http") else source
+                    report(f"{name}: {'tải' if stage == 'download' else 'trích xuất'} {done}/{total}")
+            for future in finished:
+                if future.cancelled():
+                    continue
+                source = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    store.mark(source, FAILED, error=str(e))
+                    if report is not None:
+                        report(f"Lỗi {source}: {e}")
+                else:
+                    if result["cache_entries"] and cache is None:
+                        cache = VideoCache()
+                    for entry in result["cache_entries"]:
+                        cache.store(*entry)
+                    for key in ("existing", "decoded", "blurry", "duplicates"):
+                        stats[key] += result[key]
+                    stats["saved"].extend(result["saved"])
+                    if result["cancelled"]:
+                        store.mark(source, PENDING, result["title"])
+                    else:
+                        stats["done"] += 1
+                        store.mark(source, DONE, result["title"], len(result["saved"]), result["decoded"],
+                                   result["elapsed"], plan=plan)
+                if progress is not None:
+                    progress(stats["skipped"] + stats["done"] + stats["failed"], len(items))
+            if cancel_event is not None and cancel_event.is_set() and not stats["cancelled"]:
+                stats["cancelled"] = True
+                stop.set()
+                for future in pending:
+                    future.cancel()
+    store.close()
+    stats["elapsed"] = time.perf_counter() - begin
+    return stats
+
+def batch_summary_text(stats):
+    """
+    :param stats: Dict thống kê trả về từ run_batch.
+    :return: Chuỗi tóm tắt kết quả, gồm tốc độ decode tổng hợp (frame/s) của cả hàng đợi.
+    """
+    elapsed = stats["elapsed"] or 1e-9
+    text = (f"{stats['done']}/{stats['videos']} video xong ({stats['skipped']} đã xong từ trước, "
+            f"{stats['failed']} lỗi), lưu {len(stats['saved'])} frame trong {elapsed:.1f}s - "
+            f"{stats['decoded'] / elapsed:.1f} frame decode/s, {len(stats['saved']) / elapsed:.1f} frame lưu/s")
+    if stats["existing"]:
+        text += f", bỏ qua {stats['existing']} frame đã xử lý trước đó"
+    if stats["blurry"] or stats["duplicates"]:
+        text += f", bỏ {stats['blurry']} frame mờ và {stats['duplicates']} frame gần trùng"
+    if stats["cancelled"]:
+        text += " (đã hủy)"
+    return text
+
+def main():
+    parser = argparse.ArgumentParser(description="Tải và trích xuất frame hàng loạt từ nhiều video.")
+    parser.add_argument("sources", nargs="+", help="Thư mục, mẫu glob, link playlist/video hoặc file video")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--every-n", type=int, help="Lấy một frame sau mỗi N frame")
+    mode.add_argument("--every-seconds", type=float, help="Lấy một frame sau mỗi T giây")
+    parser.add_argument("--start", default="0", help="Thời điểm bắt đầu trong mỗi video (ss, mm:ss hoặc hh:mm:ss)")
+    parser.add_argument("--end", help="Thời điểm kết thúc trong mỗi video (mặc định: hết video)")
+    parser.add_argument("--workers", type=int, default=None, help="Số worker process (mặc định: số CPU)")
+    parser.add_argument("--max-height", type=int, default=1080, help="Chiều cao tối đa khi tải video (0: không giới hạn)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="jpg", help="Định dạng ảnh")
+    parser.add_argument("--quality", type=int, default=95, help="Chất lượng JPEG/WebP (1-100)")
+    parser.add_argument("--png-compression", type=int, default=3, help="Mức nén PNG (0-9)")
+    parser.add_argument("--max-side", type=int, default=0, help="Thu nhỏ cạnh dài nhất về giá trị này (0: giữ nguyên)")
+    parser.add_argument("--root", default="dataset", help="Thư mục gốc của dataset")
+    parser.add_argument("--filter", action="store_true", help="Bỏ frame mờ và frame gần trùng với frame vừa giữ")
+    parser.add_argument("--min-sharpness", type=float, default=60.0, help="Độ nét tối thiểu (phương sai Laplacian) khi lọc")
+    parser.add_argument("--max-distance", type=int, default=4, help="Khoảng cách Hamming tối đa để coi là trùng khi lọc")
+    parser.add_argument("--no-index", action="store_true", help="Không cập nhật chỉ mục perceptual hash của dataset")
+    parser.add_argument("--fresh", action="store_true", help="Xử lý lại cả các video đã xong ở lần chạy trước")
+    args = parser.parse_args()
+
+    def show_progress(done, total):
+        print(f"[{done}/{total} video]")
+
+    dedup_index = None if args.no_index else shared_index(args.root)
+    try:
+        stats = run_batch(args.sources, args.root, args.every_n, args.every_seconds,
+                          parse_time(args.start), parse_time(args.end) if args.end else None,
+                          {"format": args.format, "quality": args.quality,
+                           "png_compression": args.png_compression, "max_side": args.max_side},
+                          {"min_sharpness": args.min_sharpness, "max_distance": args.max_distance} if args.filter else None,
+                          dedup_index.method if dedup_index else None, args.max_height, args.workers, args.fresh,
+                          progress=show_progress, report=print)
+    except KeyboardInterrupt:
+        raise SystemExit("\nĐã dừng; chạy lại cùng lệnh để tiếp tục.")
+    if dedup_index is not None:
+        for _, filename, value in stats["saved"]:
+            dedup_index.add(filename, value)
+    print(batch_summary_text(stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+File: video_decoder.py
+Mô tả:
+    Chọn backend decode video cho tab video. Mỗi backend trả về một đối tượng có cùng giao
+    diện với cv2.VideoCapture (isOpened, grab, retrieve, read, set/get CAP_PROP_POS_FRAMES,
+    CAP_PROP_FRAME_COUNT, CAP_PROP_FPS, release), nên FrameReader, FrameCache và
+    ScrubPreviewer dùng được với mọi backend.
+
+      - opencv: cv2.VideoCapture. CAP_PROP_FRAME_COUNT và seek theo CAP_PROP_POS_FRAMES chỉ là
+        ước lượng, sai lệch với video tốc độ khung hình thay đổi (VFR, ví dụ quay bằng điện thoại).
+      - pyav: PyAV (nếu đã cài), decode đa luồng ở mức codec (frame threading). Frame được
+        đánh số theo thứ tự hiển thị (thứ tự PTS) từ bảng PTS lập bằng một lượt demux (không
+        decode), nên chỉ số luôn liên tục và khớp với việc đếm từng lần đọc tuần tự, kể cả với
+        video VFR; seek tra PTS của frame trong bảng, nhảy về keyframe trước đó rồi decode tới
+        đúng PTS đó.
+
+    Đổi giữa thời điểm và chỉ số frame bằng frame_at_time/frame_time: với PyAV tra bảng PTS
+    (đúng cả với video VFR), với OpenCV tính theo FPS trung bình.
+
+    Backend mặc định lấy từ biến môi trường VIDEO_DECODER ('auto', 'opencv' hoặc 'pyav');
+    'auto' dùng PyAV nếu đã cài, ngược lại OpenCV. Tab video cho chọn backend cho từng file.
+"""
+
+import bisect
+import os
+import threading
+from collections import OrderedDict
+import cv2
+
+try:
+    import av
+except ImportError:  # PyAV không bắt buộc
+    av = None
+
+BACKENDS = ("auto", "opencv", "pyav")
+DEFAULT_BACKEND = os.environ.get("VIDEO_DECODER", "auto")
+
+_timestamp_cache = OrderedDict()  # (đường dẫn, kích thước, mtime) -> kết quả demux_timestamps
+_timestamp_lock = threading.Lock()
+
+def demux_timestamps(path):
+    """
+    Đọc PTS của mọi frame trong luồng hình đầu tiên bằng PyAV (chỉ demux, không decode).
+
+    Kết quả được nhớ theo phiên bản file (kích thước, thời gian sửa) để các bộ decode của
+    cùng một video (tab, prefetch, xem trước) không phải demux lại.
+
+    :param path: Đường dẫn file video.
+    :return: Tuple (list PTS tăng dần, list PTS của keyframe, time_base (giây), PTS bắt đầu).
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _timestamp_lock:
+        if key in _timestamp_cache:
+            _timestamp_cache.move_to_end(key)
+            return _timestamp_cache[key]
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        timestamps = []
+        keyframes = []
+        for packet in container.demux(stream):
+            pts = packet.pts if packet.pts is not None else packet.dts
+            if pts is None or packet.size == 0:
+                continue
+            timestamps.append(pts)
+            if packet.is_keyframe:
+                keyframes.append(pts)
+        result = (sorted(set(timestamps)), sorted(set(keyframes)), float(stream.time_base), stream.start_time or 0)
+    with _timestamp_lock:
+        _timestamp_cache[key] = result
+        while len(_timestamp_cache) > 8:
+            _timestamp_cache.popitem(last=False)
+    return result
+
+def available_backends():
+    """
+    :return: List backend dùng được trong môi trường hiện tại (không gồm 'auto').
+    """
+    return ["opencv", "pyav"] if av is not None else ["opencv"]
+
+def resolve_backend(backend=None):
+    """
+    Đổi 'auto' (hoặc None: dùng DEFAULT_BACKEND) thành backend cụ thể.
+
+    :raises ValueError: Nếu backend không hợp lệ hoặc chưa cài PyAV.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "auto":
+        return "pyav" if av is not None else "opencv"
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend decode không hợp lệ: {backend}")
+    if backend == "pyav" and av is None:
+        raise ValueError("Chưa cài PyAV (pip install av)")
+    return backend
+
+def open_capture(path, backend=None):
+    """
+    Mở video bằng backend đã chọn.
+
+    :param path: Đường dẫn file video.
+    :param backend: 'auto', 'opencv', 'pyav' hoặc None (DEFAULT_BACKEND).
+    :return: Đối tượng có giao diện như cv2.VideoCapture (kiểm tra isOpened()).
+    """
+    if resolve_backend(backend) == "pyav":
+        return PyAVCapture(path)
+    return cv2.VideoCapture(path)
+
+def frame_at_time(cap, seconds):
+    """
+    Chỉ số frame đang hiển thị tại thời điểm seconds (tính từ đầu video).
+
+    :param cap: Đối tượng trả về từ open_capture.
+    :return: Chỉ số frame (PyAV: frame cuối cùng có PTS không sau thời điểm đó; OpenCV:
+             seconds * FPS trung bình, 0 nếu không biết FPS).
+    """
+    if isinstance(cap, PyAVCapture) and cap.isOpened():
+        return cap.index_at(seconds)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return int(seconds * fps) if fps > 0 else 0
+
+def frame_time(cap, index):
+    """
+    Thời điểm (giây, tính từ đầu video) của frame index; index bằng tổng số frame cho độ dài video.
+
+    :param cap: Đối tượng trả về từ open_capture.
+    :return: Số giây (PyAV: theo PTS của frame; OpenCV: index / FPS trung bình, 0 nếu không biết FPS).
+    """
+    if isinstance(cap, PyAVCapture) and cap.isOpened():
+        return cap.time_of(index)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return index / fps if fps > 0 else 0.0
+
+class PyAVCapture:
+    """
+    Đọc video bằng PyAV với giao diện như cv2.VideoCapture.
+
+    Chỉ số frame là thứ tự của PTS trong bảng PTS của video (demux_timestamps), nên đọc tuần
+    tự luôn tăng chỉ số đúng một đơn vị và seek tới một chỉ số trả về đúng frame đó, kể cả với
+    video VFR (khoảng cách PTS không đều).
+    """
+    def __init__(self, path, threads=0):
+        """
+        :param path: Đường dẫn file video.
+        :param threads: Số thread decode của codec; 0 để FFmpeg tự chọn theo số CPU.
+        """
+        self.container = None
+        self.stream = None
+        self.frames = None  # iterator frame đã decode
+        self.frame = None  # frame vừa grab (av.VideoFrame)
+        self.lookahead = None  # frame đã decode khi seek, trả về ở lần grab kế tiếp
+        self.position = 0  # chỉ số frame mà lần grab() tiếp theo sẽ trả về
+        try:
+            self.timestamps, _, _, _ = demux_timestamps(path)
+            self.ordinals = {pts: index for index, pts in enumerate(self.timestamps)}
+            self.container = av.open(path)
+            self.stream = self.container.streams.video[0]
+        except Exception as e:
+            print(f"Không mở được video bằng PyAV: {e}")
+            self.release()
+            return
+        self.stream.thread_type = "AUTO"  # frame threading và slice threading
+        self.stream.codec_context.thread_count = threads
+        self.time_base = float(self.stream.time_base)
+        self.start = self.stream.start_time or 0
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 30.0
+        self.frame_count = len(self.timestamps)
+        self.frames = self.container.decode(self.stream)
+
+    def isOpened(self):
+        """
+        :return: True nếu mở được video.
+        """
+        return self.container is not None
+
+    def _index_of(self, frame):
+        """
+        Thứ tự của frame trong bảng PTS (hoặc vị trí hiện tại nếu frame không có PTS).
+        """
+        if frame.pts is None:
+            return self.position
+        index = self.ordinals.get(frame.pts)
+        if index is None:
+            index = bisect.bisect_left(self.timestamps, frame.pts)
+        return index
+
+    def index_at(self, seconds):
+        """
+        :return: Chỉ số frame cuối cùng có PTS không sau thời điểm seconds (tra bảng PTS).
+        """
+        if not self.timestamps:
+            return 0
+        pts = seconds / self.time_base + self.start
+        return min(max(bisect.bisect_right(self.timestamps, pts + 1e-3) - 1, 0), len(self.timestamps) - 1)
+
+    def time_of(self, index):
+        """
+        :return: Thời điểm (giây) theo PTS của frame index; sau frame cuối cộng thêm theo FPS trung bình.
+        """
+        if not self.timestamps:
+            return index / self.fps
+        if index < len(self.timestamps):
+            return (self.timestamps[max(index, 0)] - self.start) * self.time_base
+        last = (self.timestamps[-1] - self.start) * self.time_base
+        return last + (index - len(self.timestamps) + 1) / self.fps
+
+    def _next(self):
+        """
+        Frame kế tiếp (ưu tiên frame đã decode khi seek), hoặc None khi hết video/lỗi.
+        """
+        if self.lookahead is not None:
+            frame, self.lookahead = self.lookahead, None
+            return frame
+        try:
+            return next(self.frames)
+        except (StopIteration, av.error.FFmpegError, ValueError):
+            return None
+
+    def grab(self):
+        """
+        Decode frame kế tiếp nhưng chưa chuyển sang mảng BGR.
+        """
+        if self.frames is None:
+            return False
+        self.frame = self._next()
+        if self.frame is None:
+            return False
+        self.position = self._index_of(self.frame) + 1
+        return True
+
+    def retrieve(self):
+        """
+        :return: Tuple (ret, frame BGR) của frame vừa grab.
+        """
+        if self.frame is None:
+            return False, None
+        return True, self.frame.to_ndarray(format="bgr24")
+
+    def read(self):
+        """
+        :return: Tuple (ret, frame BGR) của frame kế tiếp.
+        """
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def seek(self, index):
+        """
+        Seek tới đúng frame index: nhảy về keyframe trước PTS của frame (tra trong bảng PTS)
+        rồi decode bỏ các frame trước nó; frame index được giữ lại cho lần grab kế tiếp.
+        """
+        if self.container is None or not 0 <= index < len(self.timestamps):
+            return False
+        target = self.timestamps[index]
+        self.container.seek(target, stream=self.stream, backward=True, any_frame=False)
+        self.frames = self.container.decode(self.stream)
+        self.lookahead = None
+        self.frame = None
+        self.position = index
+        while True:
+            frame = self._next()
+            if frame is None:
+                return False
+            if frame.pts is None or frame.pts >= target:
+                self.lookahead = frame
+                self.position = self._index_of(frame)
+                return True
+
+    def set(self, prop, value):
+        """
+        Hỗ trợ CAP_PROP_POS_FRAMES (seek chính xác); các thuộc tính khác bị bỏ qua.
+        """
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.seek(int(value))
+        return False
+
+    def get(self, prop):
+        """
+        Hỗ trợ FRAME_COUNT, FPS, POS_FRAMES, POS_MSEC, FRAME_WIDTH, FRAME_HEIGHT.
+        """
+        if self.stream is None:
+            return 0
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.frame_count
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.position
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.time_of(self.position) * 1000
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.stream.codec_context.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.stream.codec_context.height
+        return 0
+
+    def release(self):
+        """
+        Đóng file video.
+        """
+        if self.container is not None:
+            self.container.close()
+        self.container = None
+        self.stream = None
+        self.frames = None
+        self.frame = None
+        self.lookahead = None
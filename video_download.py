@@ -0,0 +1,259 @@
+"""
+File: video_download.py
+Mô tả:
+    Tải video (YouTube và các trang yt_dlp hỗ trợ) trên worker thread, chỉ lấy luồng hình
+    (không tải audio) với độ phân giải tối đa cấu hình được, và lưu vào cache theo ID video
+    trong một thư mục quản lý riêng. Mở lại một link đã tải sẽ lấy ngay file trên đĩa mà
+    không cần gọi mạng.
+"""
+
+import json
+import os
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from yt_dlp import YoutubeDL
+from yt_dlp.extractor import gen_extractor_classes
+
+VIDEO_CACHE_DIR = "video_cache"
+
+def video_format(max_height):
+    """
+    Chuỗi chọn định dạng yt_dlp: luồng chỉ có hình (ưu tiên mp4) không cao hơn max_height;
+    nếu trang không có luồng hình riêng thì lấy luồng gộp tốt nhất trong giới hạn.
+
+    :param max_height: Chiều cao tối đa (pixel), 0 để không giới hạn.
+    """
+    limit = f"[height<={max_height}]" if max_height else ""
+    return f"bestvideo{limit}[ext=mp4]/bestvideo{limit}/best{limit}/best"
+
+def url_key(url):
+    """
+    Xác định khóa cache (extractor và ID video) từ URL mà không cần gọi mạng.
+
+    Chỉ dùng các extractor trả về một video: với extractor playlist/tab (ví dụ link
+    watch?v=A&list=P khớp YoutubeTab trước), ID là của playlist chứ không phải của video được
+    tải, nên các video khác nhau trong cùng playlist sẽ trùng khóa.
+
+    :return: Chuỗi '<extractor>_<id>' hoặc None nếu không nhận ra URL (khi đó không dùng cache
+             trước khi gọi mạng; video tải về vẫn được lưu theo ID thật).
+    """
+    for extractor in gen_extractor_classes():
+        if extractor.ie_key() == "Generic":
+            continue
+        if extractor.suitable(url):
+            if getattr(extractor, "_RETURN_TYPE", None) != "video":
+                return None
+            try:
+                return f"{extractor.ie_key()}_{extractor.get_temp_id(url)}"
+            except Exception:
+                return None
+    return None
+
+class DownloadCancelled(Exception):
+    """
+    Người dùng đã hủy tải video.
+    """
+
+class VideoCache:
+    """
+    Thư mục cache video, mỗi video được lưu theo khóa (extractor, ID) và chiều cao tối đa.
+
+    Danh mục (khóa -> file, tiêu đề) được lưu trong index.json của thư mục cache. Việc ghi
+    danh mục chỉ được khóa giữa các thread: worker process (video_batch.py) dùng chế độ
+    deferred và để process chính ghi các mục qua pending.
+    """
+    def __init__(self, root=VIDEO_CACHE_DIR, deferred=False):
+        """
+        :param root: Thư mục cache (tạo mới nếu chưa có).
+        :param deferred: True để store() chỉ ghi nhận mục mới vào pending thay vì ghi index.json.
+        """
+        self.root = root
+        self.deferred = deferred
+        self.pending = []  # tham số store() chưa ghi (chế độ deferred)
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, "index.json")
+        self.lock = threading.Lock()
+
+    def _read(self):
+        """
+        Đọc danh mục cache (dict rỗng nếu chưa có hoặc bị hỏng).
+        """
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, key, max_height):
+        """
+        :param key: Khóa từ url_key.
+        :param max_height: Chiều cao tối đa đã dùng khi tải.
+        :return: Tuple (đường dẫn file, tiêu đề) nếu đã có trong cache, ngược lại None.
+        """
+        if key is None:
+            return None
+        with self.lock:
+            entry = self._read().get(f"{key}_{max_height}")
+        if entry is None or not os.path.exists(os.path.join(self.root, entry["file"])):
+            return None
+        return os.path.join(self.root, entry["file"]), entry["title"]
+
+    def store(self, key, max_height, path, title):
+        """
+        Ghi nhận file vừa tải vào danh mục cache.
+        """
+        if self.deferred:
+            self.pending.append((key, max_height, path, title))
+            return
+        with self.lock:
+            index = self._read()
+            index[f"{key}_{max_height}"] = {"file": os.path.relpath(path, self.root), "title": title}
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, self.index_path)
+
+def download_video(url, max_height=1080, cache=None, progress=None, cancel_event=None, ydl_class=YoutubeDL):
+    """
+    Tải video (chỉ luồng hình) về thư mục cache, hoặc trả về file đã có trong cache.
+
+    :param url: Link video.
+    :param max_height: Chiều cao tối đa (pixel), 0 để không giới hạn.
+    :param cache: VideoCache; mặc định dùng thư mục VIDEO_CACHE_DIR.
+    :param progress: Hàm progress(tỉ lệ 0-1 hoặc -1 nếu chưa biết, mô tả).
+    :param cancel_event: threading.Event; khi được set, việc tải bị dừng (DownloadCancelled).
+    :param ydl_class: Lớp YoutubeDL (thay bằng lớp giả khi kiểm thử).
+    :return: Tuple (đường dẫn file, tiêu đề, True nếu lấy từ cache).
+    """
+    cache = cache or VideoCache()
+    key = url_key(url)
+    cached = cache.lookup(key, max_height)
+    if cached is not None:
+        return cached[0], cached[1], True
+
+    def hook(status):
+        if cancel_event is not None and cancel_event.is_set():
+            raise DownloadCancelled("Đã hủy tải video.")
+        if progress is None:
+            return
+        if status.get("status") == "downloading":
+            total = status.get("total_bytes") or status.get("total_bytes_estimate")
+            done = status.get("downloaded_bytes", 0)
+            speed = status.get("speed") or 0
+            fraction = done / total if total else -1
+            progress(fraction, f"{done / (1024 * 1024):.1f}/{(total or 0) / (1024 * 1024):.1f} MB, "
+                               f"{speed / (1024 * 1024):.1f} MB/s")
+        elif status.get("status") == "finished":
+            progress(1.0, "Đã tải xong, đang hoàn tất...")
+
+    ydl_opts = {
+        'format': video_format(max_height),
+        'outtmpl': os.path.join(cache.root, f'%(extractor_key)s_%(id)s_{max_height}p.%(ext)s'),
+        'quiet': True,
+        'noprogress': True,
+        'noplaylist': True,
+        'progress_hooks': [hook],
+    }
+    with ydl_class(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        filename = ydl.prepare_filename(info)
+    if not os.path.exists(filename):
+        raise Exception("Không tải được file video.")
+    title = info.get("title", "video")
+    # Lưu theo ID của video thực sự được tải; khóa từ URL (nếu có) là khóa phụ của cùng video
+    info_key = f"{info.get('extractor_key', 'video')}_{info.get('id')}"
+    cache.store(info_key, max_height, filename, title)
+    if key is not None and key != info_key:
+        cache.store(key, max_height, filename, title)
+    return filename, title, False
+
+class _DownloadSignals(QObject):
+    """
+    Tín hiệu báo tiến độ và kết quả tải video từ worker thread.
+    """
+    progress = pyqtSignal(float, str)
+    finished = pyqtSignal(str, str, bool)  # đường dẫn, tiêu đề, lấy từ cache
+    failed = pyqtSignal(str)
+
+class _DownloadTask(QRunnable):
+    """
+    Tác vụ chạy download_video trên worker thread.
+    """
+    def __init__(self, url, max_height, cache, cancel_event, signals):
+        super().__init__()
+        self.url = url
+        self.max_height = max_height
+        self.cache = cache
+        self.cancel_event = cancel_event
+        self.signals = signals
+
+    def run(self):
+        """
+        Tải video và phát finished hoặc failed.
+        """
+        try:
+            path, title, cached = download_video(self.url, self.max_height, self.cache,
+                                                 self.signals.progress.emit, self.cancel_event)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(path, title, cached)
+
+class VideoDownloader(QObject):
+    """
+    Điều phối việc tải video nền cho tab video.
+
+    Phát progress(tỉ lệ, mô tả), finished(đường dẫn, tiêu đề, lấy từ cache) hoặc failed(lỗi)
+    trên thread giao diện.
+    """
+    progress = pyqtSignal(float, str)
+    finished = pyqtSignal(str, str, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, cache=None, parent=None):
+        """
+        :param cache: VideoCache; mặc định dùng thư mục VIDEO_CACHE_DIR.
+        """
+        super().__init__(parent)
+        self.cache = cache or VideoCache()
+        self.cancel_event = None
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _DownloadSignals()
+        self.signals.progress.connect(self.progress)
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+
+    def is_busy(self):
+        """
+        :return: True nếu đang tải.
+        """
+        return self.cancel_event is not None
+
+    def start(self, url, max_height):
+        """
+        Bắt đầu tải (hoặc lấy từ cache) video của url.
+        """
+        self.cancel_event = threading.Event()
+        self.pool.start(_DownloadTask(url, max_height, self.cache, self.cancel_event, self.signals))
+
+    def cancel(self):
+        """
+        Hủy lần tải đang chạy (dừng ở lần cập nhật tiến độ tiếp theo của yt_dlp).
+        """
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+
+    def _on_finished(self, path, title, cached):
+        """
+        Kết thúc lần tải và chuyển tiếp kết quả.
+        """
+        self.cancel_event = None
+        self.finished.emit(path, title, cached)
+
+    def _on_failed(self, error):
+        """
+        Kết thúc lần tải lỗi (hoặc bị hủy) và chuyển tiếp lỗi.
+        """
+        self.cancel_event = None
+        self.failed.emit(error)
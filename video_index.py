@@ -0,0 +1,368 @@
+"""
+File: video_index.py
+Mô tả:
+    Chỉ mục của một video, được lập một lần trên worker thread khi mở video:
+      - Danh sách keyframe (chỉ số frame và thời điểm), dùng để lập kế hoạch seek: decode từ
+        một keyframe chỉ tốn một frame, còn seek tới frame ở giữa GOP phải decode lại từ
+        keyframe trước đó.
+      - Dải ảnh thu nhỏ (thumbnail strip) ở các vị trí cách đều, dùng để xem trước khi rê
+        chuột trên slider.
+
+    Keyframe được đọc từ header của packet (chỉ demux, không decode): bằng PyAV nếu đã cài
+    (chỉ số frame là thứ tự PTS, cùng cách đánh số với backend PyAV của video_decoder.py),
+    ngược lại bằng chế độ đọc packet thô của OpenCV. Chỉ mục ghi lại backend đã đánh số
+    keyframe (VideoIndex.backend); chỉ số keyframe chỉ dùng được với bộ decode cùng backend.
+    Vị trí thumbnail được làm tròn về keyframe gần nhất để mỗi thumbnail chỉ cần decode một frame.
+
+    Chỉ mục được lưu cạnh video (.<tên_file>.index.npz) cùng kích thước và thời gian sửa file;
+    lần mở sau đọc lại ngay nếu file video không đổi.
+
+    Chạy không cần giao diện:
+        python video_index.py video.mp4
+"""
+
+import argparse
+import bisect
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from video_decoder import av, demux_timestamps
+
+INDEX_VERSION = 3
+
+def index_path(video_path):
+    """
+    :return: Đường dẫn file chỉ mục cạnh video.
+    """
+    folder, name = os.path.split(os.path.abspath(video_path))
+    return os.path.join(folder, f".{name}.index.npz")
+
+def _scan_keyframes_av(path, fps):
+    """
+    Đọc keyframe bằng PyAV (demux); chỉ số frame là thứ tự PTS của keyframe trong bảng PTS.
+    """
+    timestamps, keyframes, time_base, origin = demux_timestamps(path)
+    frames = [bisect.bisect_left(timestamps, pts) for pts in keyframes]
+    return frames, [(pts - origin) * time_base for pts in keyframes]
+
+def _scan_keyframes_cv(path, fps):
+    """
+    Đọc keyframe bằng chế độ packet thô của OpenCV (CAP_PROP_FORMAT = -1, không decode).
+    """
+    cap = cv2.VideoCapture(path)
+    times = []
+    try:
+        if not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            return [], []
+        while cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                times.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+    finally:
+        cap.release()
+    times.sort()
+    return [round(t * fps) for t in times], times
+
+def scan_keyframes(path, fps):
+    """
+    Liệt kê keyframe của luồng hình.
+
+    :param path: Đường dẫn file video.
+    :param fps: FPS của video (để đổi thời điểm sang chỉ số frame).
+    :return: Tuple (list chỉ số frame tăng dần, list thời điểm (giây)); rỗng nếu không đọc được.
+    """
+    frames, times, _ = _scan_keyframes(path, fps)
+    return frames, times
+
+def _scan_keyframes(path, fps):
+    """
+    Như scan_keyframes, kèm backend đã đánh số keyframe ('pyav' hoặc 'opencv').
+    """
+    if av is not None:
+        try:
+            frames, times = _scan_keyframes_av(path, fps)
+        except Exception as e:
+            print(f"Lỗi đọc keyframe bằng PyAV, chuyển sang OpenCV: {e}")
+        else:
+            return _dedupe(frames, times) + ("pyav",)
+    return _dedupe(*_scan_keyframes_cv(path, fps)) + ("opencv",)
+
+def _dedupe(frames, times):
+    """
+    Bỏ các keyframe trùng chỉ số frame (giữ thứ tự).
+    """
+    kept_frames, kept_times = [], []
+    for frame, moment in zip(frames, times):
+        if not kept_frames or frame != kept_frames[-1]:
+            kept_frames.append(frame)
+            kept_times.append(moment)
+    return kept_frames, kept_times
+
+def snap_to_keyframes(points, keyframes, tolerance):
+    """
+    Làm tròn mỗi vị trí về keyframe gần nhất nếu cách không quá tolerance frame.
+
+    :param points: List chỉ số frame tăng dần.
+    :param keyframes: List chỉ số keyframe tăng dần.
+    :param tolerance: Khoảng cách tối đa (frame).
+    :return: List chỉ số frame tăng dần, không trùng.
+    """
+    snapped = []
+    for point in points:
+        if keyframes:
+            position = bisect.bisect_left(keyframes, point)
+            nearest = min(keyframes[max(0, position - 1):position + 1], key=lambda k: abs(k - point))
+            if abs(nearest - point) <= tolerance:
+                point = nearest
+        if not snapped or point > snapped[-1]:
+            snapped.append(point)
+    return snapped
+
+class VideoIndex:
+    """
+    Keyframe và dải ảnh thu nhỏ của một video.
+    """
+    def __init__(self, keyframes, keyframe_times, thumb_frames, thumbnails, backend="opencv"):
+        """
+        :param keyframes: List chỉ số keyframe tăng dần.
+        :param keyframe_times: List thời điểm (giây) tương ứng.
+        :param thumb_frames: List chỉ số frame của từng thumbnail, tăng dần.
+        :param thumbnails: Mảng uint8 [số thumbnail, cao, rộng, 3] (BGR).
+        :param backend: Backend decode có cùng cách đánh số với chỉ số keyframe ('pyav' hoặc 'opencv').
+        """
+        self.backend = backend
+        self.keyframes = list(keyframes)
+        self.keyframe_times = list(keyframe_times)
+        self.thumb_frames = list(thumb_frames)
+        self.thumbnails = thumbnails
+
+    def keyframe_before(self, index):
+        """
+        :return: Keyframe cuối cùng không sau index, hoặc None nếu không có.
+        """
+        position = bisect.bisect_right(self.keyframes, index) - 1
+        return self.keyframes[position] if position >= 0 else None
+
+    def thumbnail_at(self, index):
+        """
+        :return: Tuple (chỉ số frame, thumbnail BGR) gần index nhất, hoặc None nếu không có.
+        """
+        if not self.thumb_frames:
+            return None
+        position = bisect.bisect_left(self.thumb_frames, index)
+        candidates = range(max(0, position - 1), min(len(self.thumb_frames), position + 1))
+        best = min(candidates, key=lambda i: abs(self.thumb_frames[i] - index))
+        return self.thumb_frames[best], self.thumbnails[best]
+
+    def save(self, filename, size, mtime):
+        """
+        Ghi chỉ mục ra file; dải thumbnail được nén thành một ảnh JPEG.
+
+        :param size: Kích thước file video (byte) khi lập chỉ mục.
+        :param mtime: Thời gian sửa file video (ns) khi lập chỉ mục.
+        """
+        strip = b""
+        if len(self.thumbnails):
+            ok, encoded = cv2.imencode(".jpg", np.concatenate(list(self.thumbnails), axis=1),
+                                       [cv2.IMWRITE_JPEG_QUALITY, 85])
+            strip = encoded.tobytes() if ok else b""
+        temp_path = filename + ".tmp.npz"
+        np.savez(temp_path,
+                 meta=np.array([INDEX_VERSION, size, mtime], dtype=np.int64),
+                 keyframes=np.array(self.keyframes, dtype=np.int64),
+                 keyframe_times=np.array(self.keyframe_times, dtype=np.float64),
+                 thumb_frames=np.array(self.thumb_frames, dtype=np.int64),
+                 backend=np.array(self.backend),
+                 strip=np.frombuffer(strip, dtype=np.uint8))
+        os.replace(temp_path, filename)
+
+    @classmethod
+    def load(cls, filename, size, mtime):
+        """
+        Đọc chỉ mục đã lưu.
+
+        :return: VideoIndex, hoặc None nếu chưa có, lỗi, hoặc lập cho phiên bản khác của file video.
+        """
+        try:
+            with np.load(filename) as data:
+                if data["meta"].tolist() != [INDEX_VERSION, size, mtime]:
+                    return None
+                thumb_frames = data["thumb_frames"].tolist()
+                thumbnails = np.zeros((0, 0, 0, 3), dtype=np.uint8)
+                if thumb_frames:
+                    strip = cv2.imdecode(data["strip"], cv2.IMREAD_COLOR)
+                    if strip is None:
+                        return None
+                    thumbnails = np.stack(np.split(strip, len(thumb_frames), axis=1))
+                return cls(data["keyframes"].tolist(), data["keyframe_times"].tolist(), thumb_frames, thumbnails,
+                           str(data["backend"]))
+        except (OSError, ValueError, KeyError):
+            return None
+
+def build_index(path, thumb_width=160, max_thumbs=240, cancel_event=None):
+    """
+    Lập chỉ mục cho video: đọc keyframe rồi decode các thumbnail.
+
+    Thumbnail cách nhau ít nhất một giây (và không quá max_thumbs ảnh), mỗi vị trí được làm
+    tròn về keyframe gần nhất trong nửa khoảng cách. Vị trí không phải keyframe và đủ gần
+    vị trí trước được đọc tuần tự thay vì seek.
+
+    :param path: Đường dẫn file video.
+    :param thumb_width: Chiều rộng thumbnail (pixel).
+    :param max_thumbs: Số thumbnail tối đa.
+    :param cancel_event: threading.Event; khi được set, trả về None.
+    :return: VideoIndex, hoặc None nếu bị hủy.
+    :raises ValueError: Nếu không mở được video.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Không mở được video: {path}")
+    try:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or thumb_width
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or thumb_width
+        keyframes, keyframe_times, backend = _scan_keyframes(path, fps)
+        interval = max(1, round(fps), -(-total_frames // max_thumbs))
+        points = snap_to_keyframes(range(0, max(0, total_frames - 1) + 1, interval), keyframes, interval // 2)
+        thumb_size = (thumb_width, max(1, height * thumb_width // width))
+        keyset = set(keyframes)
+        thumb_frames = []
+        thumbnails = []
+        position = -1  # vị trí mà lần read() tiếp theo sẽ trả về, -1 nếu chưa biết
+        for point in points:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            # Thumbnail tại keyframe: seek chỉ decode một frame; ngược lại đọc tuần tự nếu gần
+            if position == point or (0 <= position < point and point not in keyset
+                                     and point - position <= interval):
+                while position < point and cap.grab():
+                    position += 1
+            else:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, point)
+            ret, frame = cap.read()
+            if not ret:
+                position = -1
+                continue
+            position = point + 1
+            thumb_frames.append(point)
+            thumbnails.append(cv2.resize(frame, thumb_size, interpolation=cv2.INTER_AREA))
+    finally:
+        cap.release()
+    thumbnails = np.stack(thumbnails) if thumbnails else np.zeros((0, thumb_size[1], thumb_width, 3), dtype=np.uint8)
+    return VideoIndex(keyframes, keyframe_times, thumb_frames, thumbnails, backend)
+
+def load_or_build(path, thumb_width=160, max_thumbs=240, cancel_event=None):
+    """
+    Đọc chỉ mục đã lưu cạnh video nếu file video không đổi (kích thước, thời gian sửa),
+    ngược lại lập mới và lưu lại (bỏ qua nếu không ghi được vào thư mục của video).
+
+    :return: Tuple (VideoIndex hoặc None nếu bị hủy, True nếu đọc từ file đã lưu).
+    """
+    stat = os.stat(path)
+    filename = index_path(path)
+    index = VideoIndex.load(filename, stat.st_size, stat.st_mtime_ns)
+    if index is not None:
+        return index, True
+    index = build_index(path, thumb_width, max_thumbs, cancel_event)
+    if index is not None:
+        try:
+            index.save(filename, stat.st_size, stat.st_mtime_ns)
+        except OSError as e:
+            print(f"Không lưu được chỉ mục video: {e}")
+    return index, False
+
+class _IndexSignals(QObject):
+    """
+    Tín hiệu báo kết quả lập chỉ mục từ worker thread.
+    """
+    finished = pyqtSignal(int, object, bool, str)  # generation, VideoIndex hoặc None, từ file đã lưu, lỗi
+
+class _IndexTask(QRunnable):
+    """
+    Tác vụ chạy load_or_build trên worker thread.
+    """
+    def __init__(self, path, generation, cancel_event, signals):
+        super().__init__()
+        self.path = path
+        self.generation = generation
+        self.cancel_event = cancel_event
+        self.signals = signals
+
+    def run(self):
+        """
+        Đọc hoặc lập chỉ mục và phát finished.
+        """
+        try:
+            index, cached = load_or_build(self.path, cancel_event=self.cancel_event)
+        except Exception as e:
+            self.signals.finished.emit(self.generation, None, False, str(e))
+            return
+        self.signals.finished.emit(self.generation, index, cached, "")
+
+class VideoIndexer(QObject):
+    """
+    Lập chỉ mục video nền cho tab video; chỉ kết quả của video mở gần nhất được phát ra.
+
+    Phát ready(VideoIndex, đọc từ file đã lưu) hoặc failed(lỗi) trên thread giao diện.
+    """
+    ready = pyqtSignal(object, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+        self.cancel_event = None
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _IndexSignals()
+        self.signals.finished.connect(self._on_finished)
+
+    def start(self, path):
+        """
+        Bắt đầu lập chỉ mục cho video path (hủy lần lập chỉ mục của video trước).
+        """
+        self.cancel()
+        self.generation += 1
+        self.cancel_event = threading.Event()
+        self.pool.start(_IndexTask(path, self.generation, self.cancel_event, self.signals))
+
+    def cancel(self):
+        """
+        Hủy lần lập chỉ mục đang chạy.
+        """
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+
+    def _on_finished(self, generation, index, cached, error):
+        """
+        Bỏ kết quả của video cũ và chuyển tiếp kết quả của video hiện tại.
+        """
+        if generation != self.generation:
+            return
+        self.cancel_event = None
+        if error:
+            self.failed.emit(error)
+        elif index is not None:
+            self.ready.emit(index, cached)
+
+def main():
+    parser = argparse.ArgumentParser(description="Lập chỉ mục keyframe và dải thumbnail cho video.")
+    parser.add_argument("video", help="Đường dẫn file video")
+    parser.add_argument("--rebuild", action="store_true", help="Lập lại kể cả khi đã có chỉ mục")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(index_path(args.video)):
+        os.remove(index_path(args.video))
+    begin = time.perf_counter()
+    index, cached = load_or_build(args.video)
+    elapsed = time.perf_counter() - begin
+    source = "đọc từ file đã lưu" if cached else f"lập mới ({'PyAV' if index.backend == 'pyav' else 'OpenCV'})"
+    print(f"{len(index.keyframes)} keyframe, {len(index.thumb_frames)} thumbnail, {source} trong {elapsed:.2f}s")
+    print(f"Chỉ mục: {index_path(args.video)}")
+
+if __name__ == "__main__":
+    main()
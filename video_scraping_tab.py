@@ -6,12 +6,65 @@ Mô tả:
 """
 
 import os
+import threading
 import cv2
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QFileDialog, QSlider, QMessageBox
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QImage
-from yt_dlp import YoutubeDL
-from utils import format_time, parse_time, sanitize_filename
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QFileDialog, QSlider,
+                             QMessageBox, QCheckBox, QSpinBox, QComboBox, QDoubleSpinBox, QProgressBar)
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QPixmap
+from utils import format_time, parse_time
+from dedup_index import shared_index
+from index_warmup import warm_up_index
+from frame_reader import FrameReader
+from frame_cache import FrameCache, BackwardPrefetcher
+from scrub_preview import ScrubPreviewer
+from frame_extractor import frame_output, select_frames, extract_frames, summary_text
+from scene_detect import detect_scenes, representative_frames
+from timeline_slider import TimelineSlider
+from frame_filter import FrameFilter
+from frame_writer import FrameWriter
+from video_download import VideoDownloader
+from video_index import VideoIndexer
+from frame_display import FrameDisplay
+from video_batch import run_batch, batch_summary_text
+from video_decoder import DEFAULT_BACKEND, available_backends, resolve_backend, open_capture, frame_at_time, frame_time
+
+class _JobSignals(QObject):
+    """
+    Tín hiệu báo tiến độ và kết quả của một tác vụ nền (trích xuất frame, phát hiện chuyển cảnh).
+    """
+    progress = pyqtSignal(int, int)  # số frame (hoặc video) đã xử lý, tổng
+    finished = pyqtSignal(dict)  # kết quả của hàm (hoặc {"error": ...})
+    message = pyqtSignal(str)  # dòng trạng thái chi tiết (tiến độ từng video của batch)
+
+class _JobTask(QRunnable):
+    """
+    Chạy một hàm điều phối process pool (extract_frames, detect_scenes, run_batch) trên thread nền.
+    """
+    def __init__(self, signals, cancel_event, func, *args, **kwargs):
+        """
+        :param signals: Đối tượng _JobSignals.
+        :param cancel_event: threading.Event để hủy.
+        :param func: Hàm nhận thêm tham số progress và cancel_event, trả về dict.
+        Các tham số còn lại được chuyển cho func.
+        """
+        super().__init__()
+        self.signals = signals
+        self.cancel_event = cancel_event
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        """
+        Chạy hàm và báo tiến độ qua signals.
+        """
+        try:
+            result = self.func(*self.args, progress=self.signals.progress.emit,
+                               cancel_event=self.cancel_event, **self.kwargs)
+        except Exception as e:
+            result = {"error": str(e)}
+        self.signals.finished.emit(result)
 
 class VideoScrapingTab(QWidget):
     """
@@ -27,20 +80,78 @@ class VideoScrapingTab(QWidget):
         Khởi tạo widget VideoScrapingTab.
         """
         super().__init__(parent)
-        self.cap = None
+        self.cap = None  # bộ decode của video hiện tại (cv2.VideoCapture hoặc tương đương, xem video_decoder.py)
+        self.decoder_backend = None
+        self.reader = None  # FrameReader đọc tuần tự, chỉ seek khi nhảy xa
         self.current_frame_index = 0
+        # Mọi thao tác điều hướng đi qua request_frame: chỉ frame được yêu cầu sau cùng được
+        # decode (ở lượt xử lý sự kiện kế tiếp), yêu cầu trùng frame đang hiển thị bị bỏ qua
+        self.pending_frame = None  # frame đang chờ hiển thị
+        self.displayed_index = None  # frame chính xác đang hiển thị (None nếu đang là ảnh xem trước)
+        self.frame_requests = 0  # số yêu cầu frame
+        self.superseded_requests = 0  # số yêu cầu bị thay bởi yêu cầu mới hơn trước khi hiển thị
+        self.frame_loads = 0  # số lần phải decode (không có trong cache)
         self.total_frames = 0
         self.current_frame = None
         self.fps = 0  # FPS của video
+        self.video_path = None
+        # Cache frame đã decode quanh vị trí đang xem, và worker decode trước đoạn phía sau
+        self.frame_cache = FrameCache()
+        # Thu nhỏ frame về kích thước label trước khi tạo QPixmap, dùng lại buffer giữa các frame
+        self.frame_display = FrameDisplay()
+        self.backward_prefetcher = BackwardPrefetcher(self.frame_cache, parent=self)
+        # Ảnh xem trước khi kéo slider (decode trên worker, chỉ giữ vị trí kéo mới nhất)
+        self.scrubber = ScrubPreviewer(parent=self)
+        self.scrubber.preview_ready.connect(self.on_scrub_preview)
+        # Trích xuất hàng loạt và phát hiện chuyển cảnh chạy trên thread nền (điều phối process pool),
+        # mỗi lúc chỉ một tác vụ
+        self.job_pool = QThreadPool(self)
+        self.job_pool.setMaxThreadCount(1)
+        self.job_cancel = None
+        self.extraction_signals = _JobSignals()
+        self.extraction_signals.progress.connect(self.on_job_progress)
+        self.extraction_signals.finished.connect(self.on_extraction_finished)
+        self.scene_signals = _JobSignals()
+        self.scene_signals.progress.connect(self.on_job_progress)
+        self.scene_signals.finished.connect(self.on_scenes_detected)
+        self.batch_signals = _JobSignals()
+        self.batch_signals.progress.connect(self.on_job_progress)
+        self.batch_signals.message.connect(self.on_batch_message)
+        self.batch_signals.finished.connect(self.on_batch_finished)
+        self.shots = []  # các cảnh (frame đầu, frame cuối không bao gồm) của video hiện tại
+        # Bộ lọc frame mờ/gần trùng với frame vừa lưu cho Save Frame
+        self.frame_filter = FrameFilter()
+        # Encode và ghi frame trên worker thread thay vì thread giao diện
+        self.frame_writer = FrameWriter(parent=self)
+        self.frame_writer.written.connect(self.on_frame_written)
+        # Chỉ mục perceptual hash của dataset để bỏ qua frame gần trùng với ảnh đã lưu
+        self.dedup_index = shared_index("dataset")
+        warm_up_index(self.dedup_index)
+        # Tải video từ link trên worker thread (chỉ luồng hình, có cache theo ID video)
+        self.downloader = VideoDownloader(parent=self)
+        self.downloader.progress.connect(self.on_download_progress)
+        self.downloader.finished.connect(self.on_download_finished)
+        self.downloader.failed.connect(self.on_download_failed)
+        # Chỉ mục keyframe và dải thumbnail của video, lập nền một lần và lưu cạnh video
+        self.indexer = VideoIndexer(parent=self)
+        self.indexer.ready.connect(self.on_index_ready)
+        self.indexer.failed.connect(self.on_index_failed)
+        self.keyframes = None  # chỉ số keyframe của video hiện tại (None nếu chưa có chỉ mục)
         self.initUI()
 
     def initUI(self):
         """
         Thiết lập giao diện của tab Video Scraping:
-          - Ô nhập link/file video, nút browse và load video.
+          - Ô nhập link/file video, nút browse và load video, độ phân giải tối đa khi tải,
+            tiến độ tải và backend decode.
           - Label hiển thị frame.
           - Slider điều chỉnh frame và hiển thị thời gian.
-          - Nút điều hướng (Previous/Next) và lưu frame.
+          - Nút điều hướng (Previous/Next), lưu frame và tùy chọn bỏ qua frame gần trùng.
+          - Tùy chọn lọc frame mờ và frame gần trùng với frame vừa lưu.
+          - Định dạng ảnh khi lưu (JPEG/PNG/WebP, chất lượng, thu nhỏ) và dòng trạng thái lưu frame.
+          - Trích xuất hàng loạt frame (mỗi N frame, mỗi T giây hoặc mọi frame trong khoảng thời gian).
+          - Phát hiện chuyển cảnh (đánh dấu trên slider) và xuất frame đại diện cho mỗi cảnh.
+          - Xử lý hàng loạt nhiều video (thư mục, glob, playlist) bằng process pool.
         """
         layout = QVBoxLayout()
 
@@ -57,6 +168,34 @@ class VideoScrapingTab(QWidget):
         input_layout.addWidget(self.load_button)
         layout.addLayout(input_layout)
 
+        # Độ phân giải tối đa khi tải từ link và tiến độ tải
+        download_layout = QHBoxLayout()
+        download_layout.addWidget(QLabel("Max resolution:"))
+        self.resolution_combo = QComboBox()
+        for text, height in [("360p", 360), ("480p", 480), ("720p", 720), ("1080p", 1080), ("Best", 0)]:
+            self.resolution_combo.addItem(text, height)
+        self.resolution_combo.setCurrentIndex(3)
+        download_layout.addWidget(self.resolution_combo)
+        self.download_progress = QProgressBar()
+        self.download_progress.setRange(0, 1000)
+        self.download_progress.setTextVisible(False)
+        download_layout.addWidget(self.download_progress)
+        self.download_status = QLabel("")
+        download_layout.addWidget(self.download_status)
+        self.cancel_download_button = QPushButton("Cancel")
+        self.cancel_download_button.setEnabled(False)
+        self.cancel_download_button.clicked.connect(self.downloader.cancel)
+        download_layout.addWidget(self.cancel_download_button)
+        download_layout.addWidget(QLabel("Decoder:"))
+        self.decoder_combo = QComboBox()
+        self.decoder_combo.addItem("Auto", "auto")
+        for backend in available_backends():
+            self.decoder_combo.addItem({"opencv": "OpenCV", "pyav": "PyAV"}[backend], backend)
+        self.decoder_combo.setCurrentIndex(max(0, self.decoder_combo.findData(DEFAULT_BACKEND)))
+        self.decoder_combo.setToolTip("Backend decode cho video được mở tiếp theo")
+        download_layout.addWidget(self.decoder_combo)
+        layout.addLayout(download_layout)
+
         # Label hiển thị frame
         self.frame_label = QLabel("Frame sẽ hiển thị ở đây")
         self.frame_label.setFixedSize(600, 400)
@@ -65,17 +204,33 @@ class VideoScrapingTab(QWidget):
         layout.addWidget(self.frame_label)
 
         # Thanh trượt để điều chỉnh frame
-        self.frame_slider = QSlider(Qt.Horizontal)
+        self.frame_slider = TimelineSlider()
         self.frame_slider.setMinimum(0)
         self.frame_slider.setMaximum(0)
         self.frame_slider.setTickPosition(QSlider.TicksBelow)
         self.frame_slider.setTickInterval(10)
         self.frame_slider.valueChanged.connect(self.slider_moved)
+        self.frame_slider.sliderReleased.connect(self.slider_released)
         layout.addWidget(self.frame_slider)
         
         # Nhãn hiển thị thời gian
         self.time_label = QLabel("Time: 00:00 / 00:00")
         layout.addWidget(self.time_label)
+
+        # Nhãn thống kê tốc độ decode frame và dung lượng cache frame
+        stats_layout = QHBoxLayout()
+        self.decode_label = QLabel("")
+        stats_layout.addWidget(self.decode_label, 1)
+        self.index_label = QLabel("")
+        stats_layout.addWidget(self.index_label)
+        stats_layout.addWidget(QLabel("Frame cache (MB):"))
+        self.cache_spin = QSpinBox()
+        self.cache_spin.setRange(64, 16384)
+        self.cache_spin.setSingleStep(64)
+        self.cache_spin.setValue(self.frame_cache.max_bytes // (1024 * 1024))
+        self.cache_spin.valueChanged.connect(lambda mb: self.frame_cache.set_max_bytes(mb * 1024 * 1024))
+        stats_layout.addWidget(self.cache_spin)
+        layout.addLayout(stats_layout)
         
         # Widget nhập thời gian để nhảy đến frame tương ứng
         time_input_layout = QHBoxLayout()
@@ -99,8 +254,115 @@ class VideoScrapingTab(QWidget):
         self.save_button = QPushButton("Save Frame")
         self.save_button.clicked.connect(self.save_frame)
         nav_layout.addWidget(self.save_button)
+        self.skip_duplicates_check = QCheckBox("Bỏ qua frame gần trùng")
+        self.skip_duplicates_check.setChecked(True)
+        nav_layout.addWidget(self.skip_duplicates_check)
         layout.addLayout(nav_layout)
 
+        # Lọc frame mờ và frame gần trùng với frame vừa lưu (áp dụng cho Save Frame và trích xuất)
+        filter_layout = QHBoxLayout()
+        self.filter_check = QCheckBox("Lọc frame mờ/trùng liên tiếp")
+        filter_layout.addWidget(self.filter_check)
+        filter_layout.addWidget(QLabel("Độ nét tối thiểu:"))
+        self.sharpness_spin = QDoubleSpinBox()
+        self.sharpness_spin.setRange(0, 10000)
+        self.sharpness_spin.setDecimals(0)
+        self.sharpness_spin.setValue(self.frame_filter.min_sharpness)
+        filter_layout.addWidget(self.sharpness_spin)
+        filter_layout.addWidget(QLabel("Hamming tối đa:"))
+        self.distance_spin = QSpinBox()
+        self.distance_spin.setRange(0, 32)
+        self.distance_spin.setValue(self.frame_filter.max_distance)
+        filter_layout.addWidget(self.distance_spin)
+        filter_layout.addStretch(1)
+        layout.addLayout(filter_layout)
+
+        # Định dạng ảnh khi lưu frame (Save Frame và trích xuất hàng loạt)
+        output_layout = QHBoxLayout()
+        output_layout.addWidget(QLabel("Định dạng:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("JPEG", "jpg")
+        self.format_combo.addItem("PNG", "png")
+        self.format_combo.addItem("WebP", "webp")
+        output_layout.addWidget(self.format_combo)
+        output_layout.addWidget(QLabel("Chất lượng:"))
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(1, 100)
+        self.quality_spin.setValue(95)
+        output_layout.addWidget(self.quality_spin)
+        output_layout.addWidget(QLabel("Nén PNG:"))
+        self.png_compression_spin = QSpinBox()
+        self.png_compression_spin.setRange(0, 9)
+        self.png_compression_spin.setValue(3)
+        output_layout.addWidget(self.png_compression_spin)
+        output_layout.addWidget(QLabel("Cạnh tối đa (0: giữ nguyên):"))
+        self.max_side_spin = QSpinBox()
+        self.max_side_spin.setRange(0, 16384)
+        self.max_side_spin.setSingleStep(128)
+        output_layout.addWidget(self.max_side_spin)
+        output_layout.addStretch(1)
+        layout.addLayout(output_layout)
+
+        # Thông báo kết quả lưu frame (không chặn giao diện)
+        self.save_status = QLabel("")
+        layout.addWidget(self.save_status)
+
+        # Trích xuất hàng loạt frame
+        extract_layout = QHBoxLayout()
+        extract_layout.addWidget(QLabel("Extract:"))
+        self.extract_mode_combo = QComboBox()
+        self.extract_mode_combo.addItems(["Mỗi N frame", "Mỗi T giây", "Mọi frame trong khoảng"])
+        self.extract_mode_combo.currentIndexChanged.connect(self.extract_mode_changed)
+        extract_layout.addWidget(self.extract_mode_combo)
+        self.extract_value_spin = QDoubleSpinBox()
+        self.extract_value_spin.setRange(1, 100000)
+        self.extract_value_spin.setDecimals(0)
+        self.extract_value_spin.setValue(30)
+        extract_layout.addWidget(self.extract_value_spin)
+        extract_layout.addWidget(QLabel("Từ:"))
+        self.extract_start_input = QLineEdit()
+        self.extract_start_input.setPlaceholderText("đầu video")
+        extract_layout.addWidget(self.extract_start_input)
+        extract_layout.addWidget(QLabel("Đến:"))
+        self.extract_end_input = QLineEdit()
+        self.extract_end_input.setPlaceholderText("cuối video")
+        extract_layout.addWidget(self.extract_end_input)
+        self.extract_button = QPushButton("Extract")
+        self.extract_button.clicked.connect(self.start_extraction)
+        extract_layout.addWidget(self.extract_button)
+        self.cancel_extract_button = QPushButton("Cancel")
+        self.cancel_extract_button.setEnabled(False)
+        self.cancel_extract_button.clicked.connect(self.cancel_extraction)
+        extract_layout.addWidget(self.cancel_extract_button)
+        layout.addLayout(extract_layout)
+
+        # Phát hiện chuyển cảnh và xuất frame đại diện cho mỗi cảnh
+        scene_layout = QHBoxLayout()
+        self.detect_scenes_button = QPushButton("Detect Scenes")
+        self.detect_scenes_button.clicked.connect(self.start_scene_detection)
+        scene_layout.addWidget(self.detect_scenes_button)
+        scene_layout.addWidget(QLabel("Frame/cảnh:"))
+        self.frames_per_shot_spin = QSpinBox()
+        self.frames_per_shot_spin.setRange(1, 20)
+        scene_layout.addWidget(self.frames_per_shot_spin)
+        self.export_shots_button = QPushButton("Export Shots")
+        self.export_shots_button.setEnabled(False)
+        self.export_shots_button.clicked.connect(self.export_shots)
+        scene_layout.addWidget(self.export_shots_button)
+        self.batch_button = QPushButton("Batch...")
+        self.batch_button.setToolTip("Trích xuất frame (theo chế độ và khoảng thời gian của hàng Extract) cho mọi video của thư mục, "
+                                     "mẫu glob hoặc link playlist trong ô nhập; để trống để chọn thư mục")
+        self.batch_button.clicked.connect(self.start_batch)
+        scene_layout.addWidget(self.batch_button)
+        scene_layout.addStretch(1)
+        layout.addLayout(scene_layout)
+        self.extract_progress = QProgressBar()
+        self.extract_progress.setFormat("%v/%m frame")
+        self.extract_progress.setValue(0)
+        layout.addWidget(self.extract_progress)
+        self.extract_status = QLabel("")
+        layout.addWidget(self.extract_status)
+
         self.setLayout(layout)
 
     def slider_moved(self, value):
@@ -108,20 +370,96 @@ class VideoScrapingTab(QWidget):
         Xử lý sự kiện khi thanh trượt (slider) di chuyển.
         
         Cập nhật frame hiện tại và thời gian hiển thị.
+        Khi đang kéo slider, chỉ hiển thị frame có sẵn trong cache hoặc ảnh xem trước
+        của điểm neo gần nhất (decode trên worker); frame chính xác được decode khi thả slider.
         
         :param value: Vị trí frame tương ứng với giá trị slider.
         """
         self.current_frame_index = value
-        self.show_frame(value)
         self.update_time_label()
+        if self.frame_slider.isSliderDown():
+            frame = self.frame_cache.get(value)
+            if frame is not None:
+                self.current_frame = frame
+                self.display_frame(frame)
+                self.displayed_index = value
+            else:
+                self.scrubber.request(value)
+            return
+        self.request_frame(value)
+
+    def slider_released(self):
+        """
+        Khi thả slider, bỏ các ảnh xem trước đang chờ và decode chính xác frame tại vị trí thả.
+        """
+        self.scrubber.cancel()
+        self.current_frame_index = self.frame_slider.value()
+        self.request_frame(self.current_frame_index)
+
+    def navigate(self, frame_index):
+        """
+        Chuyển tới frame_index (Next/Previous, nhảy tới thời gian, mở video).
+
+        Slider được cập nhật mà không phát valueChanged, nên frame chỉ được yêu cầu một lần.
+
+        :param frame_index: Chỉ số frame (được giới hạn trong video).
+        """
+        frame_index = max(0, min(frame_index, self.total_frames - 1))
+        self.current_frame_index = frame_index
+        self.frame_slider.blockSignals(True)
+        self.frame_slider.setValue(frame_index)
+        self.frame_slider.blockSignals(False)
+        self.update_time_label()
+        self.request_frame(frame_index)
+
+    def request_frame(self, frame_index):
+        """
+        Yêu cầu hiển thị frame_index.
+
+        Frame được decode ở lượt xử lý sự kiện kế tiếp; nếu trong lúc đó có yêu cầu mới hơn
+        (ví dụ bấm Next liên tục, giữ phím trên slider), yêu cầu cũ bị bỏ và chỉ frame mới nhất
+        được decode.
+
+        :param frame_index: Chỉ số frame cần hiển thị.
+        """
+        self.frame_requests += 1
+        if self.pending_frame is not None:
+            self.superseded_requests += 1
+        else:
+            QTimer.singleShot(0, self.render_pending_frame)
+        self.pending_frame = frame_index
+
+    def render_pending_frame(self):
+        """
+        Hiển thị frame đang chờ (nếu có và khác frame đang hiển thị).
+
+        Cũng được gọi trực tiếp trước khi dùng current_frame (ví dụ Save Frame) để frame
+        đang hiển thị khớp với current_frame_index.
+        """
+        frame_index, self.pending_frame = self.pending_frame, None
+        if frame_index is None or frame_index == self.displayed_index:
+            return
+        self.show_frame(frame_index)
+
+    def on_scrub_preview(self, index, image):
+        """
+        Hiển thị ảnh xem trước của điểm neo nếu người dùng vẫn đang kéo slider.
+
+        :param index: Chỉ số frame của điểm neo.
+        :param image: QImage đã thu nhỏ.
+        """
+        if self.frame_slider.isSliderDown():
+            self.frame_label.setPixmap(QPixmap.fromImage(image))
+            self.displayed_index = None
 
     def update_time_label(self):
         """
         Cập nhật nhãn thời gian hiển thị dựa trên frame hiện tại và tổng số frame.
         """
-        if self.fps > 0 and self.total_frames > 0:
-            current_time = self.current_frame_index / self.fps
-            total_time = self.total_frames / self.fps
+        if self.fps > 0 and self.total_frames > 0 and self.cap is not None:
+            # Theo PTS khi decode bằng PyAV (đúng với video VFR), ngược lại theo FPS trung bình
+            current_time = frame_time(self.cap, self.current_frame_index)
+            total_time = frame_time(self.cap, self.total_frames)
             self.time_label.setText(f"Time: {format_time(current_time)} / {format_time(total_time)}")
         else:
             self.time_label.setText("Time: 00:00 / 00:00")
@@ -130,7 +468,8 @@ class VideoScrapingTab(QWidget):
         """
         Nhảy đến frame tương ứng với thời gian nhập vào.
         
-        Chuyển chuỗi thời gian (ss, mm:ss, hoặc hh:mm:ss) thành số giây và tính frame index.
+        Chuyển chuỗi thời gian (ss, mm:ss, hoặc hh:mm:ss) thành số giây và tìm frame index
+        (theo bảng PTS với PyAV, theo FPS trung bình với OpenCV; xem video_decoder.frame_at_time).
         Nếu định dạng không hợp lệ, hiển thị cảnh báo.
         """
         time_str = self.time_input.text().strip()
@@ -142,15 +481,7 @@ class VideoScrapingTab(QWidget):
         if self.fps <= 0:
             QMessageBox.warning(self, "Error", "Không xác định được FPS của video.")
             return
-        frame_index = int(seconds * self.fps)
-        if frame_index < 0:
-            frame_index = 0
-        elif frame_index >= self.total_frames:
-            frame_index = self.total_frames - 1
-        self.current_frame_index = frame_index
-        self.frame_slider.setValue(frame_index)
-        self.show_frame(frame_index)
-        self.update_time_label()
+        self.navigate(frame_at_time(self.cap, seconds))
 
     def browse_file(self):
         """
@@ -164,70 +495,165 @@ class VideoScrapingTab(QWidget):
         """
         Tải video từ nguồn nhập vào (link YouTube hoặc file video).
         
-        Nếu là link YouTube, sử dụng yt_dlp để tải về file video.
-        Sau khi tải thành công, thiết lập các thông số (fps, tổng frame, slider, ...).
-        Nếu không mở được video, hiển thị thông báo lỗi.
+        Nếu là link, video được tải nền (xem video_download.py) và mở khi tải xong; giao diện
+        vẫn dùng được trong lúc tải. Nếu là file, mở ngay.
         """
         source = self.video_input.text().strip()
         if source.startswith("http"):
-            try:
-                # Sử dụng yt_dlp để tải video về với tên file là tiêu đề của video
-                ydl_opts = {
-                    'format': 'bestvideo[ext=mp4]+bestaudio/best',
-                    'outtmpl': '%(title)s.%(ext)s',
-                    'quiet': True,
-                }
-                with YoutubeDL(ydl_opts) as ydl:
-                    info_dict = ydl.extract_info(source, download=True)
-                    filename = ydl.prepare_filename(info_dict)
-                if not os.path.exists(filename):
-                    raise Exception("Không tải được file video.")
-                self.video_title = info_dict.get("title", "video")
-                self.cap = cv2.VideoCapture(filename)
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Lỗi khi tải video YouTube bằng yt_dlp: {e}")
+            if self.downloader.is_busy():
                 return
+            self.load_button.setEnabled(False)
+            self.cancel_download_button.setEnabled(True)
+            self.download_progress.setValue(0)
+            self.download_status.setText("Đang tải video...")
+            self.downloader.start(source, self.resolution_combo.currentData())
         else:
             if not os.path.exists(source):
                 QMessageBox.warning(self, "Error", "File không tồn tại!")
                 return
-            self.video_title = os.path.splitext(os.path.basename(source))[0]
-            self.cap = cv2.VideoCapture(source)
-        if self.cap is not None and self.cap.isOpened():
+            self.open_video(source, os.path.splitext(os.path.basename(source))[0])
+
+    def on_download_progress(self, fraction, text):
+        """
+        Cập nhật thanh tiến độ tải (fraction âm khi chưa biết dung lượng).
+        """
+        if fraction < 0:
+            self.download_progress.setRange(0, 0)
+        else:
+            self.download_progress.setRange(0, 1000)
+            self.download_progress.setValue(int(fraction * 1000))
+        self.download_status.setText(text)
+
+    def on_download_finished(self, path, title, cached):
+        """
+        Mở video vừa tải (hoặc lấy từ cache).
+        """
+        self.load_button.setEnabled(True)
+        self.cancel_download_button.setEnabled(False)
+        self.download_progress.setRange(0, 1000)
+        self.download_progress.setValue(1000)
+        self.download_status.setText("Lấy từ cache" if cached else "Đã tải xong")
+        self.open_video(path, title)
+
+    def on_download_failed(self, error):
+        """
+        Báo lỗi khi tải video thất bại hoặc bị hủy.
+        """
+        self.load_button.setEnabled(True)
+        self.cancel_download_button.setEnabled(False)
+        self.download_progress.setRange(0, 1000)
+        self.download_progress.setValue(0)
+        self.download_status.setText("")
+        QMessageBox.warning(self, "Error", f"Lỗi khi tải video bằng yt_dlp: {error}")
+
+    def open_video(self, path, title):
+        """
+        Mở file video và thiết lập các thông số (fps, tổng frame, slider, ...).
+        Nếu không mở được video, hiển thị thông báo lỗi.
+
+        :param path: Đường dẫn file video.
+        :param title: Tên video (dùng làm tên thư mục lưu frame).
+        """
+        if self.cap is not None:
+            self.cap.release()
+        self.video_title = title
+        self.video_path = path
+        self.decoder_backend = resolve_backend(self.decoder_combo.currentData())
+        self.cap = open_capture(path, self.decoder_backend)
+        if self.cap.isOpened():
             self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
             self.fps = self.cap.get(cv2.CAP_PROP_FPS)
-            self.current_frame_index = 0
+            self.reader = FrameReader(self.cap)
+            self.frame_cache.clear()
+            self.frame_display.clear()
+            self.backward_prefetcher.set_video(self.video_path, self.decoder_backend)
+            self.scrubber.set_video(self.video_path, self.fps, self.total_frames, self.decoder_backend)
+            self.shots = []
+            self.frame_filter.reset()
+            self.frame_slider.set_marks([])
+            self.frame_slider.set_previews(None, self.fps)
+            self.keyframes = None
+            self.index_label.setText("Đang lập chỉ mục...")
+            self.indexer.start(self.video_path)
+            self.export_shots_button.setEnabled(False)
+            self.displayed_index = None
             self.frame_slider.setMaximum(self.total_frames - 1)
-            self.frame_slider.setValue(0)
-            self.show_frame(self.current_frame_index)
-            self.update_time_label()
+            self.navigate(0)
         else:
             QMessageBox.warning(self, "Error", "Không mở được video!")
 
+    def on_index_ready(self, index, cached):
+        """
+        Dùng chỉ mục vừa lập (hoặc đọc từ file đã lưu): keyframe cho việc seek, điểm neo khi
+        kéo slider và trích xuất; dải thumbnail cho xem trước khi rê chuột trên slider.
+        """
+        # Chỉ số keyframe chỉ khớp với bộ decode cùng backend đã đánh số chúng
+        keyframes = index.keyframes if index.backend == self.decoder_backend else []
+        self.keyframes = keyframes or None
+        if self.reader is not None:
+            self.reader.set_keyframes(keyframes)
+        self.scrubber.set_keyframes(keyframes)
+        self.frame_slider.set_previews(index, self.fps)
+        self.index_label.setText(f"{len(index.keyframes)} keyframe, {len(index.thumb_frames)} thumbnail"
+                                 + (" (đã lưu)" if cached else "")
+                                 + ("" if keyframes or not index.keyframes else
+                                    f" - keyframe đánh số theo {index.backend}, không dùng"))
+
+    def on_index_failed(self, error):
+        """
+        Lỗi lập chỉ mục chỉ làm mất xem trước/keyframe, video vẫn dùng được.
+        """
+        self.index_label.setText("Không lập được chỉ mục")
+        print(f"Lỗi lập chỉ mục video: {error}")
+
     def show_frame(self, frame_index):
         """
-        Hiển thị frame tương ứng với chỉ số frame_index từ video.
+        Hiển thị frame tương ứng với chỉ số frame_index từ video (chỉ gọi qua request_frame).
         
-        Đọc frame từ video, chuyển đổi màu và hiển thị trên label.
+        Lấy frame từ FrameCache nếu có, ngược lại đọc qua FrameReader (đọc tuần tự nếu là
+        frame kế tiếp hoặc ở gần phía trước, chỉ seek khi nhảy xa) và lưu vào cache;
+        sau đó chuyển đổi màu và hiển thị trên label.
         Nếu không đọc được frame, hiển thị thông báo lỗi.
         
         :param frame_index: Chỉ số frame cần hiển thị.
         """
         if self.cap is None or not self.cap.isOpened():
             return
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
-        ret, frame = self.cap.read()
-        if not ret:
+        self.frame_cache.set_center(frame_index)
+        frame = self.frame_cache.get(frame_index)
+        if frame is None:
+            self.frame_loads += 1
+            frame = self.reader.read(frame_index)
+            if frame is not None:
+                self.frame_cache.put(frame_index, frame)
+        self.decode_label.setText(f"[{self.decoder_backend}] {self.reader.stats_text()} | {self.frame_cache.stats_text()} | "
+                                  f"{self.navigation_stats_text()}")
+        if frame is None:
             QMessageBox.warning(self, "Error", "Không đọc được frame!")
             return
         self.current_frame = frame
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        height, width, channels = frame_rgb.shape
-        bytes_per_line = channels * width
-        qimg = QImage(frame_rgb.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimg)
-        scaled_pixmap = pixmap.scaled(self.frame_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.frame_label.setPixmap(scaled_pixmap)
+        self.displayed_index = frame_index
+        self.display_frame(frame)
+
+    def navigation_stats_text(self):
+        """
+        :return: Chuỗi thống kê điều hướng: số yêu cầu frame, số yêu cầu bị thay thế và số lần
+                 decode (mỗi thao tác tới một frame chưa có trong cache đúng một lần decode).
+        """
+        return (f"{self.frame_requests} yêu cầu, {self.superseded_requests} bị thay, "
+                f"{self.frame_loads} lần decode")
+
+    def display_frame(self, frame):
+        """
+        Hiển thị frame BGR trên label (giữ tỉ lệ khung hình).
+
+        Frame được thu nhỏ về kích thước label trước rồi mới chuyển sang QPixmap
+        (xem frame_display.py), thay vì chuyển màu và tạo QPixmap cho cả frame gốc.
+
+        :param frame: Frame BGR (numpy array).
+        """
+        self.frame_label.setPixmap(self.frame_display.to_pixmap(frame, self.frame_label.width(),
+                                                                self.frame_label.height()))
 
     def next_frame(self):
         """
@@ -236,32 +662,53 @@ class VideoScrapingTab(QWidget):
         if self.cap is None:
             return
         if self.current_frame_index < self.total_frames - 1:
-            self.current_frame_index += 1
-            self.frame_slider.setValue(self.current_frame_index)
-            self.show_frame(self.current_frame_index)
-            self.update_time_label()
+            self.navigate(self.current_frame_index + 1)
 
     def prev_frame(self):
         """
         Chuyển sang frame trước nếu chưa đạt đến frame đầu.
+
+        Đồng thời yêu cầu decode trước đoạn frame phía sau vào cache, để các lần bấm
+        tiếp theo không phải seek.
         """
         if self.cap is None:
             return
         if self.current_frame_index > 0:
-            self.current_frame_index -= 1
-            self.frame_slider.setValue(self.current_frame_index)
-            self.show_frame(self.current_frame_index)
-            self.update_time_label()
+            self.navigate(self.current_frame_index - 1)
+            if self.current_frame is not None:
+                self.backward_prefetcher.request(self.current_frame_index, self.current_frame.nbytes)
     
     def save_frame(self):
         """
-        Lưu frame hiện tại dưới dạng file ảnh (.jpg).
+        Đưa frame hiện tại vào hàng đợi ghi nền theo định dạng đã chọn.
         
-        Tên file được xây dựng dựa trên tên video (đã được sanitize) và số thứ tự frame.
+        Tên file được xây dựng dựa trên tên video (đã được sanitize) và số thứ tự frame;
+        nếu file đã tồn tại, thêm đuôi số (_2, _3, ...) thay vì ghi đè.
         Frame được lưu vào thư mục 'dataset/<tên_video>/'.
+        Nếu bật tùy chọn lọc, frame mờ hoặc gần trùng với frame vừa lưu sẽ không được lưu.
+        Nếu bật tùy chọn bỏ qua frame gần trùng và frame đã có trong dataset (theo perceptual hash),
+        frame sẽ không được lưu.
+        Kết quả được hiển thị trên dòng trạng thái thay vì hộp thoại.
         """
+        self.render_pending_frame()
         if self.current_frame is None:
             return
+        options = self.filter_options()
+        if options is not None:
+            self.frame_filter.min_sharpness = options["min_sharpness"]
+            self.frame_filter.max_distance = options["max_distance"]
+            reason = self.frame_filter.check(self.current_frame)
+            if reason is not None:
+                self.save_status.setText(f"Frame {self.current_frame_index} bị lọc, không lưu: {reason}")
+                return
+        frame_hash = None
+        if self.skip_duplicates_check.isChecked():
+            # Chỉ mục chưa load xong (đang tạo nền) thì bỏ qua kiểm tra thay vì chặn giao diện
+            frame_hash = self.dedup_index.hash_frame(self.current_frame)
+            duplicate = self.dedup_index.find_duplicate(frame_hash, wait=False)
+            if duplicate is not None:
+                self.save_status.setText(f"Frame {self.current_frame_index} gần trùng với ảnh đã có, bỏ qua: {duplicate}")
+                return
         # Lấy tên video từ thuộc tính video_title, nếu không có thì lấy từ video_input
         base = "video"
         if hasattr(self, "video_title"):
@@ -270,17 +717,245 @@ class VideoScrapingTab(QWidget):
             source = self.video_input.text().strip()
             if not source.startswith("http"):
                 base = os.path.splitext(os.path.basename(source))[0]
-        # Chuẩn hóa tên file
-        base = sanitize_filename(base)
-        # Rút gọn tên video (ví dụ: chỉ lấy 10 ký tự đầu)
-        short_base = base if len(base) <= 10 else base[:10]
-        save_dir = os.path.join("dataset", base)
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
-        filename = os.path.join(save_dir, f"{short_base}_{self.current_frame_index}.jpg")
-        print("Lưu frame vào:", filename)
-        success = cv2.imwrite(filename, self.current_frame)
-        if success:
-            QMessageBox.information(self, "Saved", f"Frame đã được lưu: {filename}")
+        # Chuẩn hóa và rút gọn tên video (chỉ lấy 10 ký tự đầu)
+        save_dir, short_base = frame_output(base)
+        accepted = self.frame_writer.submit(self.current_frame, save_dir, f"{short_base}_{self.current_frame_index}",
+                                            self.output_options(), self.dedup_index.method, frame_hash)
+        if accepted:
+            note = ""
+            if self.skip_duplicates_check.isChecked() and not self.dedup_index.is_ready():
+                note = " - chỉ mục ảnh trùng đang được tạo, chưa kiểm tra trùng"
+            self.save_status.setText(f"Đang lưu frame {self.current_frame_index}... "
+                                     f"({self.frame_writer.pending} frame đang chờ ghi){note}")
         else:
-            QMessageBox.warning(self, "Error", "Không lưu được frame!")
+            self.save_status.setText("Hàng đợi ghi đang đầy, thử lại sau giây lát.")
+
+    def on_frame_written(self, result):
+        """
+        Cập nhật chỉ mục perceptual hash và dòng trạng thái khi một frame đã được ghi.
+
+        :param result: Dict kết quả từ FrameWriter (path, hash, error).
+        """
+        if result["error"] is not None:
+            print("Lỗi lưu frame:", result["error"])
+            self.save_status.setText(f"Không lưu được frame: {result['error']}")
+            return
+        print("Lưu frame vào:", result["path"])
+        if result["hash"] is not None:
+            self.dedup_index.add(result["path"], result["hash"])
+        pending = self.frame_writer.pending
+        self.save_status.setText(f"Frame đã được lưu: {result['path']}"
+                                 + (f" ({pending} frame đang chờ ghi)" if pending else ""))
+
+    def extract_mode_changed(self, mode):
+        """
+        Cập nhật ô giá trị theo chế độ trích xuất (N frame, T giây, hoặc không cần giá trị).
+        """
+        self.extract_value_spin.setEnabled(mode != 2)
+        self.extract_value_spin.setDecimals(0 if mode == 0 else 2)
+        self.extract_value_spin.setMinimum(1 if mode == 0 else 0.01)
+
+    def start_extraction(self):
+        """
+        Trích xuất hàng loạt các frame đã chọn vào 'dataset/<tên_video>/' bằng nhiều worker
+        process, hiển thị tiến độ trên thanh progress; có thể hủy bằng nút Cancel.
+        """
+        if self.video_path is None or self.job_cancel is not None:
+            return
+        try:
+            start = parse_time(self.extract_start_input.text().strip() or "0")
+            end_text = self.extract_end_input.text().strip()
+            end = parse_time(end_text) if end_text else None
+        except Exception:
+            QMessageBox.warning(self, "Error", "Định dạng thời gian không hợp lệ!")
+            return
+        mode = self.extract_mode_combo.currentIndex()
+        value = self.extract_value_spin.value()
+        try:
+            indices = select_frames(self.total_frames, self.fps,
+                                    every_n=int(value) if mode == 0 else None,
+                                    every_seconds=value if mode == 1 else None,
+                                    start=start, end=end,
+                                    locate=lambda seconds: frame_at_time(self.cap, seconds))
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        if not indices:
+            QMessageBox.warning(self, "Error", "Không có frame nào trong khoảng đã chọn.")
+            return
+        self.run_extraction(indices)
+
+    def run_extraction(self, indices):
+        """
+        Trích xuất các frame có chỉ số trong indices vào 'dataset/<tên_video>/' trên thread nền.
+
+        :param indices: List chỉ số frame tăng dần.
+        """
+        save_dir, short_base = frame_output(getattr(self, "video_title", "video"))
+        self.extract_status.setText(f"Đang trích xuất {len(indices)} frame vào {save_dir}...")
+        self.start_job(self.extraction_signals, len(indices), extract_frames,
+                       self.video_path, indices, save_dir, short_base, output_options=self.output_options(),
+                       keyframes=self.keyframes, hash_method=self.dedup_index.method,
+                       filter_options=self.filter_options(), backend=self.decoder_backend)
+
+    def output_options(self):
+        """
+        :return: Dict tham số của frame_encode.encode_frame theo các ô định dạng.
+        """
+        return {
+            "format": self.format_combo.currentData(),
+            "quality": self.quality_spin.value(),
+            "png_compression": self.png_compression_spin.value(),
+            "max_side": self.max_side_spin.value(),
+        }
+
+    def filter_options(self):
+        """
+        :return: Dict tham số FrameFilter theo các ô tùy chọn, hoặc None nếu không bật lọc.
+        """
+        if not self.filter_check.isChecked():
+            return None
+        return {"min_sharpness": self.sharpness_spin.value(), "max_distance": self.distance_spin.value()}
+
+    def start_job(self, signals, total, func, *args, unit="frame", **kwargs):
+        """
+        Bắt đầu một tác vụ nền, khóa các nút khởi động tác vụ và bật nút Cancel.
+
+        :param signals: _JobSignals nhận tiến độ và kết quả.
+        :param total: Giá trị tối đa của thanh tiến độ (0 nếu chưa biết).
+        :param func: Hàm chạy tác vụ (extract_frames, detect_scenes, run_batch).
+        :param unit: Đơn vị hiển thị trên thanh tiến độ.
+        """
+        self.job_cancel = threading.Event()
+        self.extract_progress.setFormat(f"%v/%m {unit}")
+        self.extract_progress.setRange(0, total)
+        self.extract_progress.setValue(0)
+        self.set_job_buttons(True)
+        self.job_pool.start(_JobTask(signals, self.job_cancel, func, *args, **kwargs))
+
+    def set_job_buttons(self, running):
+        """
+        Bật/tắt các nút theo trạng thái tác vụ nền.
+        """
+        self.extract_button.setEnabled(not running)
+        self.detect_scenes_button.setEnabled(not running)
+        self.export_shots_button.setEnabled(not running and bool(self.shots))
+        self.batch_button.setEnabled(not running)
+        self.cancel_extract_button.setEnabled(running)
+
+    def cancel_extraction(self):
+        """
+        Hủy tác vụ nền: các đoạn chưa bắt đầu bị bỏ, các đoạn đang decode vẫn được xử lý.
+        """
+        if self.job_cancel is not None:
+            self.job_cancel.set()
+            self.cancel_extract_button.setEnabled(False)
+            self.extract_status.setText("Đang hủy...")
+
+    def on_job_progress(self, done, total):
+        """
+        Cập nhật thanh tiến độ của tác vụ nền.
+        """
+        self.extract_progress.setMaximum(total)
+        self.extract_progress.setValue(done)
+
+    def on_extraction_finished(self, stats):
+        """
+        Cập nhật chỉ mục perceptual hash với các frame đã lưu và hiển thị tóm tắt.
+        """
+        self.job_cancel = None
+        self.set_job_buttons(False)
+        if "error" in stats:
+            self.extract_status.setText(f"Lỗi trích xuất: {stats['error']}")
+            return
+        for _, filename, value in stats["saved"]:
+            if value is not None:
+                self.dedup_index.add(filename, value)
+        self.extract_status.setText(summary_text(stats))
+
+    def start_scene_detection(self):
+        """
+        Phát hiện chuyển cảnh của video hiện tại trên thread nền.
+        """
+        if self.video_path is None or self.job_cancel is not None:
+            return
+        self.extract_status.setText("Đang phát hiện chuyển cảnh...")
+        self.start_job(self.scene_signals, self.total_frames, detect_scenes, self.video_path)
+
+    def on_scenes_detected(self, result):
+        """
+        Đánh dấu các vị trí chuyển cảnh trên slider.
+        """
+        self.job_cancel = None
+        if "error" in result:
+            self.set_job_buttons(False)
+            self.extract_status.setText(f"Lỗi phát hiện chuyển cảnh: {result['error']}")
+            return
+        if result["cancelled"]:
+            self.set_job_buttons(False)
+            self.extract_status.setText("Đã hủy phát hiện chuyển cảnh.")
+            return
+        self.shots = result["shots"]
+        self.frame_slider.set_marks(result["boundaries"])
+        self.set_job_buttons(False)
+        self.extract_status.setText(f"Phát hiện {len(self.shots)} cảnh.")
+
+    def export_shots(self):
+        """
+        Lưu frame đại diện cho mỗi cảnh đã phát hiện vào 'dataset/<tên_video>/'.
+        """
+        if not self.shots or self.job_cancel is not None:
+            return
+        self.run_extraction(representative_frames(self.shots, self.frames_per_shot_spin.value()))
+
+    def start_batch(self):
+        """
+        Trích xuất frame cho mọi video của nguồn trong ô nhập (thư mục, mẫu glob hoặc link
+        playlist/video), hoặc của thư mục được chọn nếu ô nhập trống, theo chế độ và khoảng
+        thời gian của hàng Extract (áp dụng cho từng video). Video đã xong ở lần chạy trước
+        được bỏ qua, video dở dang được tiếp tục.
+        """
+        if self.job_cancel is not None:
+            return
+        try:
+            start = parse_time(self.extract_start_input.text().strip() or "0")
+            end_text = self.extract_end_input.text().strip()
+            end = parse_time(end_text) if end_text else None
+        except Exception:
+            QMessageBox.warning(self, "Error", "Định dạng thời gian không hợp lệ!")
+            return
+        source = self.video_input.text().strip()
+        if not source:
+            source = QFileDialog.getExistingDirectory(self, "Chọn thư mục video")
+            if not source:
+                return
+        mode = self.extract_mode_combo.currentIndex()
+        value = self.extract_value_spin.value()
+        self.extract_status.setText(f"Đang lập hàng đợi từ {source}...")
+        self.start_job(self.batch_signals, 0, run_batch, [source],
+                       every_n=int(value) if mode == 0 else None,
+                       every_seconds=value if mode == 1 else None, start=start, end=end,
+                       output_options=self.output_options(), filter_options=self.filter_options(),
+                       hash_method=self.dedup_index.method, max_height=self.resolution_combo.currentData(),
+                       report=self.batch_signals.message.emit, unit="video")
+
+    def on_batch_message(self, text):
+        """
+        Hiển thị tiến độ của video đang xử lý trong batch.
+        """
+        if self.job_cancel is not None and not self.job_cancel.is_set():
+            self.extract_status.setText(text)
+
+    def on_batch_finished(self, stats):
+        """
+        Cập nhật chỉ mục perceptual hash với các frame đã lưu và hiển thị tóm tắt batch.
+        """
+        self.job_cancel = None
+        self.set_job_buttons(False)
+        if "error" in stats:
+            self.extract_status.setText(f"Lỗi batch: {stats['error']}")
+            return
+        for _, filename, value in stats["saved"]:
+            if value is not None:
+                self.dedup_index.add(filename, value)
+        self.extract_status.setText(batch_summary_text(stats))